@@ -1,21 +1,45 @@
+import argparse
+from contextlib import nullcontext
+
+from app.core.config import settings
 from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.core.profiling import add_profile_arguments, profiler_from_args
 from app.monitors.job_monitor import JobMonitor
 from app.monitors.dynamic_job_monitor import DynamicJobMonitor
 
 def main():
+    parser = argparse.ArgumentParser(description="SWMAP scraping engine")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiler_from_args(args)
+
     logger = setup_logger()
+    if settings.METRICS_PORT:
+        metrics.serve(settings.METRICS_PORT)
 
     logger.info("Starting scraping engine")
 
     static_monitor = JobMonitor("https://realpython.github.io/fake-jobs/")
 
-    dynamic_monitor = DynamicJobMonitor("https://webscraper.io/test-sites/e-commerce/ajax/computers/laptops")
+    dynamic_monitor = DynamicJobMonitor(
+        "https://webscraper.io/test-sites/e-commerce/ajax/computers/laptops", source_name="dynamic_laptops"
+    )
 
-    phones = DynamicJobMonitor("https://webscraper.io/test-sites/e-commerce/ajax/phones/touch")
+    phones = DynamicJobMonitor(
+        "https://webscraper.io/test-sites/e-commerce/ajax/phones/touch", source_name="dynamic_phones"
+    )
 
     # phones_data = phones.run()
 
-    jobs = phones.run()
+    with profiler.profile(phones.source_name) if profiler else nullcontext():
+        jobs = phones.run()
+
+    # Deliver what is left in the notification outbox before exiting
+    phones.notification_manager.close()
+
+    # Snapshot retention and compaction, after the run has finished
+    phones.retention.run()
 
     # jobs = static_monitor.run()
 
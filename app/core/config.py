@@ -9,6 +9,30 @@ class Settings:
     ENV = os.getenv("ENV", "development")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE = os.getenv("LOG_FILE", "logs/app.log")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+
+    # Metrics export (Prometheus text format)
+    METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")  # e.g. "data/metrics/swmap.prom"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = no /metrics endpoint
+
+    # Memory-mapped columnar copies of the latest snapshots, used for diffing (empty = off)
+    COLUMNAR_SNAPSHOT_DIR = os.getenv("COLUMNAR_SNAPSHOT_DIR", "")  # e.g. "data/columnar"
+
+    # Fraction of runs profiled without --profile (0 = never)
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+    # Notification dispatch (seconds)
+    NOTIFY_CHANNEL_TIMEOUT = float(os.getenv("NOTIFY_CHANNEL_TIMEOUT", "15"))
+    NOTIFY_DEADLINE = float(os.getenv("NOTIFY_DEADLINE", "30"))
+
+    # Console notifier: "full" report blocks or one "summary" line per report
+    CONSOLE_NOTIFY_MODE = os.getenv("CONSOLE_NOTIFY_MODE", "full")
+
+    # Durable notification outbox
+    NOTIFY_OUTBOX = os.getenv("NOTIFY_OUTBOX", "true").lower() == "true"
+    NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "8"))
+    NOTIFY_RETRY_BASE_SECONDS = float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "5"))
+    NOTIFY_RATE_PER_MINUTE = float(os.getenv("NOTIFY_RATE_PER_MINUTE", "0"))  # 0 = channel default
 
     # Email Notification Settings
     EMAIL_ENABLED = os.getenv("EMAIL_ENABLED", "false").lower() == "true"
@@ -18,11 +42,24 @@ class Settings:
     EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD", "")
     EMAIL_FROM = os.getenv("EMAIL_FROM", "")  # Defaults to EMAIL_USERNAME if empty
     EMAIL_TO = os.getenv("EMAIL_TO", "")
+    EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
+    EMAIL_DIGEST_SECONDS = float(os.getenv("EMAIL_DIGEST_SECONDS", "0"))  # 0 = one email per report
 
     # Telegram Notification Settings
     TELEGRAM_ENABLED = os.getenv("TELEGRAM_ENABLED", "false").lower() == "true"
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
     TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+    TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL", "")  # e.g. a local Bot API stub
+    TELEGRAM_COALESCE_SECONDS = float(os.getenv("TELEGRAM_COALESCE_SECONDS", "0"))
+
+    # Webhook Notification Settings
+    WEBHOOK_ENABLED = os.getenv("WEBHOOK_ENABLED", "false").lower() == "true"
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_FORMAT = os.getenv("WEBHOOK_FORMAT", "json")  # "json" or "slack"
+    WEBHOOK_AUTH_HEADER = os.getenv("WEBHOOK_AUTH_HEADER", "")  # e.g. "Bearer <token>"
+    WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+    WEBHOOK_BATCH_SECONDS = float(os.getenv("WEBHOOK_BATCH_SECONDS", "0"))
+    WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", "4"))
 
 
 settings = Settings()
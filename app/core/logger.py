@@ -1,29 +1,168 @@
+"""
+Application logging.
+
+setup_logger() installs the handlers once per process, however often it
+is called. Callers only put records on a queue (QueueHandler); a
+QueueListener thread does the file and terminal writes, so scraping
+threads never block on disk or stdout. With LOG_FORMAT=json each record is
+written as one JSON line carrying the source and run id set with
+log_context().
+"""
+import atexit
+import contextvars
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
 from app.core.config import settings
-import os 
 
-def setup_logger():
-    os.makedirs("logs", exist_ok=True)
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+# Source and run of the code currently logging (see log_context)
+_source: contextvars.ContextVar = contextvars.ContextVar("log_source", default=None)
+_run_id: contextvars.ContextVar = contextvars.ContextVar("log_run_id", default=None)
+
+_setup_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the source and run id of the logging context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.source = _source.get()
+        record.run_id = _run_id.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "source": getattr(record, "source", None),
+            "run_id": getattr(record, "run_id", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logger(json_format: Optional[bool] = None) -> logging.Logger:
+    """
+    Configure the app logger (idempotent).
+
+    Args:
+        json_format: Write JSON lines instead of text
+            (default: LOG_FORMAT == "json"); ignored once configured
+
+    Returns:
+        The app logger
+    """
+    global _listener
 
     logger = logging.getLogger(settings.APP_NAME)
-    logger.setLevel(settings.LOG_LEVEL)
+    with _setup_lock:
+        if _listener is not None:
+            return logger
+
+        if json_format is None:
+            json_format = settings.LOG_FORMAT == "json"
+        formatter = JSONFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+
+        log_dir = os.path.dirname(settings.LOG_FILE)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+        file_handler = RotatingFileHandler(
+            settings.LOG_FILE,
+            maxBytes=5_000_000,
+            backupCount=5
+        )
+        file_handler.setFormatter(formatter)
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+
+        # Unbounded, so logging never blocks the caller
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+
+        logger.setLevel(settings.LOG_LEVEL)
+        logger.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logger)
+
+    return logger
+
+
+def shutdown_logger():
+    """Write out queued records and stop the listener thread."""
+    global _listener
+
+    with _setup_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    logger = logging.getLogger(settings.APP_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+
+
+def new_run_id() -> str:
+    """Short random id for one monitor run."""
+    return uuid.uuid4().hex[:12]
+
+
+@contextmanager
+def log_context(source: Optional[str] = None, run_id: Optional[str] = None):
+    """
+    Tag the records logged in this block with a source and run id.
+
+    Args:
+        source: Source name (default: keep the current one)
+        run_id: Run id (default: a new one)
 
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
+    Yields:
+        The run id
+    """
+    run_id = run_id or new_run_id()
+    source_token = _source.set(source if source is not None else _source.get())
+    run_token = _run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _run_id.reset(run_token)
+        _source.reset(source_token)
 
-    file_handler = RotatingFileHandler(
-        settings.LOG_FILE,
-        maxBytes=5_000_000,
-        backupCount=5
-    )
-    file_handler.setFormatter(formatter)
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger for a module, as a child of the app logger.
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    Records reach the handlers installed by setup_logger; without it,
+    Python's last-resort handler shows warnings and errors only.
 
-    return logger
\ No newline at end of file
+    Args:
+        name: Module name, e.g. "monitors.job_monitor"
+    """
+    return logging.getLogger(f"{settings.APP_NAME}.{name}")
@@ -0,0 +1,287 @@
+"""
+Lightweight run instrumentation.
+
+Timers and counters are kept in a process-wide registry:
+
+    with metrics.timer("fetch"):
+        html = requests.get(url).text
+
+    @metrics.timed("detect")
+    def detect(...): ...
+
+    metrics.inc("items_scraped", len(items), source="laptops")
+
+Stage timers feed the `swmap_stage_seconds` summary (count, sum, max per
+stage). A stage entered again while it is already running (detect_against
+falling back to detect, say) is timed once, by the outermost call. Inside `metrics.run(source)` they are also added up per run, and
+the totals become one `run_metrics` row (see RunMetricsMixin). The
+registry can be exported in the Prometheus text format, either to a file
+for node_exporter's textfile collector or over a small HTTP endpoint.
+
+Recording is a perf_counter() pair and a dict update under a lock, cheap
+enough to leave on.
+"""
+import contextvars
+import functools
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+PREFIX = "swmap_"
+
+
+@dataclass
+class RunStats:
+    """Timings and counts collected during one monitor run."""
+    source_name: str
+    run_id: Optional[str] = None
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    stages: Dict[str, float] = field(default_factory=dict)
+    counts: Dict[str, float] = field(default_factory=dict)
+    status: str = "ok"
+    duration: float = 0.0
+
+    def add_stage(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_count(self, name: str, value: float):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+
+_current_run: contextvars.ContextVar = contextvars.ContextVar("metrics_run", default=None)
+# Stages currently being timed in this context
+_active_stages: contextvars.ContextVar = contextvars.ContextVar("metrics_stages", default=frozenset())
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    pairs = (
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in key
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters and timing summaries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._timings: Dict[str, Dict[LabelKey, list]] = {}  # [count, sum, max]
+        self.enabled = True
+        # Notified when a stage starts and ends (see app.core.profiling)
+        self.stage_listener = None
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Add to a counter (and to the current run's counts).
+
+        Args:
+            name: Counter name, without prefix or "_total" suffix
+            value: Amount to add
+            **labels: Prometheus labels
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        run = _current_run.get()
+        if run is not None:
+            run.add_count(name, value)
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration in a timing summary."""
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._timings.setdefault(name, {})
+            stats = series.get(key)
+            if stats is None:
+                series[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """
+        Time a block as a pipeline stage.
+
+        Nested blocks of a stage that is already being timed are not
+        recorded again, so the outer block's time is counted once.
+
+        Args:
+            stage: Stage name, e.g. "fetch", "detect", "insert"
+            **labels: Extra Prometheus labels
+        """
+        active = _active_stages.get()
+        if not self.enabled or stage in active:
+            yield
+            return
+        stages_token = _active_stages.set(active | {stage})
+        listener = self.stage_listener
+        if listener is not None:
+            listener.stage_started(stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _active_stages.reset(stages_token)
+            self.observe("stage_seconds", elapsed, stage=stage, **labels)
+            run = _current_run.get()
+            if run is not None:
+                run.add_stage(stage, elapsed)
+            if listener is not None:
+                listener.stage_finished(stage)
+
+    def timed(self, stage: str, **labels):
+        """
+        Decorator timing every call of a function as a stage.
+
+        Example:
+            @metrics.timed("fetch")
+            def fetch(self): ...
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def run(self, source_name: str, run_id: Optional[str] = None):
+        """
+        Collect the stages and counts of one monitor run.
+
+        Yields:
+            The RunStats, complete once the block exits
+        """
+        stats = RunStats(source_name=source_name, run_id=run_id)
+        token = _current_run.set(stats)
+        start = time.perf_counter()
+        try:
+            yield stats
+        except BaseException:
+            stats.status = "error"
+            raise
+        finally:
+            stats.duration = time.perf_counter() - start
+            _current_run.reset(token)
+            self.observe("run_seconds", stats.duration, source=source_name)
+            self.inc("runs", source=source_name, status=stats.status)
+
+    def snapshot(self) -> dict:
+        """Copy of all series, for tests and custom exporters."""
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "timings": {
+                    name: {key: list(stats) for key, stats in series.items()}
+                    for name, series in self._timings.items()
+                },
+            }
+
+    def reset(self):
+        """Drop all recorded series."""
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+    def render_prometheus(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        data = self.snapshot()
+        lines = []
+        for name, series in sorted(data["counters"].items()):
+            metric = f"{PREFIX}{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric}{_format_labels(key)} {value}")
+        for name, series in sorted(data["timings"].items()):
+            metric = f"{PREFIX}{name}"
+            lines.append(f"# TYPE {metric} summary")
+            for key, (count, total, _) in sorted(series.items()):
+                labels = _format_labels(key)
+                lines.append(f"{metric}_count{labels} {count}")
+                lines.append(f"{metric}_sum{labels} {total:.6f}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            for key, (_, _, maximum) in sorted(series.items()):
+                lines.append(f"{metric}_max{_format_labels(key)} {maximum:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """
+        Atomically write the registry for a textfile collector.
+
+        Args:
+            path: Target file, conventionally ending in .prom
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """
+        Serve /metrics on a daemon thread.
+
+        Args:
+            port: Port to listen on (0 picks a free one)
+            host: Interface to bind
+
+        Returns:
+            The running ThreadingHTTPServer (server.server_address has the port)
+        """
+        # Only entry points that expose metrics pay for the import
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+# Process-wide registry used by the pipeline
+metrics = MetricsRegistry()
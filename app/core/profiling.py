@@ -0,0 +1,269 @@
+"""
+Profiling hooks for monitor runs.
+
+RunProfiler wraps a run with cProfile and tracemalloc and splits the CPU
+profile by pipeline stage: it listens to the metrics stage timers and
+switches to a per-stage cProfile.Profile whenever a stage starts, so
+time spent in "fetch", "detect", "insert", ... is reported separately
+(code outside any stage is reported as "other").
+
+Each profiled run writes a directory next to the logs:
+
+    logs/profiles/<source>-<timestamp>/
+        summary.txt          top-N functions per stage, peak memory per
+                             stage and top-N allocation sites
+        run.pstats           all stages combined (python -m pstats, snakeviz)
+        <stage>.pstats       one stage
+        memory.tracemalloc   tracemalloc snapshot at the end of the run
+
+Profiling is sampled: with sample_rate=0.05 only one run in twenty pays
+for it, so it can stay enabled in production.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import metrics
+
+logger = get_logger("core.profiling")
+
+
+class _StageProfiles:
+    """Per-stage cProfile state for the profiled thread (a metrics stage listener)."""
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.profiles: Dict[str, cProfile.Profile] = {"other": cProfile.Profile()}
+        self.stack: List[cProfile.Profile] = [self.profiles["other"]]
+        self.peaks: Dict[str, int] = {}
+        # [traced memory at stage start, highest peak seen before the last
+        # tracemalloc.reset_peak()] per open stage, outermost (the run) first
+        self._memory: List[List[int]] = [[0, 0]]
+
+    def start(self):
+        self.stack[-1].enable()
+
+    def stop(self):
+        self.stack[-1].disable()
+
+    def peak_memory(self) -> int:
+        """Peak traced memory of the whole run, across the per-stage peak resets."""
+        return max(tracemalloc.get_traced_memory()[1], self._memory[0][1])
+
+    def stage_started(self, stage: str):
+        # Stages timed on other threads (writer, notifier pool) are not profiled
+        if threading.get_ident() != self.thread_id:
+            return
+        self.stack[-1].disable()
+        profile = self.profiles.setdefault(stage, cProfile.Profile())
+        self.stack.append(profile)
+        if tracemalloc.is_tracing():
+            # Keep the enclosing stage's peak so far before resetting it
+            current, peak = tracemalloc.get_traced_memory()
+            outer = self._memory[-1]
+            outer[1] = max(outer[1], peak)
+            tracemalloc.reset_peak()
+            self._memory.append([current, current])
+        profile.enable()
+
+    def stage_finished(self, stage: str):
+        if threading.get_ident() != self.thread_id:
+            return
+        self.stack.pop().disable()
+        if tracemalloc.is_tracing() and len(self._memory) > 1:
+            start, inner_peak = self._memory.pop()
+            peak = max(tracemalloc.get_traced_memory()[1], inner_peak)
+            self.peaks[stage] = max(self.peaks.get(stage, 0), peak - start)
+            # The stage's peak is also a peak of the stage around it
+            outer = self._memory[-1]
+            outer[1] = max(outer[1], peak)
+        self.stack[-1].enable()
+
+
+class RunProfiler:
+    """
+    Sampling cProfile + tracemalloc profiler for monitor runs.
+
+    Example:
+        profiler = RunProfiler(sample_rate=1.0)
+        with profiler.profile(monitor.source_name):
+            monitor.run()
+    """
+
+    def __init__(
+        self,
+        output_dir: Optional[str] = None,
+        sample_rate: float = 1.0,
+        top_n: int = 25,
+        trace_memory: bool = True,
+        memory_frames: int = 1
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_dir: Where run directories go (default: "profiles" next
+                to LOG_FILE)
+            sample_rate: Fraction of runs that are profiled (0..1)
+            top_n: Functions / allocation sites kept in the summary
+            trace_memory: Also run tracemalloc
+            memory_frames: Stack frames stored per allocation (more frames
+                cost more memory and time)
+        """
+        self.output_dir = output_dir or os.path.join(
+            os.path.dirname(settings.LOG_FILE) or ".", "profiles"
+        )
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self.memory_frames = memory_frames
+        self._lock = threading.Lock()
+
+    def should_sample(self) -> bool:
+        """Decide whether the next run is profiled."""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, label: str):
+        """
+        Profile the block if this run is sampled.
+
+        Only one run is profiled at a time; concurrent runs (other
+        threads) are skipped while one is being profiled.
+
+        Args:
+            label: Run label, usually the source name
+
+        Yields:
+            The output directory if profiled, else None
+        """
+        if not self.should_sample() or not self._lock.acquire(blocking=False):
+            yield None
+            return
+
+        try:
+            stages = _StageProfiles(threading.get_ident())
+            started_tracing = False
+            if self.trace_memory and not tracemalloc.is_tracing():
+                tracemalloc.start(self.memory_frames)
+                started_tracing = True
+
+            run_dir = os.path.join(
+                self.output_dir, f"{label}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+            )
+            previous_listener = metrics.stage_listener
+            metrics.stage_listener = stages
+            start = time.perf_counter()
+            stages.start()
+            try:
+                yield run_dir
+            finally:
+                stages.stop()
+                elapsed = time.perf_counter() - start
+                metrics.stage_listener = previous_listener
+
+                snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+                peak = stages.peak_memory() if tracemalloc.is_tracing() else None
+                if started_tracing:
+                    tracemalloc.stop()
+
+                try:
+                    self._save(run_dir, label, elapsed, stages, snapshot, peak)
+                    logger.info("Profile of %s written to %s", label, run_dir)
+                except OSError as e:
+                    logger.warning("Could not write profile of %s: %s", label, e)
+        finally:
+            self._lock.release()
+
+    def _save(
+        self,
+        run_dir: str,
+        label: str,
+        elapsed: float,
+        stages: _StageProfiles,
+        snapshot: Optional[tracemalloc.Snapshot],
+        peak: Optional[int]
+    ):
+        os.makedirs(run_dir, exist_ok=True)
+        profiles = {
+            stage: profile for stage, profile in stages.profiles.items()
+            if profile.getstats()
+        }
+
+        for stage, profile in profiles.items():
+            profile.dump_stats(os.path.join(run_dir, f"{stage}.pstats"))
+        if profiles:
+            combined = pstats.Stats(*profiles.values())
+            combined.dump_stats(os.path.join(run_dir, "run.pstats"))
+        if snapshot is not None:
+            snapshot.dump(os.path.join(run_dir, "memory.tracemalloc"))
+
+        lines = [f"Profile of {label}: {elapsed:.3f}s wall time"]
+        if peak is not None:
+            lines.append(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB")
+
+        for stage, profile in sorted(profiles.items()):
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            growth = stages.peaks.get(stage)
+            memory = f", peak +{growth / 1024 / 1024:.1f} MiB" if growth is not None else ""
+            lines.append("")
+            lines.append(f"=== {stage}: {stats.total_tt:.3f}s CPU-profiled{memory} ===")
+            lines.append(self._top_functions(stats))
+
+        if snapshot is not None:
+            lines.append("")
+            lines.append(f"=== Top {self.top_n} allocation sites ===")
+            for entry in snapshot.statistics("lineno")[:self.top_n]:
+                lines.append(str(entry))
+
+        with open(os.path.join(run_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _top_functions(self, stats: pstats.Stats) -> str:
+        """Top-N functions by cumulative time, as printed by pstats."""
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        # Drop the pstats preamble before the table header
+        text = stream.getvalue()
+        header = text.find("   ncalls")
+        return text[header:].rstrip() if header >= 0 else text.rstrip()
+
+
+def profiler_from_args(args) -> Optional[RunProfiler]:
+    """
+    Build the profiler selected by the --profile options (or PROFILE_SAMPLE_RATE).
+
+    Returns:
+        A RunProfiler, or None when no run will be profiled
+    """
+    if args.profile:
+        rate = args.profile_sample if args.profile_sample is not None else 1.0
+    else:
+        rate = args.profile_sample if args.profile_sample is not None else settings.PROFILE_SAMPLE_RATE
+    if rate <= 0:
+        return None
+    return RunProfiler(output_dir=args.profile_dir, sample_rate=rate, top_n=args.profile_top)
+
+
+def add_profile_arguments(parser):
+    """Add the --profile options to an argparse parser."""
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the monitor run (cProfile + tracemalloc)")
+    parser.add_argument("--profile-sample", type=float, default=None,
+                        help="Fraction of runs to profile (default: 1 with --profile, "
+                             "else PROFILE_SAMPLE_RATE)")
+    parser.add_argument("--profile-top", type=int, default=25,
+                        help="Functions and allocation sites kept per stage")
+    parser.add_argument("--profile-dir", default=None,
+                        help="Output directory (default: logs/profiles)")
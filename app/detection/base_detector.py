@@ -40,6 +40,43 @@ class ChangeReport:
             parts.append(f"{len(self.modified_items)} modified")
         return ", ".join(parts) if parts else "No changes"
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report to JSON-serializable primitives."""
+        return {
+            "new_items": self.new_items,
+            "removed_items": self.removed_items,
+            "modified_items": [
+                {
+                    "item_id": change.item_id,
+                    "old_item": change.old_item,
+                    "new_item": change.new_item,
+                    "changed_fields": {
+                        name: list(values) for name, values in change.changed_fields.items()
+                    },
+                }
+                for change in self.modified_items
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChangeReport":
+        """Rebuild a report produced by to_dict()."""
+        return cls(
+            new_items=list(data.get("new_items", [])),
+            removed_items=list(data.get("removed_items", [])),
+            modified_items=[
+                ItemChange(
+                    item_id=change["item_id"],
+                    old_item=change["old_item"],
+                    new_item=change["new_item"],
+                    changed_fields={
+                        name: tuple(values) for name, values in change["changed_fields"].items()
+                    },
+                )
+                for change in data.get("modified_items", [])
+            ],
+        )
+
 
 class BaseDetector(ABC):
     """Abstract base class for change detectors."""
@@ -1,7 +1,8 @@
 from typing import List, Dict, Any, Optional
 from .base_detector import BaseDetector, ChangeReport, ItemChange
-from .hashers import generate_item_id
+from .hashers import last_positions
 from .comparators import compare_sets, compare_fields
+from app.core.metrics import metrics
 
 
 class ChangeDetector(BaseDetector):
@@ -18,7 +19,8 @@ class ChangeDetector(BaseDetector):
         self, 
         key_fields: List[str], 
         compare_fields: List[str] = None,
-        price_field: str = None
+        price_field: str = None,
+        backend=None
     ):
         """
         Initialize the change detector.
@@ -27,18 +29,21 @@ class ChangeDetector(BaseDetector):
             key_fields: Fields that uniquely identify an item (e.g., ["title"])
             compare_fields: Fields to compare for modifications. If None, uses all fields.
             price_field: Optional field name for special price comparison handling
+            backend: Optional backend for detect_against (e.g. SQLiteDiffBackend)
         """
         self.key_fields = key_fields
         self.compare_fields = compare_fields
         self.price_field = price_field
+        self.backend = backend
 
     def _build_index(self, data: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-        """Build an index mapping item IDs to items."""
+        """Build an index mapping item IDs to items (last occurrence wins)."""
         return {
-            generate_item_id(item, self.key_fields): item 
-            for item in data
+            item_id: data[position]
+            for item_id, position in last_positions(data, self.key_fields).items()
         }
 
+    @metrics.timed("detect")
     def detect(self, old_data: List[Dict], new_data: List[Dict]) -> ChangeReport:
         """
         Detect changes between old and new data.
@@ -58,12 +63,12 @@ class ChangeDetector(BaseDetector):
         
         if not old_data:
             # All items are new
-            report.new_items = list(new_data)
+            report.new_items = list(self._build_index(new_data).values())
             return report
         
         if not new_data:
             # All items were removed
-            report.removed_items = list(old_data)
+            report.removed_items = list(self._build_index(old_data).values())
             return report
 
         # Build indexes for O(1) lookups
@@ -103,6 +108,23 @@ class ChangeDetector(BaseDetector):
 
         return report
 
+    @metrics.timed("detect")
+    def detect_against(self, baseline: Any, new_data: List[Dict]) -> ChangeReport:
+        """
+        Detect changes between a stored baseline and new data using the backend.
+        
+        Args:
+            baseline: Backend-specific baseline reference (a snapshot ID for
+                SQLiteDiffBackend)
+            new_data: Newly scraped data
+            
+        Returns:
+            ChangeReport with new, removed, and modified items
+        """
+        if self.backend is None:
+            raise ValueError("detect_against requires a detection backend")
+        return self.backend.detect(self, baseline, new_data)
+
     def has_any_changes(self, old_data: List[Dict], new_data: List[Dict]) -> bool:
         """
         Quick check if there are any changes (without full report).
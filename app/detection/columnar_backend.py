@@ -0,0 +1,79 @@
+from typing import List, Dict, Any, Union
+
+from .base_detector import ChangeReport, ItemChange
+from .hashers import generate_hash, last_positions
+from .comparators import compare_fields
+from app.storage.columnar import ColumnarSnapshot
+
+
+class ColumnarDiffBackend:
+    """
+    Change detection backend over memory-mapped columnar snapshots.
+
+    The new items are matched against the baseline's sorted id index in one
+    merge pass and their content hashes are compared with the stored ones,
+    so only the baseline rows that were modified or removed are decoded.
+    Opening the baseline reads just the file header and metadata. Items
+    sharing a key are reduced to their last occurrence on both sides, as
+    in ChangeDetector.detect.
+    """
+
+    def detect(
+        self,
+        detector,
+        baseline: Union[str, ColumnarSnapshot],
+        new_data: List[Dict[str, Any]]
+    ) -> ChangeReport:
+        """
+        Detect changes between a columnar snapshot and new data.
+
+        Falls back to the in-memory detector when the snapshot was written
+        with different key fields.
+
+        Args:
+            detector: The ChangeDetector providing key and compare fields
+            baseline: Path of a snapshot file, or an open ColumnarSnapshot
+            new_data: Newly scraped data
+
+        Returns:
+            ChangeReport with new, removed, and modified items
+        """
+        if isinstance(baseline, ColumnarSnapshot):
+            return self._detect(detector, baseline, new_data)
+        with ColumnarSnapshot(baseline) as snapshot:
+            return self._detect(detector, snapshot, new_data)
+
+    def _detect(self, detector, snapshot: ColumnarSnapshot, new_data: List[Dict[str, Any]]) -> ChangeReport:
+        if detector.key_fields != snapshot.key_fields:
+            return detector.detect(list(snapshot), new_data)
+
+        report = ChangeReport()
+        matched = set()
+
+        positions = last_positions(new_data, detector.key_fields)
+        item_ids = list(positions)
+        for item_id, found in zip(item_ids, snapshot.match(item_ids)):
+            new_item = new_data[positions[item_id]]
+            if found is None:
+                report.new_items.append(new_item)
+                continue
+
+            row, content_hash = found
+            matched.add(row)
+            if content_hash == generate_hash(new_item):
+                continue
+
+            old_item = snapshot[row]
+            fields = detector.compare_fields or list(old_item.keys())
+            changes = compare_fields(old_item, new_item, fields)
+            if changes:
+                report.modified_items.append(ItemChange(
+                    item_id=item_id,
+                    old_item=old_item,
+                    new_item=new_item,
+                    changed_fields=changes
+                ))
+
+        removed = sorted(row for _, row in snapshot.item_ids() if row not in matched)
+        report.removed_items = [snapshot[row] for row in removed]
+        return report
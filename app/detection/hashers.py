@@ -39,6 +39,27 @@ def generate_item_id(item: Dict[str, Any], key_fields: List[str]) -> str:
     return "||".join(parts)
 
 
+def last_positions(data: List[Dict[str, Any]], key_fields: List[str]) -> Dict[str, int]:
+    """
+    Map each item ID to the position of its last occurrence.
+
+    Items sharing the same key fields collapse into one: the last
+    occurrence wins, as in ChangeDetector and the storages' insert_jobs.
+    Every detection backend applies this rule before diffing.
+
+    Args:
+        data: List of data items
+        key_fields: Fields that identify an item
+
+    Returns:
+        Item ID -> index into data, in order of first appearance
+    """
+    positions: Dict[str, int] = {}
+    for position, item in enumerate(data):
+        positions[generate_item_id(item, key_fields)] = position
+    return positions
+
+
 def generate_content_hash(item: Dict[str, Any], content_fields: List[str]) -> str:
     """
     Generate a hash of the item's content fields (for detecting modifications).
@@ -67,3 +88,27 @@ def hash_dataset(data: List[Dict[str, Any]]) -> str:
     """
     content = json.dumps(data, sort_keys=True, default=str)
     return hashlib.md5(content.encode()).hexdigest()
+
+
+def generate_unique_item_ids(data: List[Dict[str, Any]], key_fields: List[str]) -> List[str]:
+    """
+    Generate identifiers for every item, disambiguating duplicates.
+
+    Items sharing the same key fields get an occurrence suffix ("#2",
+    "#3", ...) in the order they appear, so every ID in the result is unique.
+
+    Args:
+        data: List of data items
+        key_fields: Fields that identify an item
+
+    Returns:
+        List of unique identifiers, one per item
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for item in data:
+        item_id = generate_item_id(item, key_fields)
+        count = seen.get(item_id, 0) + 1
+        seen[item_id] = count
+        ids.append(item_id if count == 1 else f"{item_id}#{count}")
+    return ids
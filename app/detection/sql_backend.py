@@ -0,0 +1,133 @@
+import json
+from typing import List, Dict, Any
+
+from .base_detector import ChangeReport, ItemChange
+from .hashers import generate_hash, last_positions
+from .comparators import compare_fields
+
+
+class SQLiteDiffBackend:
+    """
+    Change detection backend that diffs inside SQLite.
+
+    The baseline is a snapshot whose items are indexed in the
+    `snapshot_items` table (see SnapshotMixin). The new data is staged in a
+    temporary table and the added, removed and modified sets are computed
+    with joins on item_id and content_hash, so only rows that differ are
+    loaded into Python. Both sides hold one row per item id, the last
+    occurrence of a duplicated key winning, as in ChangeDetector.detect.
+    """
+
+    def __init__(self, storage):
+        """
+        Initialize the backend.
+
+        Args:
+            storage: A storage object using SnapshotMixin
+        """
+        self.storage = storage
+
+    def detect(self, detector, snapshot_id: int, new_data: List[Dict[str, Any]]) -> ChangeReport:
+        """
+        Detect changes between a stored snapshot and new data.
+
+        Falls back to the in-memory detector when the snapshot's items are
+        not indexed or were indexed with different key fields.
+
+        Args:
+            detector: The ChangeDetector providing key and compare fields
+            snapshot_id: ID of the baseline snapshot
+            new_data: Newly scraped data
+
+        Returns:
+            ChangeReport with new, removed, and modified items
+        """
+        return self.storage.execute_read(self._detect, detector, snapshot_id, new_data)
+
+    def _detect(self, storage, detector, snapshot_id: int, new_data: List[Dict[str, Any]]) -> ChangeReport:
+        info = storage.get_snapshot_info(snapshot_id)
+        key_fields = storage.snapshot_key_fields_for(info["source_name"]) if info else None
+        if (
+            detector.key_fields != key_fields
+            or not storage.has_snapshot_items(snapshot_id)
+        ):
+            old_data = storage.get_snapshot(snapshot_id) or []
+            return detector.detect(old_data, new_data)
+
+        conn = storage.conn
+        self._stage(conn, detector.key_fields, new_data)
+
+        report = ChangeReport()
+
+        cursor = conn.execute(
+            """
+            SELECT n.position FROM temp.incoming_items n
+            LEFT JOIN snapshot_items o
+                ON o.snapshot_id = ? AND o.item_id = n.item_id
+            WHERE o.item_id IS NULL
+            ORDER BY n.position
+            """,
+            (snapshot_id,)
+        )
+        report.new_items = [new_data[row[0]] for row in cursor]
+
+        cursor = conn.execute(
+            """
+            SELECT o.payload FROM snapshot_items o
+            WHERE o.snapshot_id = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM temp.incoming_items n WHERE n.item_id = o.item_id
+            )
+            """,
+            (snapshot_id,)
+        )
+        report.removed_items = [json.loads(row[0]) for row in cursor]
+
+        cursor = conn.execute(
+            """
+            SELECT o.item_id, o.payload, n.position FROM snapshot_items o
+            JOIN temp.incoming_items n ON n.item_id = o.item_id
+            WHERE o.snapshot_id = ? AND o.content_hash != n.content_hash
+            ORDER BY n.position
+            """,
+            (snapshot_id,)
+        )
+        for item_id, old_payload, position in cursor:
+            old_item = json.loads(old_payload)
+            new_item = new_data[position]
+            fields = detector.compare_fields or list(old_item.keys())
+
+            changes = compare_fields(old_item, new_item, fields)
+            if changes:
+                report.modified_items.append(ItemChange(
+                    item_id=item_id,
+                    old_item=old_item,
+                    new_item=new_item,
+                    changed_fields=changes
+                ))
+
+        conn.execute("DELETE FROM temp.incoming_items")
+        storage._commit()
+        return report
+
+    def _stage(self, conn, key_fields: List[str], new_data: List[Dict[str, Any]]):
+        """Load new data into the connection's temporary staging table."""
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS incoming_items (
+                item_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                position INTEGER NOT NULL
+            );
+        """)
+        conn.execute("DELETE FROM temp.incoming_items")
+
+        conn.executemany(
+            """
+            INSERT INTO temp.incoming_items (item_id, content_hash, position)
+            VALUES (?, ?, ?)
+            """,
+            (
+                (item_id, generate_hash(new_data[position]), position)
+                for item_id, position in last_positions(new_data, key_fields).items()
+            )
+        )
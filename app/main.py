@@ -1,9 +1,17 @@
 """
 SWMAP Pipeline - Main Entry Point
 Interactive CLI to run different scrapers and features
+
+Usage:
+    python -m app.main [--profile] [--profile-sample 0.05]
 """
-from app.monitors.job_monitor import JobMonitor
-from app.monitors.dynamic_job_monitor import DynamicJobMonitor
+import argparse
+from contextlib import nullcontext
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.metrics import metrics
+from app.core.profiling import add_profile_arguments, profiler_from_args
 
 job_monitor_url = "https://realpython.github.io/fake-jobs/"
 dynamic_laptop_url = "https://webscraper.io/test-sites/e-commerce/ajax/computers/laptops"
@@ -11,7 +19,16 @@ dynamic_phones_url = "https://webscraper.io/test-sites/e-commerce/ajax/phones/to
 
 
 def main():
-   
+    parser = argparse.ArgumentParser(description="SWMAP Pipeline")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiler_from_args(args)
+
+    # Monitor and storage progress goes through logging (LOG_LEVEL)
+    setup_logger()
+    if settings.METRICS_PORT:
+        metrics.serve(settings.METRICS_PORT)
+
     print("Select Engine:")
     print("1. Static Job Monitor")
     print("2. Dynamic Scraper (Laptops)")
@@ -19,20 +36,32 @@ def main():
 
     choice = input("Enter your choice (1/2/3): ").strip()
 
+    # Monitors are imported on demand: only the chosen engine's scraper
+    # stack (requests/BeautifulSoup or Playwright) gets loaded
     if choice == "1":
+        from app.monitors.job_monitor import JobMonitor
         monitor = JobMonitor(job_monitor_url)
-        monitor.run()
     
     elif choice == "2":
-        monitor = DynamicJobMonitor(dynamic_laptop_url)
-        monitor.run()
+        from app.monitors.dynamic_job_monitor import DynamicJobMonitor
+        monitor = DynamicJobMonitor(dynamic_laptop_url, source_name="dynamic_laptops")
     
     elif choice == "3":
-        monitor = DynamicJobMonitor(dynamic_phones_url)
-        monitor.run()
+        from app.monitors.dynamic_job_monitor import DynamicJobMonitor
+        monitor = DynamicJobMonitor(dynamic_phones_url, source_name="dynamic_phones")
     
     else:
         print("Invalid choice")
+        return
+
+    with profiler.profile(monitor.source_name) if profiler else nullcontext():
+        monitor.run()
+
+    # Deliver what is left in the notification outbox before exiting
+    monitor.notification_manager.close()
+
+    # Snapshot retention and compaction, after the run has finished
+    monitor.retention.run()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,5 @@
-from bs4 import BeautifulSoup
 from app.scrapers.dynamic import DynamicScraper
-from app.processors.csv_writer import save_to_csv
+from app.processors.exporter import DeltaExporter
 from app.processors.cleaner import (
     DataCleaner,
     remove_duplicates,
@@ -9,26 +8,59 @@ from app.processors.cleaner import (
 )
 from app.storage.sqlite_dynamic import DynamicStorage
 from app.detection.change_detector import ChangeDetector
+from app.detection.sql_backend import SQLiteDiffBackend
+from app.detection.columnar_backend import ColumnarDiffBackend
 from app.detection.base_detector import ChangeReport
+from app.detection.hashers import hash_dataset
+from app.storage.retention import RetentionEngine
+from app.storage.columnar import ColumnarSnapshotStore
 from app.notifiers.notification_manager import NotificationManager
+from app.core.config import settings
+from app.core.logger import get_logger, log_context
+from app.core.metrics import metrics
+
+logger = get_logger("monitors.dynamic_job_monitor")
 
 class DynamicJobMonitor:
-    def __init__(self, url: str, enable_change_detection: bool = True):
+    def __init__(
+        self,
+        url: str,
+        enable_change_detection: bool = True,
+        storage=None,
+        source_name: str = "dynamic_jobs"
+    ):
         self.scraper = DynamicScraper(
             url,
             wait_for=".thumbnail",
             headless=True
         )
 
-        self.storage = DynamicStorage()
-        self.source_name = "dynamic_jobs"
+        # Any DynamicStorage-compatible object, e.g. WriteBehindStorage(DynamicStorage)
+        self.storage = storage or DynamicStorage()
+        self.source_name = source_name
         
         # Change detection setup
         self.enable_change_detection = enable_change_detection
         self.detector = ChangeDetector(
             key_fields=["title"],  # Unique identifier
-            compare_fields=["title", "price"]  # Fields to track for changes
+            compare_fields=["title", "price"],  # Fields to track for changes
+            backend=SQLiteDiffBackend(self.storage)  # Diff against snapshot_items
         )
+        # Optional memory-mapped copy of the latest snapshot, diffed in place
+        self.columnar = None
+        if settings.COLUMNAR_SNAPSHOT_DIR:
+            self.columnar = ColumnarSnapshotStore(settings.COLUMNAR_SNAPSHOT_DIR, key_fields=["title"])
+            self.columnar_detector = ChangeDetector(
+                key_fields=["title"],
+                compare_fields=["title", "price"],
+                backend=ColumnarDiffBackend()
+            )
+        # Snapshot retention runs between cycles, not inside run()
+        self.retention = RetentionEngine(self.storage)
+
+        # Per-run export of new and changed records (data/exports/<source>/...)
+        self.exporter = DeltaExporter(self.source_name, ["title", "price"])
+
         # Use NotificationManager for multi-channel notifications
         self.notification_manager = NotificationManager(include_console=True)
 
@@ -40,6 +72,50 @@ class DynamicJobMonitor:
 
 
     def run(self):
+        # Records logged during the run carry the source and a run id
+        with log_context(source=self.source_name) as run_id:
+            stats = None
+            try:
+                # Stage timings and counts of this run (see app.core.metrics)
+                with metrics.run(self.source_name, run_id) as stats:
+                    return self._run()
+            finally:
+                if stats is not None:
+                    self._record_run(stats)
+
+    def _detect_changes(self, baseline, jobs):
+        """Diff against the columnar copy of the baseline if there is one, else inside SQLite."""
+        if self.columnar is not None:
+            snapshot = self.columnar.get_latest_snapshot(self.source_name)
+            if snapshot is not None:
+                with snapshot:
+                    # A failed write can leave an older copy behind: only use a current one
+                    if snapshot.meta["data_hash"] == baseline["data_hash"]:
+                        return self.columnar_detector.detect_against(snapshot, jobs)
+        return self.detector.detect_against(baseline["id"], jobs)
+
+    def _save_columnar(self, jobs):
+        """Write the new snapshot's columnar copy and drop the older copies."""
+        try:
+            self.columnar.save_snapshot(self.source_name, jobs)
+            self.columnar.cleanup_old_snapshots(self.source_name, keep_count=2)
+        except OSError as e:
+            # The next run falls back to the SQLite snapshot
+            logger.warning("Could not write columnar snapshot of %s: %s", self.source_name, e)
+
+    def _record_run(self, stats):
+        """Store the run summary and refresh the metrics export."""
+        try:
+            self.storage.record_run_metrics(stats)
+            if settings.METRICS_TEXTFILE:
+                metrics.write_textfile(settings.METRICS_TEXTFILE)
+        except Exception as e:
+            logger.warning("Could not record run metrics: %s", e)
+
+    def _run(self):
+        # Imported here so that building the monitor does not load bs4
+        from bs4 import BeautifulSoup
+
         jobs = []
         seen_titles = set() # To prevent duplicates during AJAX transitions
         page = self.scraper.open()
@@ -47,17 +123,21 @@ class DynamicJobMonitor:
         try:
             page_count = 1
             while True:
-                print(f"Scraping page {page_count}...")
+                logger.debug("Scraping page %d...", page_count)
                 
                 # 1. Wait for content to be visible
-                page.wait_for_selector(".thumbnail", state="visible")
+                with metrics.timer("render"):
+                    page.wait_for_selector(".thumbnail", state="visible")
+                    html = page.content()
+                metrics.inc("pages", source=self.source_name)
                 
                 # 2. Extract content
-                soup = BeautifulSoup(page.content(), "lxml")
-                items = soup.select(".thumbnail")
+                with metrics.timer("parse"):
+                    soup = BeautifulSoup(html, "lxml")
+                    items = soup.select(".thumbnail")
 
                 if not items:
-                    print("No items found on this page.")
+                    logger.debug("No items found on page %d.", page_count)
                     break
                 
                 for job in items:
@@ -81,7 +161,7 @@ class DynamicJobMonitor:
                 
                 if next_button and next_button.is_visible():
                     
-                    print("Next button found. Clicking...")
+                    logger.debug("Next button found. Clicking...")
                     
                     # Get the current first item's title to detect when the page changes
                     first_item_before = items[0].select_one(".title").text
@@ -96,54 +176,84 @@ class DynamicJobMonitor:
                             timeout=5000
                         )
                     except:
-                        print("Timeout waiting for content to change, continuing anyway...")
+                        logger.warning("Timeout waiting for content to change, continuing anyway...")
                     
                     page_count += 1
                     page.wait_for_timeout(1000) # Small breath for the UI
                 else:
-                    print("No clickable 'Next' button found. Ending.")
+                    logger.debug("No clickable 'Next' button found. Ending after page %d.", page_count)
                     break 
 
         except Exception as e:
-            print(f"An error occurred during scraping: {e}")
+            logger.error("An error occurred during scraping: %s", e)
 
         finally:
             self.scraper.close()
 
+        logger.info("Scraped %d items from %s", len(jobs), self.source_name)
+        metrics.inc("items_scraped", len(jobs), source=self.source_name)
+
         if jobs:
+            baseline = None
+            changes = None
+
             # Change Detection
             if self.enable_change_detection:
                 # Use storage's built-in snapshot methods (stored in dynamic_data.db)
-                old_data = self.storage.get_latest_snapshot(self.source_name)
+                baseline = self.storage.get_latest_snapshot_info(self.source_name)
                 
-                if old_data is not None:
-                    # Compare with previous data
-                    changes = self.detector.detect(old_data, jobs)
-                    
-                    # Send notifications to all channels (console, email, telegram)
-                    self.notification_manager.notify_all(changes, self.source_name)
+                if baseline is not None:
+                    # Compare with previous data (diffed inside SQLite or the columnar copy)
+                    changes = self._detect_changes(baseline, jobs)
+                    metrics.inc("items_new", len(changes.new_items), source=self.source_name)
+                    metrics.inc("items_removed", len(changes.removed_items), source=self.source_name)
+                    metrics.inc("items_modified", len(changes.modified_items), source=self.source_name)
                     
                     if not changes.has_changes:
-                        print("✅ No changes detected. Skipping data save.")
+                        self.notification_manager.notify_all(changes, self.source_name)
+                        # The snapshot stays as it is, but every item was seen again
+                        self.storage.insert_jobs(jobs, self.source_name)
+                        logger.info("✅ No changes detected for %s. Skipping snapshot save.", self.source_name)
                         return jobs
-                    
-                    # Update snapshot with new data
-                    self.storage.save_snapshot(self.source_name, jobs)
-                    self.storage.cleanup_old_snapshots(self.source_name, keep_count=10)
                 else:
                     # First run - create initial snapshot
-                    print("\n" + "=" * 60)
-                    print("📦 FIRST RUN - Initial Data Capture")
-                    print("=" * 60)
-                    print(f"📊 Captured {len(jobs)} items as baseline.")
-                    print("   Next run will compare against this snapshot.")
-                    print("=" * 60 + "\n")
-                    
-                    # Save initial snapshot
+                    logger.info(
+                        "📦 FIRST RUN - Captured %d items for %s as baseline. "
+                        "Next run will compare against this snapshot.",
+                        len(jobs), self.source_name
+                    )
+
+            # All writes of this run land in a single transaction
+            with self.storage.transaction():
+                if self.enable_change_detection:
+                    # Update snapshot with new data
                     self.storage.save_snapshot(self.source_name, jobs)
+                self.storage.insert_jobs(jobs, self.source_name)
+
+                if changes is not None and self.notification_manager.use_outbox:
+                    # Notifications commit with the snapshot and are delivered
+                    # (and retried) from the outbox; console prints right away
+                    self.notification_manager.enqueue(
+                        self.storage, changes, self.source_name,
+                        f"{self.source_name}:{baseline['id']}:{hash_dataset(jobs)}"
+                    )
+
+            if self.columnar is not None and self.enable_change_detection:
+                self._save_columnar(jobs)
+
+            # Without the outbox, channels are called directly: only once the
+            # transaction has committed, so no write lock is held meanwhile
+            if changes is not None and not self.notification_manager.use_outbox:
+                self.notification_manager.notify_all(changes, self.source_name)
 
-            save_to_csv("dynamic_jobs.csv", jobs)
-            self.storage.insert_jobs(jobs)
-            print(f"Success! Saved {len(jobs)} items to dynamic_jobs.csv")
+            # Append only this run's new and changed records
+            if changes is not None:
+                export_path = self.exporter.export_report(changes)
+            else:
+                export_path = self.exporter.export_items(
+                    jobs, "added" if self.enable_change_detection else "seen"
+                )
+            if export_path:
+                logger.info("Exported changes to %s", export_path)
         
         return jobs
\ No newline at end of file
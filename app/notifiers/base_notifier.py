@@ -1,10 +1,38 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 from app.detection.base_detector import ChangeReport
 
 
+@dataclass
+class NotificationResult:
+    """Outcome of delivering a report to one channel."""
+    channel: str
+    status: str  # "sent", "failed", "timeout" or "queued" (outbox)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the channel delivered the report (or durably queued it)."""
+        return self.status in ("sent", "queued")
+
+
 class BaseNotifier(ABC):
     """Abstract base class for change notification handlers."""
 
+    # Seconds NotificationManager waits for this channel (None = manager default)
+    timeout: Optional[float] = None
+    # Whether reports are queued in the outbox and retried until delivered
+    durable: bool = True
+    # Deliveries per minute the outbox allows this channel (None = unlimited)
+    rate_limit: Optional[float] = None
+
+    @property
+    def channel(self) -> str:
+        """Name of the channel in results and outbox rows."""
+        return self.__class__.__name__
+
     @abstractmethod
     def notify(self, change_report: ChangeReport, source_name: str = None) -> None:
         """
@@ -15,3 +43,46 @@ class BaseNotifier(ABC):
             source_name: Optional identifier for the data source
         """
         pass
+
+    def deliver(self, change_report: ChangeReport, source_name: str = None) -> None:
+        """
+        Send a notification, raising on failure.
+
+        notify() reports errors itself and returns; dispatchers use
+        deliver() so they can record failures. Notifiers that can fail
+        should override it and have notify() call it.
+
+        Args:
+            change_report: The ChangeReport containing detected changes
+            source_name: Optional identifier for the data source
+        """
+        self.notify(change_report, source_name)
+
+    def deliver_batch(
+        self,
+        reports: List[Tuple[ChangeReport, Optional[str]]],
+        keys: Optional[List[str]] = None
+    ) -> List[Optional[Exception]]:
+        """
+        Deliver several reports, e.g. an outbox backlog.
+
+        Channels that can send many reports in one request override this;
+        the default delivers them one by one.
+
+        Args:
+            reports: (change report, source name) pairs
+            keys: Idempotency key of each report (its outbox row's), for
+                channels that pass them on to the receiver
+
+        Returns:
+            One entry per report: None if delivered, else the error
+        """
+        errors: List[Optional[Exception]] = []
+        for change_report, source_name in reports:
+            try:
+                self.deliver(change_report, source_name)
+            except Exception as e:
+                errors.append(e)
+            else:
+                errors.append(None)
+        return errors
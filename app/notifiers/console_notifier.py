@@ -1,5 +1,9 @@
-from typing import Optional
+import sys
+import threading
+from typing import List, Optional, TextIO
 from .base_notifier import BaseNotifier
+from .rendering import RenderedEntry, RenderedReport, render_report
+from .templates import TEXT_TITLES
 from app.detection.base_detector import ChangeReport
 
 
@@ -20,17 +24,35 @@ class ConsoleNotifier(BaseNotifier):
     BLUE = "\033[94m"
     BOLD = "\033[1m"
     RESET = "\033[0m"
+    SECTION_COLORS = {"new": GREEN, "removed": RED, "modified": YELLOW}
 
-    def __init__(self, use_colors: bool = True, verbose: bool = True):
+    # Printing cannot fail in a way worth retrying later
+    durable = False
+
+    # One lock for all instances: blocks from concurrent monitors never interleave
+    _write_lock = threading.Lock()
+
+    def __init__(
+        self,
+        use_colors: bool = True,
+        verbose: bool = True,
+        summary_only: bool = False,
+        stream: Optional[TextIO] = None
+    ):
         """
         Initialize the console notifier.
         
         Args:
             use_colors: Whether to use ANSI color codes
             verbose: Whether to show detailed item information
+            summary_only: Print one summary line per report instead of
+                the item listing
+            stream: Where to write (default: sys.stdout at write time)
         """
         self.use_colors = use_colors
         self.verbose = verbose
+        self.summary_only = summary_only
+        self.stream = stream
 
     def _color(self, text: str, color: str) -> str:
         """Apply color to text if colors are enabled."""
@@ -39,63 +61,75 @@ class ConsoleNotifier(BaseNotifier):
         return text
 
     def notify(self, change_report: ChangeReport, source_name: str = None) -> None:
-        """Print the change report to console."""
+        """Print the change report to console as a single block."""
+        rendered = render_report(change_report, source_name)
+        if self.summary_only:
+            lines = [self._format_summary(rendered)]
+        else:
+            lines = self._format_block(rendered)
+        self._write(lines)
+
+    def _format_summary(self, rendered: RenderedReport) -> str:
+        """One line: source and counts."""
+        source = rendered.source_name or "report"
+        if not rendered.has_changes:
+            return self._color(f"✅ {source}: no changes", self.GREEN)
+        return f"📊 {self._color(source, self.BOLD)}: {rendered.summary}"
+
+    def _format_block(self, rendered: RenderedReport) -> List[str]:
+        """The full report, as lines."""
         header = f"Change Report"
-        if source_name:
-            header += f" for {source_name}"
-
-        print("\n" + "=" * 60)
-        print(self._color(f"📊 {header}", self.BOLD + self.BLUE))
-        print("=" * 60)
-
-        if not change_report.has_changes:
-            print(self._color("✅ No changes detected", self.GREEN))
-            print("=" * 60 + "\n")
-            return
-
-        print(f"📈 Summary: {change_report.summary()}")
-        print("-" * 60)
-
-        # New items
-        if change_report.new_items:
-            print(self._color(f"\n🆕 NEW ITEMS ({len(change_report.new_items)}):", self.GREEN))
-            for item in change_report.new_items[:10]:  # Limit display
-                self._print_item(item, self.GREEN)
-            if len(change_report.new_items) > 10:
-                print(f"   ... and {len(change_report.new_items) - 10} more")
-
-        # Removed items
-        if change_report.removed_items:
-            print(self._color(f"\n❌ REMOVED ITEMS ({len(change_report.removed_items)}):", self.RED))
-            for item in change_report.removed_items[:10]:
-                self._print_item(item, self.RED)
-            if len(change_report.removed_items) > 10:
-                print(f"   ... and {len(change_report.removed_items) - 10} more")
-
-        # Modified items
-        if change_report.modified_items:
-            print(self._color(f"\n📝 MODIFIED ITEMS ({len(change_report.modified_items)}):", self.YELLOW))
-            for change in change_report.modified_items[:10]:
-                self._print_modification(change)
-            if len(change_report.modified_items) > 10:
-                print(f"   ... and {len(change_report.modified_items) - 10} more")
-
-        print("\n" + "=" * 60 + "\n")
-
-    def _print_item(self, item: dict, color: str):
-        """Print a single item."""
+        if rendered.source_name:
+            header += f" for {rendered.source_name}"
+
+        lines = [
+            "\n" + "=" * 60,
+            self._color(f"📊 {header}", self.BOLD + self.BLUE),
+            "=" * 60,
+        ]
+
+        if not rendered.has_changes:
+            lines.append(self._color("✅ No changes detected", self.GREEN))
+            lines.append("=" * 60 + "\n")
+            return lines
+
+        lines.append(f"📈 Summary: {rendered.summary}")
+        lines.append("-" * 60)
+
+        for section in rendered.sections:
+            color = self.SECTION_COLORS[section.kind]
+            lines.append(self._color(f"\n{TEXT_TITLES[section.kind]} ({section.count}):", color))
+            for entry in section.entries:
+                if section.kind == "modified":
+                    self._format_modification(lines, entry)
+                else:
+                    self._format_item(lines, entry, color)
+            if section.more > 0:
+                lines.append(f"   ... and {section.more} more")
+
+        lines.append("\n" + "=" * 60 + "\n")
+        return lines
+
+    def _format_item(self, lines: List[str], entry: RenderedEntry, color: str):
+        """Add a single item."""
         if self.verbose:
             # Show key fields
-            display = " | ".join(f"{k}: {v}" for k, v in list(item.items())[:3])
-            print(f"   {self._color('→', color)} {display}")
+            lines.append(f"   {self._color('→', color)} {entry.label}")
         else:
             # Just show first field
-            first_val = list(item.values())[0] if item else "Unknown"
-            print(f"   {self._color('→', color)} {first_val}")
+            lines.append(f"   {self._color('→', color)} {entry.first_value}")
 
-    def _print_modification(self, change):
-        """Print a modified item with field changes."""
-        print(f"   {self._color('→', self.YELLOW)} Item: {change.item_id}")
+    def _format_modification(self, lines: List[str], entry: RenderedEntry):
+        """Add a modified item with field changes."""
+        lines.append(f"   {self._color('→', self.YELLOW)} Item: {entry.label}")
         if self.verbose:
-            for field, (old_val, new_val) in change.changed_fields.items():
-                print(f"      {field}: {self._color(str(old_val), self.RED)} → {self._color(str(new_val), self.GREEN)}")
+            for name, old_val, new_val in entry.changes:
+                lines.append(f"      {name}: {self._color(old_val, self.RED)} → {self._color(new_val, self.GREEN)}")
+
+    def _write(self, lines: List[str]):
+        """Write a block with one call and one flush."""
+        stream = self.stream or sys.stdout
+        text = "\n".join(lines) + "\n"
+        with self._write_lock:
+            stream.write(text)
+            stream.flush()
@@ -1,35 +1,176 @@
 """
 Email notification sender using SMTP.
+
+Connections are kept open by an SMTPSession and reused across reports,
+so many sources do not each pay for a TLS handshake and login. In digest
+mode, reports are collected for a window and sent as a single email;
+reports delivered from the outbox are sent as a digest right away instead
+(see deliver_batch), so none is acknowledged before it was actually sent.
 """
+import atexit
 import smtplib
+import threading
+import time
+from email.mime.application import MIMEApplication
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from .base_notifier import BaseNotifier
-from .templates import format_text_report, format_html_report
+from .rendering import render_report
+from .templates import (
+    format_text_report,
+    format_html_report,
+    format_text_digest,
+    format_html_digest,
+)
 from app.detection.base_detector import ChangeReport
 
 
+class _SMTP(smtplib.SMTP):
+    """smtplib.SMTP that records whether the server accepted DATA (354)."""
+
+    data_accepted = False
+    _awaiting_data = False
+
+    def data(self, msg):
+        self._awaiting_data = True
+        try:
+            return super().data(msg)
+        finally:
+            self._awaiting_data = False
+
+    def getreply(self):
+        code, message = super().getreply()
+        if self._awaiting_data and code == 354:
+            self.data_accepted = True
+            self._awaiting_data = False
+        return code, message
+
+
+class SMTPSession:
+    """
+    Reusable SMTP connection.
+
+    The connection is opened (STARTTLS + login) on first use and reused
+    until it has been idle for `idle_timeout` seconds. A send that finds the
+    connection dropped by the server reconnects and retries once, but only
+    if the server had not yet accepted the DATA command: after that the
+    message may have been delivered, and a retry could send it twice.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        idle_timeout: float = 60.0,
+        connect_timeout: float = 10.0
+    ):
+        """
+        Initialize the session (no connection is made yet).
+
+        Args:
+            host: SMTP server hostname
+            port: SMTP server port
+            username: Login username (empty = no login)
+            password: Login password
+            use_tls: Upgrade the connection with STARTTLS
+            idle_timeout: Seconds after which an unused connection is
+                replaced instead of reused
+            connect_timeout: Socket timeout for SMTP operations, in seconds
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def send(self, from_addr: str, to_addrs, message: str):
+        """Send a message over the pooled connection."""
+        with self._lock:
+            server = self._connection()
+            server.data_accepted = False
+            try:
+                server.sendmail(from_addr, to_addrs, message)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                self._drop()
+                if server.data_accepted:
+                    raise
+                # The server dropped the connection while it was idle
+                self._connection().sendmail(from_addr, to_addrs, message)
+            self._last_used = time.monotonic()
+
+    def close(self):
+        """Close the connection, if open."""
+        with self._lock:
+            if self._server is not None:
+                try:
+                    self._server.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._server = None
+
+    def _connection(self) -> _SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self._drop()
+        if self._server is None:
+            server = _SMTP(self.host, self.port, timeout=self.connect_timeout)
+            try:
+                if self.use_tls:
+                    server.starttls()
+                if self.username:
+                    server.login(self.username, self.password)
+            except BaseException:
+                server.close()
+                raise
+            self._server = server
+            self._last_used = time.monotonic()
+            self.connections_opened += 1
+        return self._server
+
+    def _drop(self):
+        try:
+            self._server.close()
+        except OSError:
+            pass
+        self._server = None
+
+
 class EmailNotifier(BaseNotifier):
     """
     Email notifier using SMTP with TLS.
-    
+
     Sends HTML emails with change detection reports.
     """
 
     def __init__(
-        self, 
+        self,
         smtp_host: str,
         smtp_port: int,
         username: str,
         password: str,
         to_email: str,
-        from_email: Optional[str] = None
+        from_email: Optional[str] = None,
+        connect_timeout: float = 10.0,
+        use_tls: bool = True,
+        idle_timeout: float = 60.0,
+        digest_window: Optional[float] = None,
+        digest_max_reports: int = 200,
+        attachment_format: Optional[str] = "csv"
     ):
         """
         Initialize the email notifier.
-        
+
         Args:
             smtp_host: SMTP server hostname
             smtp_port: SMTP server port (usually 587 for TLS)
@@ -37,6 +178,17 @@ class EmailNotifier(BaseNotifier):
             password: SMTP login password
             to_email: Recipient email address
             from_email: Sender email (defaults to username)
+            connect_timeout: Socket timeout for SMTP operations, in seconds
+            use_tls: Upgrade the connection with STARTTLS
+            idle_timeout: Seconds an SMTP connection may sit unused before
+                it is replaced
+            digest_window: Collect reports for this many seconds and send
+                them as one email (None sends each report immediately)
+            digest_max_reports: Send the digest early once it holds this
+                many reports
+            attachment_format: "csv" or "jsonl" to attach the full change
+                list (gzip) when a report has more changes than the email
+                shows; None to never attach
         """
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
@@ -44,42 +196,30 @@ class EmailNotifier(BaseNotifier):
         self.password = password
         self.to_email = to_email
         self.from_email = from_email or username
+        self.connect_timeout = connect_timeout
+        self.attachment_format = attachment_format
+        self.session = SMTPSession(
+            smtp_host, smtp_port, username, password,
+            use_tls=use_tls, idle_timeout=idle_timeout, connect_timeout=connect_timeout
+        )
+
+        self.digest_window = digest_window
+        self.digest_max_reports = digest_max_reports
+        self._digest: List[Tuple[Optional[str], ChangeReport]] = []
+        self._digest_lock = threading.Lock()
+        self._digest_timer: Optional[threading.Timer] = None
+        atexit.register(self.close)
 
     def notify(self, change_report: ChangeReport, source_name: str = None) -> None:
         """
         Send email notification with change report.
-        
+
         Args:
             change_report: The change report to send
             source_name: Optional source identifier for subject line
         """
-        # Only send if there are changes
-        if not change_report.has_changes:
-            return
-        
         try:
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = self._create_subject(change_report, source_name)
-            msg["From"] = self.from_email
-            msg["To"] = self.to_email
-
-            # Plain text version
-            text_body = format_text_report(change_report, source_name)
-            msg.attach(MIMEText(text_body, "plain"))
-
-            # HTML version
-            html_body = format_html_report(change_report, source_name)
-            msg.attach(MIMEText(html_body, "html"))
-
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.sendmail(self.from_email, self.to_email, msg.as_string())
-            
-            print(f"📧 Email sent to {self.to_email}")
-            
+            self.deliver(change_report, source_name)
         except smtplib.SMTPAuthenticationError:
             print("❌ Email failed: Authentication error. Check username/password.")
         except smtplib.SMTPException as e:
@@ -87,7 +227,156 @@ class EmailNotifier(BaseNotifier):
         except Exception as e:
             print(f"❌ Email failed: {e}")
 
+    def deliver(self, change_report: ChangeReport, source_name: str = None) -> None:
+        """
+        Send the email, raising on failure.
+
+        In digest mode the report is only queued; errors of the digest
+        send are reported when it is flushed.
+        """
+        # Only send if there are changes
+        if not change_report.has_changes:
+            return
+
+        if self.digest_window is not None:
+            self._add_to_digest(change_report, source_name)
+            return
+
+        self._send_report(change_report, source_name)
+
+    def deliver_batch(
+        self,
+        reports: List[Tuple[ChangeReport, Optional[str]]],
+        keys: Optional[List[str]] = None
+    ) -> List[Optional[Exception]]:
+        """
+        Deliver an outbox batch synchronously, raising nothing.
+
+        Without a digest window each report is its own email. In digest
+        mode the batch joins the pending digest, which is sent right away
+        instead of at the end of the window: the outbox only marks a row
+        sent once its email was accepted, and the outbox's own batching
+        already groups the reports that were due together.
+
+        Returns:
+            One entry per report: None if delivered, else the error
+        """
+        if self.digest_window is None:
+            return super().deliver_batch(reports, keys)
+
+        with self._digest_lock:
+            self._digest.extend(
+                (source_name, report) for report, source_name in reports if report.has_changes
+            )
+        try:
+            self.flush()
+        except Exception as e:
+            return [e] * len(reports)
+        return [None] * len(reports)
+
+    def _send_report(self, change_report: ChangeReport, source_name: Optional[str]) -> None:
+        msg = self._build_message(
+            self._create_subject(change_report, source_name),
+            format_text_report(change_report, source_name, attached=bool(self.attachment_format)),
+            format_html_report(change_report, source_name, attached=bool(self.attachment_format)),
+            [(change_report, source_name)]
+        )
+
+        # Send email
+        self.session.send(self.from_email, self.to_email, msg.as_string())
+
+        print(f"📧 Email sent to {self.to_email}")
+
+    def flush(self) -> None:
+        """Send the pending digest now, raising on failure."""
+        with self._digest_lock:
+            reports, self._digest = self._digest, []
+            if self._digest_timer is not None:
+                self._digest_timer.cancel()
+                self._digest_timer = None
+        if reports:
+            self._send_digest(reports)
+
+    def _send_digest(self, reports: List[Tuple[Optional[str], ChangeReport]]) -> None:
+        msg = self._build_message(
+            self._create_digest_subject(reports),
+            format_text_digest(reports, attached=bool(self.attachment_format)),
+            format_html_digest(reports, attached=bool(self.attachment_format)),
+            [(report, source_name) for source_name, report in reports]
+        )
+
+        self.session.send(self.from_email, self.to_email, msg.as_string())
+        print(f"📧 Digest of {len(reports)} reports sent to {self.to_email}")
+
+    def close(self) -> None:
+        """Send any pending digest and close the SMTP connection."""
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ Email digest failed: {e}")
+        self.session.close()
+
+    def _add_to_digest(self, change_report: ChangeReport, source_name: Optional[str]):
+        with self._digest_lock:
+            self._digest.append((source_name, change_report))
+            full = len(self._digest) >= self.digest_max_reports
+            if not full and self._digest_timer is None:
+                self._digest_timer = threading.Timer(self.digest_window, self._flush_in_background)
+                self._digest_timer.daemon = True
+                self._digest_timer.start()
+        if full:
+            self.flush()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"❌ Email digest failed: {e}")
+
+    def _build_message(
+        self,
+        subject: str,
+        text_body: str,
+        html_body: str,
+        reports: List[Tuple[ChangeReport, Optional[str]]]
+    ) -> MIMEMultipart:
+        """
+        Build the email: text and HTML alternatives, plus the full change
+        list of every report that was cut short in the body.
+        """
+        body = MIMEMultipart("alternative")
+        body.attach(MIMEText(text_body, "plain"))
+        body.attach(MIMEText(html_body, "html"))
+
+        attachments = []
+        if self.attachment_format:
+            for report, source_name in reports:
+                rendered = render_report(report, source_name)
+                if rendered.truncated:
+                    attachments.append(rendered.attachment(self.attachment_format))
+
+        if attachments:
+            msg = MIMEMultipart("mixed")
+            msg.attach(body)
+            for filename, data in attachments:
+                part = MIMEApplication(data, "gzip")
+                part.add_header("Content-Disposition", "attachment", filename=filename)
+                msg.attach(part)
+        else:
+            msg = body
+
+        msg["Subject"] = subject
+        msg["From"] = self.from_email
+        msg["To"] = self.to_email
+        return msg
+
     def _create_subject(self, report: ChangeReport, source_name: str = None) -> str:
         """Create email subject line."""
         source = source_name or "SWMAP"
         return f"🔔 [{source}] {report.summary()}"
+
+    def _create_digest_subject(self, reports: List[Tuple[Optional[str], ChangeReport]]) -> str:
+        """Create the subject line of a digest."""
+        total = sum(report.total_changes for _, report in reports)
+        sources = len({source for source, _ in reports})
+        return f"🔔 [SWMAP] {total} changes across {sources} sources"
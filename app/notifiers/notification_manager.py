@@ -1,15 +1,32 @@
 """
 Notification Manager - Multi-channel dispatcher.
 Automatically configures notifiers based on environment settings.
+
+Channels are notified concurrently on a thread pool, so a slow SMTP
+handshake or a stalled API call no longer delays the other channels or
+the monitor run: notify_all waits at most for the slowest channel, capped
+by per-channel timeouts and an overall deadline.
+
+With the outbox enabled, enqueue() stores reports for durable channels
+(email, Telegram, ...) in the monitor's database, in the same transaction
+as the snapshot, and an OutboxDispatcher delivers them with retries, so a
+crash or an SMTP outage does not lose notifications.
+
+Channel modules are imported only when their channel is enabled, so
+python-telegram-bot, smtplib and the webhook HTTP stack are not loaded by
+runs that do not use them.
 """
-from typing import List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
 
-from .base_notifier import BaseNotifier
+from .base_notifier import BaseNotifier, NotificationResult
 from .console_notifier import ConsoleNotifier
-from .email_notifier import EmailNotifier
-from .telegram_notifier import TelegramNotifier
+from .outbox import OutboxDispatcher
 from app.detection.base_detector import ChangeReport
 from app.core.config import settings
+from app.core.metrics import metrics
 
 
 class NotificationManager:
@@ -20,18 +37,42 @@ class NotificationManager:
     dispatches change reports to all of them.
     """
 
-    def __init__(self, include_console: bool = True):
+    def __init__(
+        self,
+        include_console: bool = True,
+        channel_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        max_workers: int = 8,
+        use_outbox: Optional[bool] = None
+    ):
         """
         Initialize the notification manager.
         
         Args:
             include_console: Whether to include console output (default: True)
+            channel_timeout: Seconds to wait for a channel that does not set
+                its own `timeout` (default: NOTIFY_CHANNEL_TIMEOUT)
+            deadline: Seconds notify_all waits for all channels together
+                (default: NOTIFY_DEADLINE)
+            max_workers: Maximum number of channels notified at once
+            use_outbox: Queue reports for durable channels in the storage's
+                outbox in enqueue() (default: NOTIFY_OUTBOX)
         """
         self.notifiers: List[BaseNotifier] = []
+        self.channel_timeout = channel_timeout if channel_timeout is not None else settings.NOTIFY_CHANNEL_TIMEOUT
+        self.deadline = deadline if deadline is not None else settings.NOTIFY_DEADLINE
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="notify")
+        self.use_outbox = use_outbox if use_outbox is not None else settings.NOTIFY_OUTBOX
+        self._dispatchers: Dict[str, OutboxDispatcher] = {}
+        self._dispatchers_lock = threading.Lock()
         
         # Always add console notifier if requested
         if include_console:
-            self.notifiers.append(ConsoleNotifier(use_colors=True, verbose=True))
+            self.notifiers.append(ConsoleNotifier(
+                use_colors=True,
+                verbose=True,
+                summary_only=settings.CONSOLE_NOTIFY_MODE == "summary"
+            ))
         
         # Add email notifier if enabled
         if settings.EMAIL_ENABLED:
@@ -41,6 +82,10 @@ class NotificationManager:
         if settings.TELEGRAM_ENABLED:
             self._setup_telegram_notifier()
 
+        # Add webhook notifier if enabled
+        if settings.WEBHOOK_ENABLED:
+            self._setup_webhook_notifier()
+
     def _setup_email_notifier(self):
         """Configure email notifier from settings."""
         if not settings.EMAIL_USERNAME or not settings.EMAIL_PASSWORD:
@@ -52,13 +97,17 @@ class NotificationManager:
             return
         
         try:
+            from .email_notifier import EmailNotifier
+
             notifier = EmailNotifier(
                 smtp_host=settings.EMAIL_SMTP_HOST,
                 smtp_port=settings.EMAIL_SMTP_PORT,
                 username=settings.EMAIL_USERNAME,
                 password=settings.EMAIL_PASSWORD,
                 to_email=settings.EMAIL_TO,
-                from_email=settings.EMAIL_FROM or settings.EMAIL_USERNAME
+                from_email=settings.EMAIL_FROM or settings.EMAIL_USERNAME,
+                use_tls=settings.EMAIL_USE_TLS,
+                digest_window=settings.EMAIL_DIGEST_SECONDS or None
             )
             self.notifiers.append(notifier)
             print("✅ Email notifications enabled")
@@ -76,15 +125,42 @@ class NotificationManager:
             return
         
         try:
+            from .telegram_notifier import TelegramNotifier
+
             notifier = TelegramNotifier(
                 bot_token=settings.TELEGRAM_BOT_TOKEN,
-                chat_id=settings.TELEGRAM_CHAT_ID
+                chat_id=settings.TELEGRAM_CHAT_ID,
+                base_url=settings.TELEGRAM_BASE_URL or None,
+                coalesce_window=settings.TELEGRAM_COALESCE_SECONDS
             )
             self.notifiers.append(notifier)
             print("✅ Telegram notifications enabled")
         except Exception as e:
             print(f"⚠️ Failed to setup Telegram notifier: {e}")
 
+    def _setup_webhook_notifier(self):
+        """Configure webhook notifier from settings."""
+        if not settings.WEBHOOK_URL:
+            print("⚠️ Webhook enabled but URL not set. Skipping webhook notifier.")
+            return
+        
+        try:
+            from .webhook_notifier import WebhookNotifier
+
+            headers = {"Authorization": settings.WEBHOOK_AUTH_HEADER} if settings.WEBHOOK_AUTH_HEADER else None
+            notifier = WebhookNotifier(
+                url=settings.WEBHOOK_URL,
+                payload_format=settings.WEBHOOK_FORMAT,
+                headers=headers,
+                batch_size=settings.WEBHOOK_BATCH_SIZE,
+                batch_window=settings.WEBHOOK_BATCH_SECONDS,
+                max_concurrency=settings.WEBHOOK_CONCURRENCY
+            )
+            self.notifiers.append(notifier)
+            print("✅ Webhook notifications enabled")
+        except Exception as e:
+            print(f"⚠️ Failed to setup webhook notifier: {e}")
+
     def add_notifier(self, notifier: BaseNotifier) -> None:
         """
         Add a custom notifier to the manager.
@@ -94,22 +170,148 @@ class NotificationManager:
         """
         self.notifiers.append(notifier)
 
-    def notify_all(self, change_report: ChangeReport, source_name: str = None) -> None:
+    @metrics.timed("notify")
+    def notify_all(self, change_report: ChangeReport, source_name: str = None) -> List[NotificationResult]:
         """
-        Send notifications to all configured channels.
+        Send notifications to all configured channels concurrently.
+
+        Returns once every channel has finished, timed out, or the overall
+        deadline has passed. A channel that times out keeps running in the
+        background but is reported as "timeout".
         
         Args:
             change_report: The change report to send
             source_name: Optional source identifier
+
+        Returns:
+            One NotificationResult per channel, in notifier order
         """
-        for notifier in self.notifiers:
+        start = time.monotonic()
+        deadline = start + self.deadline
+        futures = [
+            (notifier, self._executor.submit(self._deliver, notifier, change_report, source_name))
+            for notifier in self.notifiers
+        ]
+
+        results = []
+        for notifier, future in futures:
+            notifier_name = notifier.channel
+            timeout = notifier.timeout if notifier.timeout is not None else self.channel_timeout
+            wait_until = min(start + timeout, deadline)
             try:
-                notifier.notify(change_report, source_name)
-            except Exception as e:
-                notifier_name = notifier.__class__.__name__
-                print(f"⚠️ {notifier_name} failed: {e}")
+                results.append(future.result(timeout=max(0.0, wait_until - time.monotonic())))
+            except FutureTimeout:
+                elapsed = time.monotonic() - start
+                print(f"⚠️ {notifier_name} timed out after {elapsed:.1f}s")
+                metrics.inc("notifications", channel=notifier_name, status="timeout")
+                results.append(NotificationResult(
+                    notifier_name, "timeout", elapsed, f"no response after {elapsed:.1f}s"
+                ))
+        return results
+
+    @metrics.timed("notify")
+    def enqueue(
+        self,
+        storage,
+        change_report: ChangeReport,
+        source_name: str,
+        idempotency_key: str
+    ) -> List[NotificationResult]:
+        """
+        Notify through the storage's outbox.
+
+        Non-durable channels (console) are notified right away. For each
+        durable channel a row is added to the storage's outbox, so calling
+        this inside `storage.transaction()` commits the notification with
+        the snapshot it announces. The rows are delivered by a background
+        dispatcher; enqueueing the same idempotency key again is a no-op.
+
+        Falls back to notify_all() when the outbox is disabled; channels
+        are then called synchronously, so in that case call it after the
+        transaction has committed rather than inside it.
+
+        Args:
+            storage: Storage with the outbox mixin (or a proxy to one)
+            change_report: The change report to send
+            source_name: Source identifier
+            idempotency_key: Identifies this change, e.g. source + snapshot ids
+
+        Returns:
+            Results of the immediate channels; durable channels are
+            reported as "queued"
+        """
+        if not self.use_outbox:
+            return self.notify_all(change_report, source_name)
+
+        durable = [n for n in self.notifiers if n.durable]
+        immediate = [n for n in self.notifiers if not n.durable]
+
+        results = [self._deliver(notifier, change_report, source_name) for notifier in immediate]
+        if not durable:
+            return results
+
+        payload = change_report.to_dict()
+        for notifier in durable:
+            storage.enqueue_notification(notifier.channel, source_name, payload, idempotency_key)
+            results.append(NotificationResult(notifier.channel, "queued"))
+
+        self._dispatcher_for(storage.db_path).wake()
+        return results
+
+    def _dispatcher_for(self, db_path: str) -> OutboxDispatcher:
+        """Start (once) the dispatcher draining the outbox of a database."""
+        with self._dispatchers_lock:
+            dispatcher = self._dispatchers.get(db_path)
+            if dispatcher is None:
+                rate_limits = {}
+                for notifier in self.notifiers:
+                    limit = settings.NOTIFY_RATE_PER_MINUTE or notifier.rate_limit
+                    if notifier.durable and limit:
+                        rate_limits[notifier.channel] = limit
+                dispatcher = OutboxDispatcher(
+                    db_path,
+                    {n.channel: n for n in self.notifiers if n.durable},
+                    rate_limits=rate_limits,
+                    max_attempts=settings.NOTIFY_MAX_ATTEMPTS,
+                    base_delay=settings.NOTIFY_RETRY_BASE_SECONDS
+                )
+                dispatcher.start()
+                self._dispatchers[db_path] = dispatcher
+            return dispatcher
+
+    def _deliver(self, notifier: BaseNotifier, change_report: ChangeReport, source_name: str) -> NotificationResult:
+        """Deliver to one channel on a worker thread and record the outcome."""
+        notifier_name = notifier.channel
+        start = time.monotonic()
+        try:
+            notifier.deliver(change_report, source_name)
+        except Exception as e:
+            print(f"⚠️ {notifier_name} failed: {e}")
+            metrics.inc("notifications", channel=notifier_name, status="failed")
+            return NotificationResult(notifier_name, "failed", time.monotonic() - start, str(e))
+        metrics.inc("notifications", channel=notifier_name, status="sent")
+        return NotificationResult(notifier_name, "sent", time.monotonic() - start)
+
+    def close(self, wait: bool = True, drain_timeout: Optional[float] = None):
+        """
+        Shut down the dispatch threads.
+
+        Args:
+            wait: Wait for running deliveries and give the outbox
+                dispatchers a chance to deliver what is due
+            drain_timeout: Seconds to wait for each outbox to drain
+                (default: NOTIFY_DEADLINE). Undelivered rows stay in the
+                outbox and are picked up on the next run.
+        """
+        with self._dispatchers_lock:
+            dispatchers, self._dispatchers = list(self._dispatchers.values()), {}
+        for dispatcher in dispatchers:
+            if wait:
+                dispatcher.drain(drain_timeout if drain_timeout is not None else self.deadline)
+            dispatcher.stop(timeout=self.deadline if wait else 0)
+        self._executor.shutdown(wait=wait)
 
     @property
     def enabled_channels(self) -> List[str]:
         """Get list of enabled notification channel names."""
-        return [n.__class__.__name__ for n in self.notifiers]
+        return [n.channel for n in self.notifiers]
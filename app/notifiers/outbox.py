@@ -0,0 +1,205 @@
+"""
+Outbox dispatcher.
+
+Delivers the notifications that monitors enqueue in their storage's
+`notification_outbox` table. Failed deliveries are retried with
+exponential backoff until `max_attempts`, and each channel can be limited
+to a number of deliveries per minute. Because rows are only marked sent
+after a successful delivery, a crash can at worst repeat one delivery,
+never lose one. Rows are claimed with a lease before delivery, so
+dispatchers of several monitors sharing one database split the work
+instead of delivering each row once per dispatcher.
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from .base_notifier import BaseNotifier
+from app.detection.base_detector import ChangeReport
+from app.storage.outbox_storage import OutboxStorage
+from app.core.logger import get_logger
+from app.core.metrics import metrics
+
+logger = get_logger("notifiers.outbox")
+
+
+class RateLimiter:
+    """Token bucket allowing `per_minute` events per minute, with bursts up to the same size."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = max(1.0, per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class OutboxDispatcher(threading.Thread):
+    """
+    Background thread that drains a database's notification outbox.
+
+    The dispatcher opens its own connection to the database file, so it
+    can run next to the monitor that writes to the same file.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        notifiers: Dict[str, BaseNotifier],
+        rate_limits: Optional[Dict[str, float]] = None,
+        poll_interval: float = 2.0,
+        max_attempts: int = 8,
+        base_delay: float = 5.0,
+        max_delay: float = 900.0,
+        batch_size: int = 100,
+        lease_seconds: float = 300.0
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            db_path: Database file holding the outbox
+            notifiers: Channel name -> notifier delivering it
+            rate_limits: Channel name -> maximum deliveries per minute
+            poll_interval: Seconds between outbox polls
+            max_attempts: Attempts before a notification is marked dead
+            base_delay: Backoff after the first failure, in seconds
+            max_delay: Upper bound on the backoff, in seconds
+            batch_size: Maximum rows claimed per poll
+            lease_seconds: How long claimed rows stay reserved for this
+                dispatcher; rows of a dispatcher that died are retried
+                once their lease has expired
+        """
+        super().__init__(name="outbox-dispatcher", daemon=True)
+        self.db_path = db_path
+        self.notifiers = notifiers
+        self.limiters = {
+            channel: RateLimiter(per_minute)
+            for channel, per_minute in (rate_limits or {}).items()
+        }
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+
+    def run(self):
+        outbox = OutboxStorage(self.db_path)
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    delivered = self.dispatch_once(outbox)
+                except Exception as e:
+                    logger.warning("⚠️ Outbox dispatch failed: %s", e)
+                    delivered = 0
+                if delivered:
+                    continue
+                self._idle.set()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+        finally:
+            outbox.conn.close()
+
+    def dispatch_once(self, outbox: OutboxStorage) -> int:
+        """
+        Attempt every due notification once.
+
+        Due rows are claimed, grouped per channel and handed to the
+        notifier's deliver_batch(), so channels that batch (webhooks) send
+        a backlog in a few requests. Claimed rows this dispatcher cannot
+        deliver now (unknown channel, rate limited) are released again.
+
+        Returns:
+            Number of notifications attempted
+        """
+        batches: Dict[str, list] = {}
+        released = []
+        for row in outbox.claim_notifications(self.batch_size, self.lease_seconds):
+            limiter = self.limiters.get(row["channel"])
+            if row["channel"] not in self.notifiers or (
+                limiter is not None and not limiter.try_acquire()
+            ):
+                released.append(row["id"])
+                continue
+            batches.setdefault(row["channel"], []).append(row)
+        if released:
+            outbox.release_notifications(released)
+
+        attempted = 0
+        for channel, rows in batches.items():
+            reports, loaded = [], []
+            for row in rows:
+                try:
+                    reports.append((ChangeReport.from_dict(json.loads(row["payload"])), row["source_name"]))
+                except Exception as e:
+                    self._failed(outbox, row, e)
+                else:
+                    loaded.append(row)
+
+            try:
+                keys = [row["idempotency_key"] for row in loaded]
+                errors = self.notifiers[channel].deliver_batch(reports, keys) if reports else []
+            except Exception as e:
+                errors = [e] * len(loaded)
+
+            for row, error in zip(loaded, errors):
+                if error is None:
+                    outbox.mark_notification_sent(row["id"])
+                    metrics.inc("notifications", channel=channel, status="sent")
+                else:
+                    self._failed(outbox, row, error)
+            attempted += len(rows)
+        return attempted
+
+    def _failed(self, outbox: OutboxStorage, row: dict, error: Exception):
+        """Schedule a retry of a failed row, or mark it dead."""
+        attempts = row["attempts"] + 1
+        retry_at = None
+        if attempts < self.max_attempts:
+            retry_at = datetime.now(timezone.utc) + timedelta(seconds=self._backoff(attempts))
+        outbox.mark_notification_failed(row["id"], str(error), retry_at)
+        metrics.inc("notifications", channel=row["channel"], status="failed" if retry_at else "dead")
+        state = "giving up" if retry_at is None else f"retry #{attempts}"
+        logger.warning("⚠️ %s delivery failed (%s): %s", row["channel"], state, error)
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def wake(self):
+        """Poll the outbox now instead of at the next interval."""
+        self._idle.clear()
+        self._wakeup.set()
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """
+        Wait until the dispatcher has gone idle (nothing left that is due).
+
+        Returns:
+            True if it went idle before the timeout
+        """
+        self.wake()
+        return self._idle.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Signal the dispatcher to stop and wait for it to finish."""
+        self._stop_event.set()
+        self._wakeup.set()
+        self.join(timeout)
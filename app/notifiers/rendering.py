@@ -0,0 +1,233 @@
+"""
+Render-once report model shared by the notification channels.
+
+A ChangeReport is walked once into a RenderedReport: header, timestamp,
+summary and, per section, the preview entries already converted to
+strings. The channel renderers in templates.py (text, HTML, Telegram) and
+ConsoleNotifier only format that model, and each channel's output is
+memoized on it, so notifying N channels about one report costs one walk
+plus one formatting pass per channel. Escaping is memoized too, since
+the same titles and values recur across channels and runs.
+
+The previews show at most `PREVIEW_LIMIT` entries per section; the full
+change list is available as a compressed CSV or JSONL attachment.
+"""
+import csv
+import gzip
+import html
+import io
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.detection.base_detector import ChangeReport
+
+# Entries rendered per section in message bodies
+PREVIEW_LIMIT = 10
+
+# Reports with more changes than this also get a full-list attachment
+ATTACHMENT_THRESHOLD = PREVIEW_LIMIT
+
+_MARKDOWN_ESCAPES = str.maketrans({
+    char: f"\\{char}" for char in "_*[]()~`>#+-=|{}.!"
+})
+
+
+@lru_cache(maxsize=8192)
+def escape_markdown(text: str) -> str:
+    """Escape special characters for Telegram MarkdownV2."""
+    return text.translate(_MARKDOWN_ESCAPES)
+
+
+@lru_cache(maxsize=8192)
+def escape_html(text: str) -> str:
+    """Escape text for HTML bodies."""
+    return html.escape(text, quote=False)
+
+
+@dataclass
+class RenderedEntry:
+    """One item of a section, converted to strings."""
+    label: str  # "k: v | ..." for new/removed items, item id for modified ones
+    first_value: str
+    changes: List[Tuple[str, str, str]] = field(default_factory=list)  # (field, old, new)
+
+
+@dataclass
+class RenderedSection:
+    """Preview of the new, removed or modified items of a report."""
+    kind: str  # "new", "removed" or "modified"
+    count: int
+    entries: List[RenderedEntry]
+
+    @property
+    def more(self) -> int:
+        """Number of items not shown in the preview."""
+        return self.count - len(self.entries)
+
+
+@dataclass
+class RenderedReport:
+    """A ChangeReport prepared for formatting by the channel renderers."""
+    report: ChangeReport
+    source_name: Optional[str]
+    generated: datetime
+    summary: str
+    sections: List[RenderedSection]
+    _outputs: Dict[str, Any] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def has_changes(self) -> bool:
+        return self.report.has_changes
+
+    @property
+    def total_changes(self) -> int:
+        return self.report.total_changes
+
+    @property
+    def truncated(self) -> bool:
+        """Whether some changes are only in the attachment."""
+        return any(section.more > 0 for section in self.sections)
+
+    def output(self, channel: str, renderer: Callable[["RenderedReport"], Any]) -> Any:
+        """
+        Render for a channel once and reuse the result.
+
+        Args:
+            channel: Cache key, e.g. "text" or "telegram"
+            renderer: Function formatting this model
+
+        Returns:
+            The (cached) rendered output
+        """
+        with self._lock:
+            if channel not in self._outputs:
+                self._outputs[channel] = renderer(self)
+            return self._outputs[channel]
+
+    def attachment(self, fmt: str = "csv") -> Tuple[str, bytes]:
+        """
+        The full change list as a gzip-compressed CSV or JSONL file.
+
+        Args:
+            fmt: "csv" or "jsonl"
+
+        Returns:
+            (file name, compressed bytes)
+        """
+        return self.output(f"attachment:{fmt}", lambda rendered: _build_attachment(rendered, fmt))
+
+
+def render_report(report: ChangeReport, source_name: Optional[str] = None) -> RenderedReport:
+    """
+    Build (or reuse) the rendered model of a report.
+
+    The model is kept on the report, so every channel notified about the
+    same report shares one walk and its memoized outputs.
+
+    Args:
+        report: The change report
+        source_name: Optional source identifier
+
+    Returns:
+        The RenderedReport
+    """
+    cache = report.__dict__.setdefault("_rendered", {})
+    rendered = cache.get(source_name)
+    if rendered is None:
+        rendered = cache.setdefault(source_name, _build(report, source_name))
+    return rendered
+
+
+def _build(report: ChangeReport, source_name: Optional[str]) -> RenderedReport:
+    sections = []
+    if report.new_items:
+        sections.append(RenderedSection(
+            "new", len(report.new_items),
+            [_item_entry(item) for item in report.new_items[:PREVIEW_LIMIT]]
+        ))
+    if report.removed_items:
+        sections.append(RenderedSection(
+            "removed", len(report.removed_items),
+            [_item_entry(item) for item in report.removed_items[:PREVIEW_LIMIT]]
+        ))
+    if report.modified_items:
+        sections.append(RenderedSection(
+            "modified", len(report.modified_items),
+            [
+                RenderedEntry(
+                    label=change.item_id,
+                    first_value=change.item_id,
+                    changes=[
+                        (name, str(old_val), str(new_val))
+                        for name, (old_val, new_val) in change.changed_fields.items()
+                    ]
+                )
+                for change in report.modified_items[:PREVIEW_LIMIT]
+            ]
+        ))
+    return RenderedReport(
+        report=report,
+        source_name=source_name,
+        generated=datetime.now(),
+        summary=report.summary(),
+        sections=sections,
+    )
+
+
+def _item_entry(item: Dict[str, Any]) -> RenderedEntry:
+    values = list(item.items())
+    return RenderedEntry(
+        label=" | ".join(f"{k}: {v}" for k, v in values[:3]),
+        first_value=str(values[0][1]) if values else "Unknown",
+    )
+
+
+def iter_change_records(report: ChangeReport) -> Iterator[Dict[str, Any]]:
+    """Yield one flat record per change of a report, for exports."""
+    for item in report.new_items:
+        yield {"change_type": "new", "item_id": None, "item": item, "changed_fields": None}
+    for item in report.removed_items:
+        yield {"change_type": "removed", "item_id": None, "item": item, "changed_fields": None}
+    for change in report.modified_items:
+        yield {
+            "change_type": "modified",
+            "item_id": change.item_id,
+            "item": change.new_item,
+            "changed_fields": {
+                name: [old_val, new_val] for name, (old_val, new_val) in change.changed_fields.items()
+            },
+        }
+
+
+def _build_attachment(rendered: RenderedReport, fmt: str) -> Tuple[str, bytes]:
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unsupported attachment format: {fmt}")
+
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as compressed:
+        stream = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+        if fmt == "csv":
+            writer = csv.writer(stream)
+            writer.writerow(["change_type", "item_id", "changed_fields", "item"])
+            for record in iter_change_records(rendered.report):
+                writer.writerow([
+                    record["change_type"],
+                    record["item_id"] or "",
+                    json.dumps(record["changed_fields"], default=str) if record["changed_fields"] else "",
+                    json.dumps(record["item"], default=str),
+                ])
+        else:
+            for record in iter_change_records(rendered.report):
+                stream.write(json.dumps(record, default=str))
+                stream.write("\n")
+        stream.flush()
+        stream.detach()
+
+    name = rendered.source_name or "changes"
+    stamp = rendered.generated.strftime("%Y%m%d-%H%M%S")
+    return f"{name}-{stamp}.{fmt}.gz", buffer.getvalue()
@@ -1,59 +1,342 @@
 """
 Telegram notification sender using python-telegram-bot.
+
+The Bot client lives on a dedicated event loop thread for the lifetime of
+the notifier, so its HTTP connection is reused across reports instead of
+being rebuilt by asyncio.run on every call. Reports submitted within
+`coalesce_window` seconds of each other (e.g. by several monitors) are
+sent as one burst, split into messages at line (item) boundaries to stay
+under Telegram's 4096 character limit, and paced to the chat rate limit.
 """
 import asyncio
+import atexit
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import RetryAfter, TelegramError
 
 from .base_notifier import BaseNotifier
-from .templates import format_telegram_report
+from .rendering import render_report
+from .templates import format_telegram_report, TELEGRAM_PREVIEW_LIMIT
 from app.detection.base_detector import ChangeReport
 
+# Telegram rejects messages longer than this
+MESSAGE_LIMIT = 4096
+
+
+# Unescaped, these open and close a MarkdownV2 entity (bold, italic,
+# strikethrough, inline code); inside code the others are plain text
+ENTITY_MARKERS = "*_~`"
+
+
+def _entities_after(text: str, open_entities: List[str]) -> List[str]:
+    """MarkdownV2 entities still open after `text`, given those open before it."""
+    stack = list(open_entities)
+    escaped = False
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in ENTITY_MARKERS and (char == "`" or "`" not in stack):
+            if char in stack:
+                stack.remove(char)
+            else:
+                stack.append(char)
+    return stack
+
+
+def _ends_in_escape(text: str) -> bool:
+    """Whether text ends in a backslash that escapes the character after it."""
+    return (len(text) - len(text.rstrip("\\"))) % 2 == 1
+
+
+def _cut_point(line: str, room: int, open_entities: List[str]) -> int:
+    """Where to cut a line so the piece, with its entities closed, fits in `room`."""
+    # Only very small limits leave no cut that keeps markers off the cut
+    for avoid_markers in (True, False):
+        cut = min(room, len(line) - 1)
+        while cut > 1:
+            # An odd run of backslashes before the cut ends in an escape
+            # whose character lies past the cut: move that backslash to
+            # the next chunk (an even run is complete escaped backslashes)
+            if _ends_in_escape(line[:cut]):
+                cut -= 1
+            # A marker next to the cut would leave an empty entity on one side
+            elif avoid_markers and (line[cut - 1] in ENTITY_MARKERS or line[cut] in ENTITY_MARKERS):
+                cut -= 1
+            elif cut + len(_entities_after(line[:cut], open_entities)) > room:
+                cut -= 1
+            else:
+                return cut
+    return 2 if line.startswith("\\") else 1
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """
+    Split a message into chunks of at most `limit` characters.
+
+    Chunks break at line boundaries, which are item boundaries in the
+    report formats; a single line longer than the limit is cut, never in
+    the middle of a MarkdownV2 escape sequence. An entity (*bold*,
+    _italic_, ~strike~, `code`) that is open at a break is closed at the
+    end of the chunk and reopened at the start of the next one, so every
+    chunk parses on its own.
+
+    Args:
+        text: Message text
+        limit: Maximum chunk length
+
+    Returns:
+        List of chunks
+    """
+    chunks = []
+    body = ""
+    # Entities open at the start and at the end of body
+    start: List[str] = []
+    end: List[str] = []
+
+    def finish():
+        opened, text, closed = list(start), body.rstrip("\n"), list(end)
+        # Drop entities that would be empty: reopened and closed right away,
+        # or opened at the very end (the next chunk reopens them)
+        while opened and text[:1] == opened[-1]:
+            opened.pop()
+            text = text[1:]
+        while closed and text[-1:] == closed[-1] and not _ends_in_escape(text[:-1]):
+            closed.pop()
+            text = text[:-1]
+        if text:
+            chunks.append("".join(opened) + text + "".join(reversed(closed)))
+
+    for line in text.split("\n"):
+        if body:
+            after = _entities_after("\n" + line, end)
+            if len(start) + len(body) + 1 + len(line) + len(after) <= limit:
+                body = f"{body}\n{line}"
+                end = after
+                continue
+            finish()
+            start = end
+
+        after = _entities_after(line, start)
+        while len(start) + len(line) + len(after) > limit:
+            cut = _cut_point(line, limit - len(start), start)
+            body, end = line[:cut], _entities_after(line[:cut], start)
+            finish()
+            start, line = end, line[cut:]
+            after = _entities_after(line, start)
+        body, end = line, after
+    if body:
+        finish()
+    return chunks
+
 
 class TelegramNotifier(BaseNotifier):
     """
     Telegram notifier using python-telegram-bot.
-    
+
     Sends formatted messages to a Telegram chat/channel.
     """
 
-    def __init__(self, bot_token: str, chat_id: str):
+    # Telegram allows about 20 messages per minute in groups
+    rate_limit = 20.0
+
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        base_url: Optional[str] = None,
+        coalesce_window: float = 0.0,
+        messages_per_second: float = 1.0,
+        attachment_format: Optional[str] = "csv"
+    ):
         """
         Initialize the Telegram notifier.
-        
+
         Args:
             bot_token: Bot token from @BotFather
             chat_id: Target chat/channel ID
+            base_url: Bot API base URL, e.g. a local stub server
+                (default: https://api.telegram.org/bot)
+            coalesce_window: Seconds to wait for more reports before sending
+                a burst (0 sends as soon as the loop gets to it)
+            messages_per_second: Send rate limit for the chat
+            attachment_format: "csv" or "jsonl" to send the full change list
+                (gzip) as a document when the message only shows part of it;
+                None to never attach
         """
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.bot = Bot(token=bot_token)
+        self.coalesce_window = coalesce_window
+        self.attachment_format = attachment_format
+        self.min_interval = 1.0 / messages_per_second if messages_per_second > 0 else 0.0
+        if base_url:
+            self.bot = Bot(token=bot_token, base_url=base_url)
+        else:
+            self.bot = Bot(token=bot_token)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # State below is only touched on the loop thread
+        self._pending: List[Tuple[str, Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._last_send = 0.0
 
     def notify(self, change_report: ChangeReport, source_name: str = None) -> None:
         """
         Send Telegram notification with change report.
-        
+
         Args:
             change_report: The change report to send
             source_name: Optional source identifier
         """
-        # Only send if there are changes
-        if not change_report.has_changes:
-            return
-        
         try:
-            message = format_telegram_report(change_report, source_name)
-            
-            # Run async send in sync context
-            asyncio.run(self._send_message(message))
-            
-            print(f"📱 Telegram message sent to chat {self.chat_id}")
-            
+            self.deliver(change_report, source_name)
         except TelegramError as e:
             print(f"❌ Telegram failed: {e}")
         except Exception as e:
             print(f"❌ Telegram failed: {e}")
 
+    def deliver(self, change_report: ChangeReport, source_name: str = None) -> None:
+        """Send the Telegram message, raising on failure."""
+        # Only send if there are changes
+        if not change_report.has_changes:
+            return
+
+        message = format_telegram_report(change_report, source_name)
+        self.submit(message).result()
+
+        rendered = render_report(change_report, source_name)
+        if self.attachment_format and any(
+            section.count > TELEGRAM_PREVIEW_LIMIT for section in rendered.sections
+        ):
+            filename, data = rendered.attachment(self.attachment_format)
+            self.submit_document(filename, data).result()
+
+        print(f"📱 Telegram message sent to chat {self.chat_id}")
+
+    def submit(self, message: str) -> Future:
+        """
+        Queue a message for the next burst without waiting for it.
+
+        Returns:
+            Future resolved once every chunk of the burst has been sent
+        """
+        loop = self._ensure_loop()
+        future = Future()
+        loop.call_soon_threadsafe(self._enqueue, message, future)
+        return future
+
+    def submit_document(self, filename: str, data: bytes) -> Future:
+        """
+        Send a file to the chat, after the bursts already being sent.
+
+        Returns:
+            Future resolved once the document has been sent
+        """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._send_document(filename, data), loop)
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Send pending messages, close the HTTP client and stop the loop."""
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread and initialize the bot on first use."""
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="telegram-notifier", daemon=True
+                )
+                self._thread.start()
+                try:
+                    asyncio.run_coroutine_threadsafe(self._startup(), loop).result()
+                except BaseException:
+                    loop.call_soon_threadsafe(loop.stop)
+                    raise
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    async def _startup(self):
+        self._send_lock = asyncio.Lock()
+        await self.bot.initialize()
+
+    async def _shutdown(self):
+        if self._flush_task is not None:
+            await self._flush_task
+        # Wait for a burst that is still being sent
+        async with self._send_lock:
+            pass
+        await self.bot.shutdown()
+
+    def _enqueue(self, message: str, future: Future):
+        """Add a message to the pending burst (runs on the loop thread)."""
+        self._pending.append((message, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        """Send everything submitted during the coalesce window as one burst."""
+        if self.coalesce_window > 0:
+            await asyncio.sleep(self.coalesce_window)
+
+        async with self._send_lock:
+            pending, self._pending = self._pending, []
+            self._flush_task = None
+            try:
+                for chunk in split_message("\n\n".join(message for message, _ in pending)):
+                    await self._send_chunk(chunk)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+            else:
+                for _, future in pending:
+                    future.set_result(None)
+
+    async def _send_document(self, filename: str, data: bytes):
+        """Send a document once the current burst is out."""
+        async with self._send_lock:
+            await self._send_paced(
+                lambda: self.bot.send_document(chat_id=self.chat_id, document=data, filename=filename)
+            )
+
+    async def _send_chunk(self, text: str):
+        """Send one message, pacing to the rate limit and honouring RetryAfter."""
+        await self._send_paced(lambda: self._send_message(text))
+
+    async def _send_paced(self, send, max_retries: int = 3):
+        """Await send() (a coroutine factory), pacing and retrying on RetryAfter."""
+        for attempt in range(max_retries + 1):
+            wait = self._last_send + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_send = time.monotonic()
+            try:
+                await send()
+                return
+            except RetryAfter as e:
+                if attempt == max_retries:
+                    raise
+                retry_after = e.retry_after
+                if hasattr(retry_after, "total_seconds"):
+                    retry_after = retry_after.total_seconds()
+                await asyncio.sleep(retry_after)
+
     async def _send_message(self, message: str) -> None:
         """Async method to send the Telegram message."""
         await self.bot.send_message(
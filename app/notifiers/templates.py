@@ -1,146 +1,184 @@
 """
 Message templates for notifications.
 Provides formatted output for different notification channels.
+
+Each formatter renders the shared RenderedReport model (see rendering.py)
+and memoizes its output on it.
 """
-from datetime import datetime
+from typing import List, Optional, Tuple
 from app.detection.base_detector import ChangeReport
+from .rendering import RenderedReport, render_report, escape_html, escape_markdown
+
+# Section titles per channel
+TEXT_TITLES = {"new": "🆕 NEW ITEMS", "removed": "❌ REMOVED ITEMS", "modified": "📝 MODIFIED ITEMS"}
+HTML_TITLES = {"new": "🆕 New Items", "removed": "❌ Removed Items", "modified": "📝 Modified Items"}
+TELEGRAM_TITLES = {"new": "🆕 *New Items:*", "removed": "❌ *Removed:*", "modified": "📝 *Modified:*"}
 
+# Telegram messages stay compact
+TELEGRAM_PREVIEW_LIMIT = 5
 
-def format_text_report(report: ChangeReport, source_name: str = None) -> str:
+
+def format_text_report(report: ChangeReport, source_name: str = None, attached: bool = False) -> str:
     """
     Format a plain text report for console/email.
     
     Args:
         report: The change report
         source_name: Optional source identifier
+        attached: Whether the full change list is sent along as a file
         
     Returns:
         Formatted plain text string
     """
+    return render_report(report, source_name).output(
+        "text:attached" if attached else "text", lambda rendered: _render_text(rendered, attached)
+    )
+
+
+def _more_text(more: int, attached: bool) -> str:
+    """Note for the changes left out of a section."""
+    return f"... and {more} more (full list attached)" if attached else f"... and {more} more"
+
+
+def _render_text(rendered: RenderedReport, attached: bool) -> str:
     lines = []
     header = "Change Detection Report"
-    if source_name:
-        header += f" - {source_name}"
+    if rendered.source_name:
+        header += f" - {rendered.source_name}"
     
     lines.append("=" * 50)
     lines.append(header)
-    lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    lines.append(f"Generated: {rendered.generated.strftime('%Y-%m-%d %H:%M:%S')}")
     lines.append("=" * 50)
     
-    if not report.has_changes:
+    if not rendered.has_changes:
         lines.append("\n✅ No changes detected.")
         return "\n".join(lines)
     
-    lines.append(f"\n📊 Summary: {report.summary()}")
+    lines.append(f"\n📊 Summary: {rendered.summary}")
     lines.append("-" * 50)
     
-    # New items
-    if report.new_items:
-        lines.append(f"\n🆕 NEW ITEMS ({len(report.new_items)}):")
-        for item in report.new_items[:10]:
-            display = " | ".join(f"{k}: {v}" for k, v in list(item.items())[:3])
-            lines.append(f"  → {display}")
-        if len(report.new_items) > 10:
-            lines.append(f"  ... and {len(report.new_items) - 10} more")
-    
-    # Removed items
-    if report.removed_items:
-        lines.append(f"\n❌ REMOVED ITEMS ({len(report.removed_items)}):")
-        for item in report.removed_items[:10]:
-            display = " | ".join(f"{k}: {v}" for k, v in list(item.items())[:3])
-            lines.append(f"  → {display}")
-        if len(report.removed_items) > 10:
-            lines.append(f"  ... and {len(report.removed_items) - 10} more")
-    
-    # Modified items
-    if report.modified_items:
-        lines.append(f"\n📝 MODIFIED ITEMS ({len(report.modified_items)}):")
-        for change in report.modified_items[:10]:
-            lines.append(f"  → {change.item_id}")
-            for field, (old_val, new_val) in change.changed_fields.items():
-                lines.append(f"      {field}: {old_val} → {new_val}")
-        if len(report.modified_items) > 10:
-            lines.append(f"  ... and {len(report.modified_items) - 10} more")
+    for section in rendered.sections:
+        lines.append(f"\n{TEXT_TITLES[section.kind]} ({section.count}):")
+        for entry in section.entries:
+            lines.append(f"  → {entry.label}")
+            for name, old_val, new_val in entry.changes:
+                lines.append(f"      {name}: {old_val} → {new_val}")
+        if section.more > 0:
+            lines.append(f"  {_more_text(section.more, attached)}")
     
     return "\n".join(lines)
 
 
-def format_html_report(report: ChangeReport, source_name: str = None) -> str:
+HTML_HEAD = """
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; margin: 20px; }
+            .header { background: #2c3e50; color: white; padding: 15px; border-radius: 5px; }
+            .summary { background: #ecf0f1; padding: 10px; margin: 10px 0; border-radius: 5px; }
+            .section { margin: 15px 0; }
+            .new { color: #27ae60; }
+            .removed { color: #e74c3c; }
+            .modified { color: #f39c12; }
+            .item { background: #f9f9f9; padding: 8px; margin: 5px 0; border-left: 3px solid #3498db; }
+            .change { font-size: 0.9em; color: #666; margin-left: 20px; }
+        </style>
+    </head>
+    <body>
+"""
+
+
+def format_html_report(report: ChangeReport, source_name: str = None, attached: bool = False) -> str:
     """
     Format an HTML report for email.
     
     Args:
         report: The change report
         source_name: Optional source identifier
+        attached: Whether the full change list is sent along as a file
         
     Returns:
         Formatted HTML string
     """
+    return HTML_HEAD + _format_html_section(report, source_name, attached) + '</body></html>'
+
+
+def format_html_digest(reports: List[Tuple[Optional[str], ChangeReport]], attached: bool = False) -> str:
+    """
+    Format several reports as one HTML document.
+
+    Args:
+        reports: (source name, report) pairs
+        attached: Whether full change lists are sent along as files
+
+    Returns:
+        Formatted HTML string
+    """
+    sections = "".join(_format_html_section(report, source_name, attached) for source_name, report in reports)
+    return HTML_HEAD + sections + '</body></html>'
+
+
+def format_text_digest(reports: List[Tuple[Optional[str], ChangeReport]], attached: bool = False) -> str:
+    """
+    Format several reports as one plain text document.
+
+    Args:
+        reports: (source name, report) pairs
+        attached: Whether full change lists are sent along as files
+
+    Returns:
+        Formatted plain text string
+    """
+    return "\n\n".join(
+        format_text_report(report, source_name, attached) for source_name, report in reports
+    )
+
+
+def _format_html_section(report: ChangeReport, source_name: str = None, attached: bool = False) -> str:
+    """Header and change sections of one report, without the document wrapper."""
+    return render_report(report, source_name).output(
+        "html:attached" if attached else "html", lambda rendered: _render_html_section(rendered, attached)
+    )
+
+
+def _render_html_section(rendered: RenderedReport, attached: bool) -> str:
     header = "Change Detection Report"
-    if source_name:
-        header += f" - {source_name}"
+    if rendered.source_name:
+        header += f" - {rendered.source_name}"
     
-    html = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 20px; }}
-            .header {{ background: #2c3e50; color: white; padding: 15px; border-radius: 5px; }}
-            .summary {{ background: #ecf0f1; padding: 10px; margin: 10px 0; border-radius: 5px; }}
-            .section {{ margin: 15px 0; }}
-            .new {{ color: #27ae60; }}
-            .removed {{ color: #e74c3c; }}
-            .modified {{ color: #f39c12; }}
-            .item {{ background: #f9f9f9; padding: 8px; margin: 5px 0; border-left: 3px solid #3498db; }}
-            .change {{ font-size: 0.9em; color: #666; margin-left: 20px; }}
-        </style>
-    </head>
-    <body>
+    parts = [f"""
         <div class="header">
-            <h2>📊 {header}</h2>
-            <small>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</small>
+            <h2>📊 {escape_html(header)}</h2>
+            <small>Generated: {rendered.generated.strftime('%Y-%m-%d %H:%M:%S')}</small>
         </div>
-    """
+    """]
     
-    if not report.has_changes:
-        html += '<div class="summary">✅ No changes detected.</div>'
-    else:
-        html += f'<div class="summary"><strong>Summary:</strong> {report.summary()}</div>'
-        
-        # New items
-        if report.new_items:
-            html += f'<div class="section"><h3 class="new">🆕 New Items ({len(report.new_items)})</h3>'
-            for item in report.new_items[:10]:
-                display = " | ".join(f"{k}: {v}" for k, v in list(item.items())[:3])
-                html += f'<div class="item">{display}</div>'
-            if len(report.new_items) > 10:
-                html += f'<p>... and {len(report.new_items) - 10} more</p>'
-            html += '</div>'
-        
-        # Removed items
-        if report.removed_items:
-            html += f'<div class="section"><h3 class="removed">❌ Removed Items ({len(report.removed_items)})</h3>'
-            for item in report.removed_items[:10]:
-                display = " | ".join(f"{k}: {v}" for k, v in list(item.items())[:3])
-                html += f'<div class="item">{display}</div>'
-            if len(report.removed_items) > 10:
-                html += f'<p>... and {len(report.removed_items) - 10} more</p>'
-            html += '</div>'
-        
-        # Modified items
-        if report.modified_items:
-            html += f'<div class="section"><h3 class="modified">📝 Modified Items ({len(report.modified_items)})</h3>'
-            for change in report.modified_items[:10]:
-                html += f'<div class="item"><strong>{change.item_id}</strong>'
-                for field, (old_val, new_val) in change.changed_fields.items():
-                    html += f'<div class="change">{field}: <s>{old_val}</s> → <strong>{new_val}</strong></div>'
-                html += '</div>'
-            if len(report.modified_items) > 10:
-                html += f'<p>... and {len(report.modified_items) - 10} more</p>'
-            html += '</div>'
-    
-    html += '</body></html>'
-    return html
+    if not rendered.has_changes:
+        parts.append('<div class="summary">✅ No changes detected.</div>')
+        return "".join(parts)
+
+    parts.append(f'<div class="summary"><strong>Summary:</strong> {rendered.summary}</div>')
+    for section in rendered.sections:
+        parts.append(
+            f'<div class="section"><h3 class="{section.kind}">{HTML_TITLES[section.kind]} ({section.count})</h3>'
+        )
+        for entry in section.entries:
+            if section.kind == "modified":
+                parts.append(f'<div class="item"><strong>{escape_html(entry.label)}</strong>')
+                for name, old_val, new_val in entry.changes:
+                    parts.append(
+                        f'<div class="change">{escape_html(name)}: <s>{escape_html(old_val)}</s>'
+                        f' → <strong>{escape_html(new_val)}</strong></div>'
+                    )
+                parts.append('</div>')
+            else:
+                parts.append(f'<div class="item">{escape_html(entry.label)}</div>')
+        if section.more > 0:
+            parts.append(f'<p>{_more_text(section.more, attached)}</p>')
+        parts.append('</div>')
+    
+    return "".join(parts)
 
 
 def format_telegram_report(report: ChangeReport, source_name: str = None) -> str:
@@ -154,54 +192,36 @@ def format_telegram_report(report: ChangeReport, source_name: str = None) -> str
     Returns:
         Formatted Markdown string for Telegram
     """
+    return render_report(report, source_name).output("telegram", _render_telegram)
+
+
+def _render_telegram(rendered: RenderedReport) -> str:
     lines = []
     header = "📊 *Change Detection Report*"
-    if source_name:
-        header += f" \\- `{source_name}`"
+    if rendered.source_name:
+        header += f" \\- `{rendered.source_name}`"
     
     lines.append(header)
-    lines.append(f"🕐 {datetime.now().strftime('%Y\\-%m\\-%d %H:%M')}")
+    # Dashes are escaped for MarkdownV2 (no backslashes inside f-string braces)
+    timestamp = rendered.generated.strftime("%Y\\-%m\\-%d %H:%M")
+    lines.append(f"🕐 {timestamp}")
     lines.append("")
     
-    if not report.has_changes:
+    if not rendered.has_changes:
         lines.append("✅ No changes detected\\.")
         return "\n".join(lines)
     
-    lines.append(f"*Summary:* {_escape_markdown(report.summary())}")
+    lines.append(f"*Summary:* {escape_markdown(rendered.summary)}")
     lines.append("")
     
-    # New items (compact)
-    if report.new_items:
-        lines.append(f"🆕 *New Items:* {len(report.new_items)}")
-        for item in report.new_items[:5]:
-            first_val = list(item.values())[0] if item else "Unknown"
-            lines.append(f"  • {_escape_markdown(str(first_val)[:50])}")
-        if len(report.new_items) > 5:
-            lines.append(f"  _\\.\\.\\. and {len(report.new_items) - 5} more_")
-    
-    # Removed items (compact)
-    if report.removed_items:
-        lines.append(f"\n❌ *Removed:* {len(report.removed_items)}")
-        for item in report.removed_items[:5]:
-            first_val = list(item.values())[0] if item else "Unknown"
-            lines.append(f"  • {_escape_markdown(str(first_val)[:50])}")
-        if len(report.removed_items) > 5:
-            lines.append(f"  _\\.\\.\\. and {len(report.removed_items) - 5} more_")
-    
-    # Modified items (compact)
-    if report.modified_items:
-        lines.append(f"\n📝 *Modified:* {len(report.modified_items)}")
-        for change in report.modified_items[:5]:
-            lines.append(f"  • {_escape_markdown(change.item_id[:40])}")
-        if len(report.modified_items) > 5:
-            lines.append(f"  _\\.\\.\\. and {len(report.modified_items) - 5} more_")
+    # Compact sections: first value of each item (item id when modified)
+    for section in rendered.sections:
+        prefix = "" if section.kind == "new" else "\n"
+        lines.append(f"{prefix}{TELEGRAM_TITLES[section.kind]} {section.count}")
+        width = 40 if section.kind == "modified" else 50
+        for entry in section.entries[:TELEGRAM_PREVIEW_LIMIT]:
+            lines.append(f"  • {escape_markdown(entry.first_value[:width])}")
+        if section.count > TELEGRAM_PREVIEW_LIMIT:
+            lines.append(f"  _\\.\\.\\. and {section.count - TELEGRAM_PREVIEW_LIMIT} more_")
     
     return "\n".join(lines)
-
-
-def _escape_markdown(text: str) -> str:
-    """Escape special characters for Telegram MarkdownV2."""
-    special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-    for char in special_chars:
-        text = text.replace(char, f'\\{char}')
-    return text
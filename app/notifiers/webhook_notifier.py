@@ -0,0 +1,276 @@
+"""
+HTTP webhook notification sender.
+
+Posts change reports as JSON to a webhook, either the generic format
+below or a Slack-compatible {"text": ...} body. Reports are batched:
+several reports go out in one POST, either because they were submitted
+within `batch_window` seconds of each other or because the outbox handed
+over a backlog at once (deliver_batch). POSTs run on at most
+`max_concurrency` threads over one keep-alive connection pool, and
+larger bodies are gzip-compressed.
+
+Generic payload:
+    {"app": "SWMAP", "reports": [
+        {"idempotency_key": ..., "source_name": ..., "summary": ...,
+         "total_changes": ..., "generated_at": ...,
+         "changes": ChangeReport.to_dict()}, ...]}
+
+Each report's idempotency_key is its outbox row's key (or, for reports
+sent directly, a hash of its source and changes), so a receiver can
+dedupe reports however they were grouped into requests. The
+Idempotency-Key header is that key for a single-report request.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .base_notifier import BaseNotifier
+from .rendering import render_report
+from .templates import format_text_report
+from app.detection.base_detector import ChangeReport
+from app.core.config import settings
+
+# (report, source name, idempotency key)
+Batch = List[Tuple[ChangeReport, Optional[str], str]]
+
+
+class WebhookNotifier(BaseNotifier):
+    """
+    Webhook notifier using a pooled requests.Session.
+
+    Sends batches of change reports to an HTTP endpoint.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        payload_format: str = "json",
+        headers: Optional[dict] = None,
+        batch_size: int = 50,
+        batch_window: float = 0.0,
+        max_concurrency: int = 4,
+        compress: Optional[bool] = None,
+        min_compress_size: int = 1024,
+        request_timeout: float = 10.0,
+        max_retries: int = 2
+    ):
+        """
+        Initialize the webhook notifier.
+
+        Args:
+            url: Webhook endpoint
+            payload_format: "json" (generic) or "slack" ({"text": ...})
+            headers: Extra request headers, e.g. Authorization
+            batch_size: Maximum reports per POST
+            batch_window: Seconds to wait for more reports before posting
+                (0 posts as soon as a report is submitted)
+            max_concurrency: Maximum POSTs in flight (and pooled connections)
+            compress: gzip request bodies (default: on for "json", off for
+                "slack", which does not accept compressed bodies)
+            min_compress_size: Bodies smaller than this are sent as-is
+            request_timeout: Timeout per request, in seconds
+            max_retries: Retries on connection errors, 429 and 5xx responses
+                (honouring Retry-After)
+        """
+        if payload_format not in ("json", "slack"):
+            raise ValueError(f"Unsupported webhook format: {payload_format}")
+
+        self.url = url
+        self.payload_format = payload_format
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.compress = compress if compress is not None else payload_format == "json"
+        self.min_compress_size = min_compress_size
+        self.request_timeout = request_timeout
+
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.session.headers.update(headers or {})
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=None,  # POSTs carry an Idempotency-Key
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="webhook")
+
+        self._pending: List[Tuple[ChangeReport, Optional[str], str, Future]] = []
+        self._pending_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.close)
+
+    def notify(self, change_report: ChangeReport, source_name: str = None) -> None:
+        """
+        Send webhook notification with change report.
+
+        Args:
+            change_report: The change report to send
+            source_name: Optional source identifier
+        """
+        try:
+            self.deliver(change_report, source_name)
+        except requests.RequestException as e:
+            print(f"❌ Webhook failed: {e}")
+        except Exception as e:
+            print(f"❌ Webhook failed: {e}")
+
+    def deliver(self, change_report: ChangeReport, source_name: str = None) -> None:
+        """Post the report (possibly batched with others), raising on failure."""
+        # Only send if there are changes
+        if not change_report.has_changes:
+            return
+
+        self.submit(change_report, source_name).result()
+
+    def deliver_batch(
+        self,
+        reports: List[Tuple[ChangeReport, Optional[str]]],
+        keys: Optional[List[str]] = None
+    ) -> List[Optional[Exception]]:
+        """
+        Post many reports in batches of `batch_size`, concurrently.
+
+        Args:
+            reports: (change report, source name) pairs
+            keys: Idempotency key of each report (default: derived from
+                the report, see report_key)
+
+        Returns:
+            One entry per report: None if delivered, else the error
+        """
+        errors: List[Optional[Exception]] = [None] * len(reports)
+        indexed = [
+            (i, (report, source_name, keys[i] if keys else self.report_key(report, source_name)))
+            for i, (report, source_name) in enumerate(reports)
+            if report.has_changes
+        ]
+        futures = []
+        for start in range(0, len(indexed), self.batch_size):
+            chunk = indexed[start:start + self.batch_size]
+            futures.append((chunk, self._executor.submit(self._post, [item for _, item in chunk])))
+
+        for chunk, future in futures:
+            error = future.exception()
+            if error is not None:
+                for i, _ in chunk:
+                    errors[i] = error
+        return errors
+
+    def submit(self, change_report: ChangeReport, source_name: str = None) -> Future:
+        """
+        Add a report to the next batch without waiting for it.
+
+        Returns:
+            Future resolved once the batch has been posted
+        """
+        future = Future()
+        key = self.report_key(change_report, source_name)
+        with self._pending_lock:
+            self._pending.append((change_report, source_name, key, future))
+            full = len(self._pending) >= self.batch_size
+            if not full and self.batch_window > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.batch_window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return future
+        self.flush()
+        return future
+
+    def flush(self) -> None:
+        """Post the pending batch now (without waiting for the response)."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if pending:
+            self._executor.submit(self._post_pending, pending)
+
+    def close(self) -> None:
+        """Post pending reports and close the connection pool."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _post_pending(self, pending: List[Tuple[ChangeReport, Optional[str], str, Future]]):
+        try:
+            self._post([item[:3] for item in pending])
+        except Exception as e:
+            for *_, future in pending:
+                future.set_exception(e)
+        else:
+            for *_, future in pending:
+                future.set_result(None)
+
+    def _post(self, batch: Batch) -> None:
+        """POST one batch, raising on failure."""
+        body = json.dumps(self._payload(batch), default=str).encode("utf-8")
+        headers = {"Idempotency-Key": self._idempotency_key(batch)}
+        if self.compress and len(body) >= self.min_compress_size:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        response = self.session.post(self.url, data=body, headers=headers, timeout=self.request_timeout)
+        response.raise_for_status()
+        print(f"🔗 Webhook delivered {len(batch)} report(s)")
+
+    @staticmethod
+    def report_key(report: ChangeReport, source_name: Optional[str]) -> str:
+        """
+        Idempotency key of a report sent without an outbox row.
+
+        Built from the source and changes only (not from the body, which
+        carries `sent_at`), so a retry of the same report sends the same key.
+        """
+        data = json.dumps([source_name, report.to_dict()], sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _idempotency_key(batch: Batch) -> str:
+        """
+        Idempotency-Key header of a request.
+
+        The report's own key when the request carries a single report;
+        otherwise a hash of the reports' keys, which identifies this exact
+        grouping only (receivers should dedupe on the per-report keys).
+        """
+        keys = [key for _, _, key in batch]
+        if len(keys) == 1:
+            return keys[0]
+        return hashlib.sha256("\n".join(sorted(keys)).encode("utf-8")).hexdigest()
+
+    def _payload(self, batch: Batch) -> dict:
+        """Build the request body for a batch."""
+        if self.payload_format == "slack":
+            return {
+                "text": "\n\n".join(
+                    format_text_report(report, source_name) for report, source_name, _ in batch
+                )
+            }
+
+        reports = []
+        for report, source_name, key in batch:
+            rendered = render_report(report, source_name)
+            reports.append({
+                "idempotency_key": key,
+                "source_name": source_name,
+                "summary": rendered.summary,
+                "total_changes": rendered.total_changes,
+                "generated_at": rendered.generated.astimezone(timezone.utc).isoformat(),
+                "changes": rendered.output("webhook", lambda r: r.report.to_dict()),
+            })
+        return {"app": settings.APP_NAME, "sent_at": datetime.now(timezone.utc).isoformat(), "reports": reports}
@@ -1,11 +1,14 @@
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Optional
 import re
 
+from app.core.metrics import metrics
+
 class DataCleaner:
 
     def __init__(self, steps: List[Callable]):
         self.steps = steps
     
+    @metrics.timed("clean")
     def clean(self, data: List[Dict]) -> List[Dict]:
         for step in self.steps:
             data = step(data)
@@ -41,14 +44,26 @@ def normalize_text_fields(data: List[Dict], fields: List[str]):
 
         return data
 
+def parse_price(value) -> Optional[float]:
+        """Parse a scraped price such as "$1,299.00" into a float, or None."""
+        if isinstance(value, (int, float)):
+            return float(value)
+        if not value:
+            return None
+
+        cleaned = re.sub(r"[^\d.]", "", value)
+        try:
+            return float(cleaned)
+        except ValueError:
+            return None
+
 def normalize_price(data: List[Dict], field: str):
         for item in data:
             value = item.get(field)
             if not value:
                 continue
 
-            cleaned = re.sub(r"[^\d.]", "", value)
-            item[field] = float(cleaned) if cleaned else None
+            item[field] = parse_price(value)
 
         return data
 
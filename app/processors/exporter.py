@@ -0,0 +1,300 @@
+"""
+Streaming, append-only exports.
+
+Writers stream records to a temporary file next to the target and rename
+it into place only when the export completes, so readers never see a
+half-written file. CSV and JSONL are supported, each optionally gzipped.
+
+DeltaExporter appends a new partition file per run under
+`<root>/<source>/date=YYYY-MM-DD/`, holding only the records that were
+added or changed in that run, so an export costs O(delta) and existing
+files are never rewritten. export_query streams any SQLite query to a
+file with fetchmany, for bulk exports of whole tables.
+"""
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.metrics import metrics
+
+FORMATS = ("csv", "jsonl")
+
+
+class ExportWriter:
+    """
+    Base class for streaming export writers.
+
+    Records are written to `<path>.tmp` and moved to `path` by close().
+    Used as a context manager, the temporary file is discarded if the
+    block raises.
+    """
+
+    def __init__(self, path: str, compress: bool = False):
+        """
+        Open the temporary file.
+
+        Args:
+            path: Final path of the export
+            compress: Gzip the output
+        """
+        self.path = path
+        self.compress = compress
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._raw = open(self._tmp_path, "wb")
+        stream = gzip.GzipFile(fileobj=self._raw, mode="wb") if compress else self._raw
+        self._file = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+    def write(self, record: Dict[str, Any]):
+        """Write a single record."""
+        raise NotImplementedError
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Write records one by one; returns the number written."""
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+
+    def close(self):
+        """Flush the file to disk and atomically move it into place."""
+        if self._raw.closed:
+            return
+        self._release_stream()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        """Close and delete the temporary file without publishing it."""
+        if not self._raw.closed:
+            self._release_stream()
+            self._raw.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _release_stream(self):
+        """Flush the text (and gzip) layers, leaving the raw file open."""
+        if self.compress:
+            # Closing GzipFile writes its trailer but does not close fileobj
+            self._file.close()
+        else:
+            self._file.detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+class CSVExportWriter(ExportWriter):
+    """
+    Streaming CSV writer.
+
+    The header is fixed when the file is opened, from `fieldnames` or else
+    from the first record. Missing fields are written empty; fields not in
+    the header are dropped.
+    """
+
+    def __init__(self, path: str, fieldnames: Optional[List[str]] = None, compress: bool = False):
+        super().__init__(path, compress)
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self._writer = None
+        if self.fieldnames:
+            self._open_writer()
+
+    def _open_writer(self):
+        self._writer = csv.DictWriter(
+            self._file, fieldnames=self.fieldnames, extrasaction="ignore"
+        )
+        self._writer.writeheader()
+
+    def write(self, record: Dict[str, Any]):
+        if self._writer is None:
+            self.fieldnames = list(record.keys())
+            self._open_writer()
+        self._writer.writerow(record)
+        self.count += 1
+
+    def write_rows(self, rows: Iterable[tuple]) -> int:
+        """Write positional rows matching fieldnames, skipping the dict step."""
+        if self._writer is None:
+            raise ValueError("fieldnames are required to write plain rows")
+        rows = list(rows)
+        self._writer.writer.writerows(rows)
+        self.count += len(rows)
+        return len(rows)
+
+
+class JSONLExportWriter(ExportWriter):
+    """Streaming JSON Lines writer (one JSON object per line)."""
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._file.write("\n")
+        self.count += 1
+
+
+def open_writer(
+    path: str,
+    fmt: str = "csv",
+    compress: bool = False,
+    fieldnames: Optional[List[str]] = None
+) -> ExportWriter:
+    """
+    Open a streaming export writer.
+
+    Args:
+        path: Final path of the export
+        fmt: "csv" or "jsonl"
+        compress: Gzip the output
+        fieldnames: CSV header (defaults to the first record's keys)
+
+    Returns:
+        The writer
+    """
+    if fmt == "csv":
+        return CSVExportWriter(path, fieldnames, compress)
+    if fmt == "jsonl":
+        return JSONLExportWriter(path, compress)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def export_query(
+    conn,
+    query: str,
+    path: str,
+    params: tuple = (),
+    fmt: str = "csv",
+    compress: bool = False,
+    batch_size: int = 1_000
+) -> int:
+    """
+    Stream the result of a SQLite query to an export file.
+
+    Rows are fetched `batch_size` at a time, so the result set is never
+    held in memory as a whole.
+
+    Args:
+        conn: SQLite connection
+        query: SELECT statement
+        path: Final path of the export
+        params: Query parameters
+        fmt: "csv" or "jsonl"
+        compress: Gzip the output
+        batch_size: Rows per fetchmany call
+
+    Returns:
+        Number of rows exported
+    """
+    cursor = conn.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+
+    with open_writer(path, fmt, compress, fieldnames=columns) as writer:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if fmt == "csv":
+                writer.write_rows(tuple(row) for row in rows)
+            else:
+                writer.write_many(dict(zip(columns, row)) for row in rows)
+        return writer.count
+
+
+class DeltaExporter:
+    """
+    Per-source, partitioned, append-only export of new and changed records.
+
+    Each call writes one new file,
+    `<root>/<source>/date=YYYY-MM-DD/part-<HHMMSSffffff><ext>[.gz]`, with a
+    `change_type` column ("added", "changed" or "seen") in front of the
+    record's own fields.
+    """
+
+    def __init__(
+        self,
+        source_name: str,
+        fields: List[str],
+        root: str = "data/exports",
+        fmt: str = "csv",
+        compress: bool = False
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            source_name: Source partition name
+            fields: Record fields to export, in column order
+            root: Root export directory
+            fmt: "csv" or "jsonl"
+            compress: Gzip the partition files
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.source_name = source_name
+        self.fields = list(fields)
+        self.root = root
+        self.fmt = fmt
+        self.compress = compress
+
+    def partition_path(self, when: Optional[datetime] = None) -> str:
+        """Path of the partition file for an export made at `when`."""
+        when = when or datetime.now(timezone.utc)
+        name = f"part-{when.strftime('%H%M%S%f')}.{self.fmt}"
+        if self.compress:
+            name += ".gz"
+        return os.path.join(
+            self.root, self.source_name, f"date={when.strftime('%Y-%m-%d')}", name
+        )
+
+    def export_items(self, items: Iterable[Dict[str, Any]], change_type: str) -> Optional[str]:
+        """
+        Export records that all share one change type.
+
+        Returns:
+            Path of the written partition, or None if there was nothing to write
+        """
+        return self._export((change_type, item) for item in items)
+
+    def export_report(self, report) -> Optional[str]:
+        """
+        Export the new and modified items of a ChangeReport.
+
+        Returns:
+            Path of the written partition, or None if there was nothing to write
+        """
+        records = [("added", item) for item in report.new_items]
+        records.extend(("changed", change.new_item) for change in report.modified_items)
+        return self._export(records)
+
+    @metrics.timed("export")
+    def _export(self, records: Iterable) -> Optional[str]:
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return None
+
+        path = self.partition_path()
+        columns = ["change_type", *self.fields]
+        with open_writer(path, self.fmt, self.compress, fieldnames=columns) as writer:
+            for change_type, item in itertools.chain([first], records):
+                writer.write({"change_type": change_type, **{f: item.get(f) for f in self.fields}})
+        return path
@@ -1,4 +1,4 @@
-from playwright.sync_api import sync_playwright
+from app.core.metrics import metrics
 
 class DynamicScraper:
     def __init__(self, url, wait_for=None, headless=True, timeout=50_000):
@@ -7,7 +7,11 @@ class DynamicScraper:
         self.headless = headless
         self.timeout = timeout
 
+    @metrics.timed("render")
     def open(self):
+        # Playwright is only loaded when a browser is actually needed
+        from playwright.sync_api import sync_playwright
+
         self.playwright = sync_playwright().start()
         self.browser = self.playwright.chromium.launch(headless=self.headless)
         self.page = self.browser.new_page()
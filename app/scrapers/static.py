@@ -1,12 +1,20 @@
-import requests
-from bs4 import BeautifulSoup
 from app.scrapers.base import BaseScraper
+from app.core.metrics import metrics
 
 class StaticScraper(BaseScraper):
+    # requests and BeautifulSoup are imported on first use, so importing
+    # a monitor (e.g. to build it, or from scripts) stays cheap
+    @metrics.timed("fetch")
     def fetch(self):
+        import requests
+
         response = requests.get(self.url, timeout=10)
         response.raise_for_status()
+        metrics.inc("fetched_bytes", len(response.content))
         return response.text
     
+    @metrics.timed("parse")
     def parse(self, content):
+        from bs4 import BeautifulSoup
+
         return BeautifulSoup(content, "lxml")
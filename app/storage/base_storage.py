@@ -1,26 +1,193 @@
 import sqlite3
 import os
+from contextlib import contextmanager
+
+from app.core.logger import get_logger
+
+logger = get_logger("storage")
+
+# Connection profile applied to every storage connection.
+# WAL lets readers (dashboards, exports) run while the scraper writes, and
+# synchronous=NORMAL only fsyncs the WAL at checkpoints instead of per commit.
+CONNECTION_PRAGMAS = {
+    # Only takes effect on new databases; see BaseStorage.enable_incremental_vacuum
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64_000,  # negative = KiB, i.e. ~64 MB page cache
+    "temp_store": "MEMORY",
+    "busy_timeout": 5_000,  # ms to wait on a locked database
+}
+
+
+def open_connection(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a SQLite connection with the tuned connection profile.
+
+    Args:
+        db_path: Path to the database file
+        check_same_thread: Passed through to sqlite3.connect
+
+    Returns:
+        The configured connection
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    for name, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
 
 class BaseStorage:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, check_same_thread: bool = True):
         # Ensure the data folder exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        self.db_path = db_path
+        self.conn = open_connection(db_path, check_same_thread)
+        self._transaction_depth = 0
 
-    def clear_all_data(self, table_name: str):
-        """Optimized wipe for any specific table."""
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: group several writes into a single transaction.
+
+        Storage methods called inside the block do not commit on their own;
+        everything is committed once when the outermost block exits, or
+        rolled back if it raises. Blocks may be nested.
+
+        Example:
+            with storage.transaction():
+                storage.save_snapshot(source, data)
+                storage.insert_jobs(data)
+        """
+        if self._transaction_depth == 0:
+            if self.conn.in_transaction:
+                self.conn.commit()
+            self.conn.execute("BEGIN IMMEDIATE")
+
+        self._transaction_depth += 1
         try:
-            # 1. Delete data & reset ID counter
-            self.conn.execute(f"DELETE FROM {table_name}")
-            self.conn.execute(f"DELETE FROM sqlite_sequence WHERE name='{table_name}'")
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.rollback()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.commit()
+
+    def execute(self, fn, *args, **kwargs):
+        """
+        Run fn(storage, *args, **kwargs) against this storage.
+
+        Code that needs the connection itself goes through here, so it also
+        works with WriteBehindStorage, which runs it on the writer thread.
+        """
+        return fn(self, *args, **kwargs)
+
+    def execute_read(self, fn, *args, **kwargs):
+        """
+        Like execute(), for fn that only reads (temporary tables allowed).
+
+        Pooled storages may run it on a read connection instead of the writer.
+        """
+        return fn(self, *args, **kwargs)
+
+    def _commit(self):
+        """Commit, unless a unit of work is in progress."""
+        if self._transaction_depth == 0:
             self.conn.commit()
-            
-            # 2. Optimized VACUUM (must be outside transaction)
-            old_level = self.conn.isolation_level
-            self.conn.isolation_level = None
+
+    def _table_columns(self, table_name: str) -> set:
+        """Names of the columns of a table (empty if it does not exist)."""
+        return {
+            row[1] for row in self.conn.execute(f"PRAGMA table_info({table_name})")
+        }
+
+    def _add_missing_columns(self, table_name: str, columns: dict):
+        """
+        Add columns to an existing table if they are not there yet.
+
+        Args:
+            table_name: Table to migrate
+            columns: Mapping of column name -> column definition
+        """
+        existing = self._table_columns(table_name)
+        for name, definition in columns.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {name} {definition}")
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Switch an existing database to auto_vacuum=INCREMENTAL.
+
+        New databases get it from the connection profile. Older files need
+        one full VACUUM to convert; after that, free pages are returned with
+        bounded incremental_vacuum steps instead.
+
+        Returns:
+            True if a conversion VACUUM was run
+        """
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+
+        self.conn.commit()
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # VACUUM must run outside a transaction
+        old_level = self.conn.isolation_level
+        self.conn.isolation_level = None
+        try:
             self.conn.execute("VACUUM")
+        finally:
             self.conn.isolation_level = old_level
-            print(f"✅ {table_name} cleared and storage optimized.")
+        return True
+
+    def incremental_vacuum(self, max_pages: int = 256) -> int:
+        """
+        Return up to max_pages free pages to the file system.
+
+        Args:
+            max_pages: Upper bound on pages released in this step
+
+        Returns:
+            Number of pages released
+        """
+        # Never inside a unit of work: executescript commits first
+        if self._transaction_depth:
+            return 0
+
+        before = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if before == 0:
+            return 0
+        # execute() would only step the pragma once, freeing a single page
+        self.conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        after = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    def clear_all_data(self, table_name: str, batch_size: int = 5_000):
+        """Optimized wipe for any specific table."""
+        try:
+            # 1. Delete data in batches & reset ID counter
+            while True:
+                cursor = self.conn.execute(
+                    f"DELETE FROM {table_name} WHERE rowid IN "
+                    f"(SELECT rowid FROM {table_name} LIMIT ?)",
+                    (batch_size,)
+                )
+                self.conn.commit()
+                if cursor.rowcount < batch_size:
+                    break
+            self.conn.execute(f"DELETE FROM sqlite_sequence WHERE name='{table_name}'")
+            self.conn.commit()
+
+            # 2. Release free pages in bounded steps; only databases that
+            #    predate auto_vacuum=INCREMENTAL need a one-time VACUUM
+            if not self.enable_incremental_vacuum():
+                while self.incremental_vacuum():
+                    pass
+            logger.info("✅ %s cleared and storage optimized.", table_name)
         except sqlite3.Error as e:
-            print(f"❌ Error clearing table: {e}")
\ No newline at end of file
+            logger.error("❌ Error clearing table: %s", e)
\ No newline at end of file
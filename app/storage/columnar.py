@@ -0,0 +1,389 @@
+"""
+Memory-mapped columnar snapshot files.
+
+An alternative to the `snapshots` table for very large sources. Each
+snapshot is one immutable file that is opened with mmap; nothing is
+parsed up front except a fixed header and a small JSON metadata block:
+
+    header     magic, version, item count, index entry count, field count
+               and the offsets of the sections below (little-endian, fixed
+               size)
+    meta       JSON: fields, key_fields, source_name, created_at, data_hash
+    index      one fixed-size entry per item id, sorted by item id:
+               (id offset, id length, row number, 16-byte content hash)
+    id heap    the UTF-8 item ids the index entries point into
+    columns    per field: a type byte per row, row offsets into the
+               field's value heap, then the heap itself
+
+Item ids are those of generate_item_id. When several items share a key,
+only the last occurrence is indexed (as in ChangeDetector.detect); the
+others are still stored as rows. Content hashes are those of
+generate_hash, so a ColumnarSnapshot can be diffed against new data by
+binary-searching the index and comparing hashes, decoding only the rows
+that differ.
+"""
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.detection.hashers import generate_hash, hash_dataset, last_positions
+
+MAGIC = b"SWC1"
+VERSION = 2
+# magic, version, item count, index entry count, field count, meta offset,
+# meta length, index offset, id heap offset, columns offset
+HEADER = struct.Struct("<4sHIIIQIQQQ")
+INDEX_ENTRY = struct.Struct("<QII16s")
+# types offset, row offsets offset, value heap offset
+COLUMN_ENTRY = struct.Struct("<QQQ")
+
+# Per-value type tags
+_MISSING, _TEXT, _JSON = 0, 1, 2
+
+
+def _encode_value(value: Any) -> Tuple[int, bytes]:
+    if isinstance(value, str):
+        return _TEXT, value.encode("utf-8")
+    return _JSON, json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def write_columnar(
+    path: str,
+    data: List[Dict[str, Any]],
+    key_fields: List[str],
+    source_name: str = ""
+) -> str:
+    """
+    Write a snapshot as a columnar file.
+
+    The file is written next to `path` and renamed into place, so a
+    reader never maps a partial file.
+
+    Args:
+        path: Destination path
+        data: Snapshot items
+        key_fields: Fields that identify an item
+        source_name: Recorded in the file's metadata
+
+    Returns:
+        The path written
+    """
+    count = len(data)
+    fields = list(dict.fromkeys(key for item in data for key in item))
+    meta = json.dumps({
+        "fields": fields,
+        "key_fields": list(key_fields),
+        "source_name": source_name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "data_hash": hash_dataset(data),
+    }).encode("utf-8")
+
+    # Sorted item id index over the last occurrence of each key
+    positions = last_positions(data, key_fields)
+    id_heap = bytearray()
+    index = bytearray()
+    for item_id in sorted(item_id.encode("utf-8") for item_id in positions):
+        row = positions[item_id.decode("utf-8")]
+        content_hash = bytes.fromhex(generate_hash(data[row]))
+        index += INDEX_ENTRY.pack(len(id_heap), len(item_id), row, content_hash)
+        id_heap += item_id
+
+    meta_offset = HEADER.size
+    index_offset = meta_offset + len(meta)
+    id_heap_offset = index_offset + len(index)
+    columns_offset = id_heap_offset + len(id_heap)
+
+    # Columns, laid out after the column directory
+    directory = bytearray()
+    column_data = bytearray()
+    base = columns_offset + COLUMN_ENTRY.size * len(fields)
+    for name in fields:
+        types = bytearray(count)
+        offsets = [0]
+        heap = bytearray()
+        for row, item in enumerate(data):
+            if name in item:
+                types[row], encoded = _encode_value(item[name])
+                heap += encoded
+            offsets.append(len(heap))
+
+        types_offset = base + len(column_data)
+        column_data += types
+        offsets_offset = base + len(column_data)
+        column_data += struct.pack(f"<{count + 1}Q", *offsets)
+        heap_offset = base + len(column_data)
+        column_data += heap
+        directory += COLUMN_ENTRY.pack(types_offset, offsets_offset, heap_offset)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, count, len(positions), len(fields), meta_offset, len(meta),
+        index_offset, id_heap_offset, columns_offset
+    )
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for part in (header, meta, index, id_heap, directory, column_data):
+            f.write(part)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+class ColumnarSnapshot(Sequence):
+    """
+    Read-only, memory-mapped view of a columnar snapshot file.
+
+    Behaves as a sequence of items in their original order; find() and
+    get() look items up by id with a binary search over the index, and
+    match() resolves many ids in one pass over it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        (
+            magic, version, self._count, self._index_count, field_count,
+            meta_offset, meta_length,
+            self._index_offset, self._id_heap_offset, columns_offset
+        ) = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a columnar snapshot file: {path}")
+
+        self.meta = json.loads(bytes(self._buffer[meta_offset:meta_offset + meta_length]))
+        self.fields: List[str] = self.meta["fields"]
+        self.key_fields: List[str] = self.meta["key_fields"]
+        self._columns = [
+            COLUMN_ENTRY.unpack_from(self._buffer, columns_offset + i * COLUMN_ENTRY.size)
+            for i in range(field_count)
+        ]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _entry(self, position: int) -> Tuple[int, int, int, bytes]:
+        return INDEX_ENTRY.unpack_from(
+            self._buffer, self._index_offset + position * INDEX_ENTRY.size
+        )
+
+    def _entry_id(self, entry) -> bytes:
+        start = self._id_heap_offset + entry[0]
+        return self._mmap[start:start + entry[1]]
+
+    def find(self, item_id: str) -> Optional[int]:
+        """
+        Row number of an item, or None if it is not in the snapshot.
+
+        Args:
+            item_id: Item id (see generate_item_id)
+        """
+        found = self.lookup(item_id)
+        return None if found is None else found[0]
+
+    def lookup(self, item_id: str) -> Optional[Tuple[int, str]]:
+        """(row number, content hash) of an item, or None."""
+        target = item_id.encode("utf-8")
+        low, high = 0, self._index_count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            candidate = self._entry_id(entry)
+            if candidate < target:
+                low = middle + 1
+            elif candidate > target:
+                high = middle
+            else:
+                return entry[2], entry[3].hex()
+        return None
+
+    def match(self, item_ids: List[str]) -> List[Optional[Tuple[int, str]]]:
+        """
+        Look up many items at once with a merge join over the sorted index.
+
+        Cheaper than calling lookup() per item when item_ids covers a
+        large part of the snapshot: the index is read once, sequentially.
+
+        Args:
+            item_ids: Item ids
+
+        Returns:
+            (row number, content hash) or None for each id, in input order
+        """
+        targets = [item_id.encode("utf-8") for item_id in item_ids]
+        order = sorted(range(len(targets)), key=targets.__getitem__)
+        result: List[Optional[Tuple[int, str]]] = [None] * len(targets)
+
+        index_end = self._index_offset + self._index_count * INDEX_ENTRY.size
+        entries = INDEX_ENTRY.iter_unpack(self._mmap[self._index_offset:index_end])
+        heap = self._id_heap_offset
+        mm = self._mmap
+
+        entry = next(entries, None)
+        candidate = mm[heap + entry[0]:heap + entry[0] + entry[1]] if entry else None
+        for position in order:
+            target = targets[position]
+            while entry is not None and candidate < target:
+                entry = next(entries, None)
+                if entry is not None:
+                    candidate = mm[heap + entry[0]:heap + entry[0] + entry[1]]
+            if entry is None:
+                break
+            if candidate == target:
+                result[position] = (entry[2], entry[3].hex())
+        return result
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """The item with the given id, or None."""
+        row = self.find(item_id)
+        return None if row is None else self[row]
+
+    def value(self, row: int, field: str) -> Any:
+        """Decode a single field of a row (None if the item lacks it)."""
+        return self._value(row, self.fields.index(field))[1]
+
+    def _value(self, row: int, column: int) -> Tuple[int, Any]:
+        types_offset, offsets_offset, heap_offset = self._columns[column]
+        kind = self._buffer[types_offset + row]
+        if kind == _MISSING:
+            return kind, None
+        start, end = struct.unpack_from("<QQ", self._buffer, offsets_offset + row * 8)
+        raw = self._buffer[heap_offset + start:heap_offset + end]
+        if kind == _TEXT:
+            return kind, str(raw, "utf-8")
+        return kind, json.loads(raw.tobytes())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("snapshot index out of range")
+
+        item = {}
+        for column, name in enumerate(self.fields):
+            kind, value = self._value(index, column)
+            if kind != _MISSING:
+                item[name] = value
+        return item
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(self._count):
+            yield self[row]
+
+    def item_ids(self) -> Iterator[Tuple[str, int]]:
+        """(item id, row number) pairs of the indexed rows, in item id order."""
+        for position in range(self._index_count):
+            entry = self._entry(position)
+            yield self._entry_id(entry).decode("utf-8"), entry[2]
+
+    def close(self):
+        """Release the memory map."""
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ColumnarSnapshotStore:
+    """
+    Directory of columnar snapshot files, one subdirectory per source.
+
+    A `LATEST` file in each source directory names the newest snapshot and
+    is replaced atomically after the snapshot file itself is in place.
+    """
+
+    def __init__(self, root: str = "data/columnar", key_fields: Optional[List[str]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            root: Root directory
+            key_fields: Fields that identify an item (default for save_snapshot)
+        """
+        self.root = root
+        self.key_fields = key_fields
+
+    def _source_dir(self, source_name: str) -> str:
+        return os.path.join(self.root, source_name)
+
+    def save_snapshot(
+        self,
+        source_name: str,
+        data: List[Dict[str, Any]],
+        key_fields: Optional[List[str]] = None
+    ) -> str:
+        """
+        Write a new snapshot for a source and make it the latest.
+
+        Returns:
+            Path of the snapshot file
+        """
+        key_fields = key_fields or self.key_fields
+        if not key_fields:
+            raise ValueError("Columnar snapshots need key_fields")
+
+        directory = self._source_dir(source_name)
+        name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f") + ".swc"
+        path = write_columnar(os.path.join(directory, name), data, key_fields, source_name)
+
+        pointer = os.path.join(directory, "LATEST")
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(f"{pointer}.tmp", pointer)
+        return path
+
+    def latest_path(self, source_name: str) -> Optional[str]:
+        """Path of a source's newest snapshot, or None."""
+        pointer = os.path.join(self._source_dir(source_name), "LATEST")
+        try:
+            with open(pointer, encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return os.path.join(self._source_dir(source_name), name)
+
+    def get_latest_snapshot(self, source_name: str) -> Optional[ColumnarSnapshot]:
+        """Memory-map a source's newest snapshot, or return None."""
+        path = self.latest_path(source_name)
+        return ColumnarSnapshot(path) if path else None
+
+    def list_snapshots(self, source_name: str) -> List[str]:
+        """Paths of a source's snapshots, oldest first."""
+        directory = self._source_dir(source_name)
+        if not os.path.isdir(directory):
+            return []
+        return [
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.endswith(".swc")
+        ]
+
+    def cleanup_old_snapshots(self, source_name: str, keep_count: int = 10) -> int:
+        """
+        Delete all but the newest `keep_count` snapshots of a source.
+
+        The latest snapshot is always kept.
+
+        Returns:
+            Number of files deleted
+        """
+        paths = self.list_snapshots(source_name)
+        doomed = paths[:-keep_count] if keep_count > 0 else paths[:-1]
+        for path in doomed:
+            os.remove(path)
+        return len(doomed)
@@ -0,0 +1,236 @@
+"""
+Read-only queries over stored item history.
+
+HistoryQuery answers trend questions straight from the indexed tables a
+storage maintains, instead of dumping everything to CSV:
+
+    price_series      price changes of one item      (history table)
+    daily_prices      per-day open/high/low/close    (price rollup table)
+    first_seen        items first seen in a window   (jobs table)
+    top_movers        largest price moves in a window (price rollup table)
+
+Timestamps are compared as stored ISO-8601 UTC text; datetimes passed in
+are converted to that form. Queries run through storage.execute_read, so
+a WriteBehindStorage or pooled storage works as well.
+
+Example:
+    query = HistoryQuery(DynamicStorage())
+    movers = query.top_movers(since=datetime.now(timezone.utc) - timedelta(days=7))
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from app.processors.cleaner import parse_price
+
+Timestamp = Union[datetime, str, None]
+
+
+def _as_timestamp(value: Timestamp) -> Optional[str]:
+    """Convert a datetime to the stored ISO-8601 UTC text form."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat()
+    return value
+
+
+def _window(column: str, since: Timestamp, until: Timestamp) -> tuple:
+    """Build a `since <= column < until` condition and its parameters."""
+    conditions, params = [], []
+    if since is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(_as_timestamp(since))
+    if until is not None:
+        conditions.append(f"{column} < ?")
+        params.append(_as_timestamp(until))
+    return " AND ".join(conditions) or "1", params
+
+
+class HistoryQuery:
+    """Trend queries over a StaticStorage or DynamicStorage."""
+
+    def __init__(self, storage):
+        """
+        Initialize the query helper.
+
+        Args:
+            storage: A storage object defining jobs_table, history_table and
+                price_rollup_table (or a proxy around one)
+        """
+        self.storage = storage
+
+    def price_series(
+        self,
+        item_id: str,
+        since: Timestamp = None,
+        until: Timestamp = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Every recorded price of an item, oldest first.
+
+        Args:
+            item_id: The item's natural key (see job_key_fields)
+            since: Start of the window (inclusive)
+            until: End of the window (exclusive)
+
+        Returns:
+            Dicts with changed_at, price (as stored) and value (parsed)
+        """
+        return self.storage.execute_read(self._price_series, item_id, since, until)
+
+    def _price_series(self, storage, item_id, since, until):
+        condition, params = _window("changed_at", since, until)
+        cursor = storage.conn.execute(
+            f"""
+            SELECT changed_at, new_value FROM {storage.history_table}
+            WHERE item_id = ? AND field = 'price' AND change_type != 'removed' AND {condition}
+            ORDER BY changed_at, id
+            """,
+            (item_id, *params)
+        )
+        return [
+            {"changed_at": changed_at, "price": price, "value": parse_price(price)}
+            for changed_at, price in cursor.fetchall()
+        ]
+
+    def daily_prices(
+        self,
+        item_id: str,
+        since: Timestamp = None,
+        until: Timestamp = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Daily open/high/low/close prices of an item from the rollup table.
+
+        Args:
+            item_id: The item's natural key
+            since: First day of the window (inclusive)
+            until: End of the window (exclusive)
+
+        Returns:
+            Dicts with day, open, high, low, close and observations
+        """
+        return self.storage.execute_read(self._daily_prices, item_id, since, until)
+
+    def _daily_prices(self, storage, item_id, since, until):
+        table = self._rollup_table(storage)
+        condition, params = _window("day", _day(since), _day(until))
+        cursor = storage.conn.execute(
+            f"""
+            SELECT day, open_price, high_price, low_price, close_price, observations
+            FROM {table}
+            WHERE item_id = ? AND {condition}
+            ORDER BY day
+            """,
+            (item_id, *params)
+        )
+        return [
+            {
+                "day": row[0],
+                "open": row[1],
+                "high": row[2],
+                "low": row[3],
+                "close": row[4],
+                "observations": row[5],
+            }
+            for row in cursor.fetchall()
+        ]
+
+    def first_seen(
+        self,
+        since: Timestamp = None,
+        until: Timestamp = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Items first seen within a window, oldest first.
+
+        Args:
+            since: Start of the window (inclusive)
+            until: End of the window (exclusive)
+            limit: Maximum number of items (None = all)
+
+        Returns:
+            The items' rows from the jobs table
+        """
+        return self.storage.execute_read(self._first_seen, since, until, limit)
+
+    def _first_seen(self, storage, since, until, limit):
+        condition, params = _window("first_seen", since, until)
+        cursor = storage.conn.execute(
+            f"""
+            SELECT * FROM {storage.jobs_table}
+            WHERE {condition}
+            ORDER BY first_seen, id
+            LIMIT ?
+            """,
+            (*params, -1 if limit is None else limit)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    def top_movers(
+        self,
+        since: Timestamp = None,
+        until: Timestamp = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Items whose price moved the most over a period.
+
+        The move is the close of the last day in the window minus the open
+        of the first day the item was seen in the window.
+
+        Args:
+            since: First day of the window (inclusive)
+            until: End of the window (exclusive)
+            limit: Maximum number of items
+
+        Returns:
+            Dicts with item_id, start_price, end_price, change and
+            change_pct, largest absolute change first
+        """
+        return self.storage.execute_read(self._top_movers, since, until, limit)
+
+    def _top_movers(self, storage, since, until, limit):
+        table = self._rollup_table(storage)
+        condition, params = _window("day", _day(since), _day(until))
+        cursor = storage.conn.execute(
+            f"""
+            WITH period AS (
+                SELECT item_id, MIN(day) AS first_day, MAX(day) AS last_day
+                FROM {table}
+                WHERE {condition}
+                GROUP BY item_id
+            ),
+            moves AS (
+                SELECT p.item_id, f.open_price AS start_price, l.close_price AS end_price
+                FROM period p
+                JOIN {table} f ON f.item_id = p.item_id AND f.day = p.first_day
+                JOIN {table} l ON l.item_id = p.item_id AND l.day = p.last_day
+            )
+            SELECT item_id, start_price, end_price,
+                   end_price - start_price AS change,
+                   CASE WHEN start_price != 0
+                        THEN (end_price - start_price) * 100.0 / start_price
+                   END AS change_pct
+            FROM moves
+            WHERE end_price != start_price
+            ORDER BY ABS(end_price - start_price) DESC, item_id
+            LIMIT ?
+            """,
+            (*params, limit)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _rollup_table(storage) -> str:
+        table = getattr(storage, "price_rollup_table", None)
+        if table is None:
+            raise ValueError(f"{type(storage).__name__} does not keep price rollups")
+        return table
+
+
+def _day(value: Timestamp) -> Optional[str]:
+    """Reduce a timestamp to the YYYY-MM-DD day used by the rollup table."""
+    value = _as_timestamp(value)
+    return value[:10] if value is not None else None
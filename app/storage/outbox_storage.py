@@ -0,0 +1,213 @@
+"""
+Durable notification outbox.
+
+Notifications are written to the `notification_outbox` table in the same
+database (and transaction) as the snapshot they announce, then delivered
+by an OutboxDispatcher. A unique (channel, idempotency_key) pair makes
+enqueueing the same change twice a no-op.
+
+Dispatchers claim rows before delivering them (status 'sending' with a
+lease), so several dispatchers sharing one database never deliver the
+same row twice; a claim whose dispatcher died expires with its lease.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from .base_storage import BaseStorage
+
+
+class OutboxMixin:
+    """Mixin that adds the notification outbox to a storage class."""
+
+    def _create_outbox_table(self):
+        """Create the outbox table in the existing database."""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                source_name TEXT,
+                idempotency_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TEXT NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                sent_at TEXT
+            );
+        """)
+        self._add_missing_columns("notification_outbox", {"lease_until": "TEXT"})
+        self.conn.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_notification_outbox_key
+            ON notification_outbox(channel, idempotency_key);
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_notification_outbox_due
+            ON notification_outbox(status, next_attempt_at);
+        """)
+        self.conn.commit()
+
+    def enqueue_notification(
+        self,
+        channel: str,
+        source_name: Optional[str],
+        payload: Dict[str, Any],
+        idempotency_key: str
+    ) -> bool:
+        """
+        Add a notification to the outbox.
+
+        Args:
+            channel: Channel that will deliver it (see BaseNotifier.channel)
+            source_name: Source the notification is about
+            payload: JSON-serializable report (ChangeReport.to_dict())
+            idempotency_key: Identifies the change being announced
+
+        Returns:
+            False if this change was already enqueued for the channel
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        cursor = self.conn.execute(
+            """
+            INSERT OR IGNORE INTO notification_outbox
+                (channel, source_name, idempotency_key, payload, next_attempt_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (channel, source_name, idempotency_key, json.dumps(payload, default=str), now, now)
+        )
+        self._commit()
+        return cursor.rowcount == 1
+
+    def claim_notifications(self, limit: int = 100, lease_seconds: float = 300.0) -> List[Dict[str, Any]]:
+        """
+        Atomically claim due notifications for delivery, oldest first.
+
+        Pending rows whose next attempt is due, and rows whose previous
+        claim has expired, are moved to 'sending' until the lease ends.
+        Claimed rows must end in mark_notification_sent,
+        mark_notification_failed or release_notifications.
+
+        Args:
+            limit: Maximum rows claimed
+            lease_seconds: How long the claim is held
+
+        Returns:
+            The claimed rows
+        """
+        now = datetime.now(timezone.utc)
+        lease_until = now + timedelta(seconds=lease_seconds)
+        cursor = self.conn.execute(
+            """
+            UPDATE notification_outbox
+            SET status = 'sending', lease_until = ?1
+            WHERE id IN (
+                SELECT id FROM notification_outbox
+                WHERE (status = 'pending' AND next_attempt_at <= ?2)
+                   OR (status = 'sending' AND lease_until <= ?2)
+                ORDER BY id
+                LIMIT ?3
+            )
+            RETURNING id, channel, source_name, idempotency_key, payload, attempts
+            """,
+            (lease_until.isoformat(), now.isoformat(), limit)
+        )
+        rows = [dict(row) for row in cursor.fetchall()]
+        self._commit()
+        return sorted(rows, key=lambda row: row["id"])
+
+    def release_notifications(self, notification_ids: List[int]):
+        """Return claimed rows to 'pending' without counting an attempt."""
+        self.conn.executemany(
+            """
+            UPDATE notification_outbox SET status = 'pending', lease_until = NULL
+            WHERE id = ? AND status = 'sending'
+            """,
+            [(notification_id,) for notification_id in notification_ids]
+        )
+        self._commit()
+
+    def mark_notification_sent(self, notification_id: int):
+        """Record a successful delivery."""
+        self.conn.execute(
+            """
+            UPDATE notification_outbox
+            SET status = 'sent', attempts = attempts + 1, sent_at = ?, last_error = NULL,
+                lease_until = NULL
+            WHERE id = ?
+            """,
+            (datetime.now(timezone.utc).isoformat(), notification_id)
+        )
+        self._commit()
+
+    def mark_notification_failed(
+        self,
+        notification_id: int,
+        error: str,
+        next_attempt_at: Optional[datetime]
+    ):
+        """
+        Record a failed delivery.
+
+        Args:
+            notification_id: Outbox row id
+            error: Error message
+            next_attempt_at: When to retry (None = give up, status 'dead')
+        """
+        if next_attempt_at is None:
+            self.conn.execute(
+                """
+                UPDATE notification_outbox
+                SET status = 'dead', attempts = attempts + 1, last_error = ?, lease_until = NULL
+                WHERE id = ?
+                """,
+                (error, notification_id)
+            )
+        else:
+            self.conn.execute(
+                """
+                UPDATE notification_outbox
+                SET status = 'pending', attempts = attempts + 1, last_error = ?,
+                    next_attempt_at = ?, lease_until = NULL
+                WHERE id = ?
+                """,
+                (error, next_attempt_at.isoformat(), notification_id)
+            )
+        self._commit()
+
+    def prune_notifications(self, older_than: datetime, source_name: Optional[str] = None) -> int:
+        """
+        Delete delivered notifications sent before a cutoff.
+
+        Pending and dead rows are kept (dead ones are left for inspection).
+
+        Args:
+            older_than: Cutoff on sent_at
+            source_name: Only prune this source's rows (None = all sources)
+
+        Returns:
+            Number of rows deleted
+        """
+        query = "DELETE FROM notification_outbox WHERE status = 'sent' AND sent_at < ?"
+        params = [older_than.isoformat()]
+        if source_name is not None:
+            query += " AND source_name = ?"
+            params.append(source_name)
+        cursor = self.conn.execute(query, params)
+        self._commit()
+        return cursor.rowcount
+
+    def outbox_counts(self) -> Dict[str, int]:
+        """Number of outbox rows per status."""
+        cursor = self.conn.execute(
+            "SELECT status, COUNT(*) FROM notification_outbox GROUP BY status"
+        )
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+class OutboxStorage(BaseStorage, OutboxMixin):
+    """Standalone access to the outbox of an existing database file."""
+
+    def __init__(self, db_path: str):
+        super().__init__(db_path)
+        self._create_outbox_table()
@@ -0,0 +1,164 @@
+"""
+Snapshot retention and storage compaction.
+
+RetentionEngine decides which snapshots to drop according to a
+RetentionPolicy, deletes them in small batches, prunes delivered
+notifications from the outbox and then returns free pages to the file
+system with bounded incremental_vacuum steps.
+
+Retention never runs inside a monitor run: the entry points call
+monitor.retention.run() once the run has finished and its notifications
+have been delivered. Through a StoragePool's per-source facade the run is
+scoped to that source's snapshots and notifications, and the vacuum step
+is left to StoragePool.incremental_vacuum(), which compacts the shared
+file once for all sources.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger("storage.retention")
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Which snapshots to keep for each source.
+
+    Attributes:
+        keep_last: The newest N snapshots are always kept
+        max_age: Snapshots older than this are dropped (None = no limit)
+        tiers: (window, bucket) pairs, youngest window first. A snapshot
+            whose age falls within a tier's window is kept only if it is the
+            newest one in its bucket. When tiers are set, snapshots older
+            than the last window are dropped.
+    """
+    keep_last: int = 10
+    max_age: Optional[timedelta] = None
+    tiers: List[Tuple[timedelta, timedelta]] = field(default_factory=list)
+
+    @classmethod
+    def tiered(cls, keep_last: int = 10) -> "RetentionPolicy":
+        """Hourly snapshots for a day, daily snapshots for a month."""
+        return cls(
+            keep_last=keep_last,
+            tiers=[
+                (timedelta(days=1), timedelta(hours=1)),
+                (timedelta(days=30), timedelta(days=1)),
+            ],
+        )
+
+    def expired(self, snapshots: List[Dict], now: datetime) -> List[int]:
+        """
+        Select the snapshots this policy drops.
+
+        Args:
+            snapshots: Dicts with id and created_at, oldest first
+            now: Reference time
+
+        Returns:
+            IDs of snapshots to delete
+        """
+        # Without age rules, keep_last is a plain count limit
+        if self.max_age is None and not self.tiers:
+            return [s["id"] for s in snapshots[:max(len(snapshots) - self.keep_last, 0)]]
+
+        protected = {s["id"] for s in snapshots[-self.keep_last:]} if self.keep_last else set()
+        kept_buckets = set()
+        expired = []
+
+        # Newest first, so the first snapshot seen in a bucket is the one kept
+        for snapshot in reversed(snapshots):
+            is_protected = snapshot["id"] in protected
+            created_at = datetime.fromisoformat(snapshot["created_at"])
+            age = now - created_at
+            if self.max_age is not None and age > self.max_age and not is_protected:
+                expired.append(snapshot["id"])
+                continue
+            if not self.tiers:
+                continue
+
+            for tier_index, (window, bucket) in enumerate(self.tiers):
+                if age <= window:
+                    # Buckets are aligned to absolute time so they stay stable between runs
+                    key = (tier_index, int(created_at.timestamp() // bucket.total_seconds()))
+                    # A protected snapshot also fills its bucket
+                    if key in kept_buckets and not is_protected:
+                        expired.append(snapshot["id"])
+                    else:
+                        kept_buckets.add(key)
+                    break
+            else:
+                if not is_protected:
+                    expired.append(snapshot["id"])
+
+        return expired
+
+
+class RetentionEngine:
+    """
+    Applies a RetentionPolicy to a snapshot storage and compacts the file.
+    """
+
+    def __init__(
+        self,
+        storage,
+        policy: Optional[RetentionPolicy] = None,
+        batch_size: int = 500,
+        vacuum_pages: int = 256,
+        outbox_max_age: Optional[timedelta] = timedelta(days=7)
+    ):
+        """
+        Initialize the retention engine.
+
+        Args:
+            storage: A storage object using SnapshotMixin
+            policy: Retention policy (defaults to RetentionPolicy.tiered())
+            batch_size: Snapshots deleted per transaction
+            vacuum_pages: Upper bound on pages released per vacuum step
+            outbox_max_age: Delivered notifications older than this are
+                pruned from the outbox (None keeps them)
+        """
+        self.storage = storage
+        self.policy = policy or RetentionPolicy.tiered()
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.outbox_max_age = outbox_max_age
+
+    def apply(self, source_name: str, now: Optional[datetime] = None) -> int:
+        """
+        Drop the snapshots of one source that the policy expires.
+
+        Returns:
+            Number of snapshots deleted
+        """
+        return self.storage.execute(self._apply, source_name, now)
+
+    def _apply(self, storage, source_name: str, now: Optional[datetime]) -> int:
+        now = now or datetime.now(timezone.utc)
+        snapshots = storage.list_snapshots(source_name)
+        expired = self.policy.expired(snapshots, now)
+        return storage.delete_snapshots(source_name, expired, self.batch_size)
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Apply the policy to every source, then run one vacuum step.
+
+        Returns:
+            Dict with the number of snapshots deleted, notifications
+            pruned and pages released
+        """
+        return self.storage.execute(self._run, now)
+
+    def _run(self, storage, now: Optional[datetime]) -> Dict[str, int]:
+        deleted = 0
+        for source_name in storage.get_snapshot_sources():
+            deleted += self._apply(storage, source_name, now)
+        pruned = 0
+        if self.outbox_max_age is not None and hasattr(storage, "prune_notifications"):
+            cutoff = (now or datetime.now(timezone.utc)) - self.outbox_max_age
+            pruned = storage.prune_notifications(cutoff)
+        pages = storage.incremental_vacuum(self.vacuum_pages)
+        return {"deleted": deleted, "notifications_pruned": pruned, "pages_released": pages}
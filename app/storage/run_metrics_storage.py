@@ -0,0 +1,97 @@
+"""
+Per-run metrics table.
+
+One `run_metrics` row per monitor run, with the run's duration, status,
+item and change counts and the seconds spent per stage (JSON), for
+spotting regressions and capacity planning.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from app.core.metrics import RunStats
+
+
+class RunMetricsMixin:
+    """Mixin that adds the run_metrics table to a storage class."""
+
+    def _create_run_metrics_table(self):
+        """Create the run metrics table in the existing database."""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_name TEXT NOT NULL,
+                run_id TEXT,
+                started_at TEXT NOT NULL,
+                duration REAL NOT NULL,
+                status TEXT NOT NULL,
+                items INTEGER NOT NULL DEFAULT 0,
+                new_items INTEGER NOT NULL DEFAULT 0,
+                removed_items INTEGER NOT NULL DEFAULT 0,
+                modified_items INTEGER NOT NULL DEFAULT 0,
+                stages TEXT NOT NULL,
+                counts TEXT NOT NULL
+            );
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_run_metrics_source
+            ON run_metrics(source_name, started_at);
+        """)
+        self.conn.commit()
+
+    def record_run_metrics(self, stats: RunStats) -> None:
+        """
+        Store the summary of one run.
+
+        Args:
+            stats: RunStats collected by metrics.run()
+        """
+        counts = stats.counts
+        self.conn.execute(
+            """
+            INSERT INTO run_metrics (
+                source_name, run_id, started_at, duration, status,
+                items, new_items, removed_items, modified_items, stages, counts
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                stats.source_name,
+                stats.run_id,
+                stats.started_at.isoformat(),
+                stats.duration,
+                stats.status,
+                int(counts.get("items_scraped", 0)),
+                int(counts.get("items_new", 0)),
+                int(counts.get("items_removed", 0)),
+                int(counts.get("items_modified", 0)),
+                json.dumps({stage: round(seconds, 6) for stage, seconds in stats.stages.items()}),
+                json.dumps(counts),
+            )
+        )
+        self._commit()
+
+    def get_run_metrics(self, source_name: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Most recent run summaries, newest first.
+
+        Args:
+            source_name: Only this source (None = all)
+            limit: Maximum rows
+
+        Returns:
+            Rows with `stages` and `counts` decoded
+        """
+        query = "SELECT * FROM run_metrics"
+        params: list = []
+        if source_name is not None:
+            query += " WHERE source_name = ?"
+            params.append(source_name)
+        query += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        rows = []
+        for row in self.conn.execute(query, params):
+            entry = dict(row)
+            entry["stages"] = json.loads(entry["stages"])
+            entry["counts"] = json.loads(entry["counts"])
+            rows.append(entry)
+        return rows
@@ -0,0 +1,129 @@
+"""
+In-process LRU cache of decoded snapshots.
+
+Back-to-back monitor runs compare against the snapshot the previous run
+just saved. Keeping the decoded data (and its item index) in memory lets
+the next run start from it without reading, decompressing or re-indexing
+the stored payload. The cache is shared by every storage instance in the
+process and is safe to use from several threads.
+
+Entries are keyed by (database path, snapshot id) and carry the snapshot's
+data_hash, which callers check against the stored row before trusting a
+hit. Cached data is shared and must be treated as read-only.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from app.detection.hashers import generate_unique_item_ids
+
+
+class SnapshotCache:
+    """Bounded, thread-safe LRU of decoded snapshots and their item indexes."""
+
+    def __init__(self, max_entries: int = 32):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of snapshots kept in memory
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(db_path: str, snapshot_id: int) -> Tuple[str, int]:
+        """Cache key of a snapshot stored in a given database file."""
+        return (os.path.abspath(db_path), snapshot_id)
+
+    def get(self, key: Hashable, data_hash: str) -> Optional[Sequence[Dict[str, Any]]]:
+        """
+        Look up a snapshot's data.
+
+        Args:
+            key: Cache key (see SnapshotCache.key)
+            data_hash: The snapshot's stored data_hash; an entry with a
+                different hash is stale and is dropped
+
+        Returns:
+            The cached data, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["data_hash"] != data_hash:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["data"]
+
+    def put(
+        self,
+        key: Hashable,
+        data_hash: str,
+        data: Sequence[Dict[str, Any]],
+        key_fields: Optional[List[str]] = None,
+        item_ids: Optional[List[str]] = None
+    ):
+        """
+        Store a snapshot's data, optionally with its precomputed item ids.
+
+        Args:
+            key: Cache key
+            data_hash: The snapshot's data_hash
+            data: Decoded snapshot data (not copied)
+            key_fields: Key fields item_ids were generated with
+            item_ids: Unique item ids of data, in order
+        """
+        indexes = {}
+        if key_fields and item_ids is not None:
+            indexes[tuple(key_fields)] = dict(zip(item_ids, data))
+
+        with self._lock:
+            self._entries[key] = {"data_hash": data_hash, "data": data, "indexes": indexes}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def index(
+        self,
+        key: Hashable,
+        data_hash: str,
+        key_fields: List[str]
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Item ID -> item index of a cached snapshot, built on first use.
+
+        Returns:
+            The index, or None if the snapshot is not cached
+        """
+        data = self.get(key, data_hash)
+        if data is None:
+            return None
+
+        fields = tuple(key_fields)
+        with self._lock:
+            entry = self._entries.get(key)
+            index = entry["indexes"].get(fields) if entry else None
+        if index is None:
+            index = dict(zip(generate_unique_item_ids(data, key_fields), data))
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry["data"] is data:
+                    entry["indexes"][fields] = index
+        return index
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by all storage instances in the process
+SNAPSHOT_CACHE = SnapshotCache()
@@ -0,0 +1,158 @@
+"""
+Compressed binary encoding for snapshot payloads.
+
+Full snapshots are stored as a record container:
+
+    header   magic, codec id, item count, chunk size, frame count,
+             schema table length (little-endian, fixed size)
+    schemas  JSON list of key lists; every item refers to one of them
+    frames   table of compressed frame lengths, then the frames
+
+Each frame holds up to `chunk_size` items encoded as compact JSON rows
+`[schema_index, value, value, ...]`, so field names are stored once per
+snapshot instead of once per item. Frames are compressed independently,
+which lets LazyRecords decode only the frames a caller actually touches.
+"""
+import json
+import lzma
+import struct
+import zlib
+from collections.abc import Sequence
+from typing import List, Dict, Any, Iterable, Iterator
+
+MAGIC = b"SWR1"
+HEADER = struct.Struct("<4sBIIII")
+DEFAULT_CHUNK_SIZE = 256
+
+CODECS = ("zlib", "lzma")
+_CODEC_IDS = {"zlib": 1, "lzma": 2}
+_CODEC_NAMES = {v: k for k, v in _CODEC_IDS.items()}
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    """Compress bytes with the named codec."""
+    if codec == "zlib":
+        return zlib.compress(data)
+    if codec == "lzma":
+        return lzma.compress(data)
+    raise ValueError(f"Unknown snapshot codec: {codec}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    """Decompress bytes produced by compress()."""
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "lzma":
+        return lzma.decompress(data)
+    raise ValueError(f"Unknown snapshot codec: {codec}")
+
+
+def _compact_json(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def encode_records(
+    records: Iterable[Dict[str, Any]],
+    codec: str = "zlib",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> bytes:
+    """
+    Encode a list of items into a compressed record container.
+
+    Args:
+        records: Items to encode
+        codec: Compression codec ("zlib" or "lzma")
+        chunk_size: Number of items per independently compressed frame
+
+    Returns:
+        The encoded container
+    """
+    schemas: Dict[tuple, int] = {}
+    frames = []
+    rows = []
+    count = 0
+
+    for item in records:
+        keys = tuple(item.keys())
+        schema_index = schemas.setdefault(keys, len(schemas))
+        rows.append([schema_index, *item.values()])
+        count += 1
+        if len(rows) == chunk_size:
+            frames.append(compress(_compact_json(rows), codec))
+            rows = []
+    if rows:
+        frames.append(compress(_compact_json(rows), codec))
+
+    schema_bytes = _compact_json([list(keys) for keys in schemas])
+    header = HEADER.pack(
+        MAGIC, _CODEC_IDS[codec], count, chunk_size, len(frames), len(schema_bytes)
+    )
+    frame_table = struct.pack(f"<{len(frames)}I", *(len(f) for f in frames))
+    return b"".join([header, schema_bytes, frame_table, *frames])
+
+
+class LazyRecords(Sequence):
+    """
+    Read-only sequence view over an encoded record container.
+
+    Only the fixed header, schema table and frame table are parsed up
+    front; frames are decompressed on first access. len() never
+    decompresses anything.
+    """
+
+    def __init__(self, blob: bytes):
+        self._blob = memoryview(blob)
+        magic, codec_id, count, chunk_size, frame_count, schema_len = HEADER.unpack_from(self._blob)
+        if magic != MAGIC:
+            raise ValueError("Not a snapshot record container")
+
+        self.codec = _CODEC_NAMES[codec_id]
+        self._count = count
+        self._chunk_size = chunk_size
+
+        offset = HEADER.size
+        self._schemas = [tuple(keys) for keys in json.loads(bytes(self._blob[offset:offset + schema_len]))]
+        offset += schema_len
+
+        lengths = struct.unpack_from(f"<{frame_count}I", self._blob, offset)
+        offset += 4 * frame_count
+
+        self._frame_bounds = []
+        for length in lengths:
+            self._frame_bounds.append((offset, offset + length))
+            offset += length
+
+        # Most recently decoded frame: (frame index, items)
+        self._current = (-1, [])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _frame(self, frame_index: int) -> List[Dict[str, Any]]:
+        # Read the slot once: the view may be shared between threads
+        current = self._current
+        if current[0] != frame_index:
+            start, end = self._frame_bounds[frame_index]
+            rows = json.loads(decompress(self._blob[start:end], self.codec))
+            items = [dict(zip(self._schemas[row[0]], row[1:])) for row in rows]
+            current = (frame_index, items)
+            self._current = current
+        return current[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("snapshot index out of range")
+        frame_index, position = divmod(index, self._chunk_size)
+        return self._frame(frame_index)[position]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for frame_index in range(len(self._frame_bounds)):
+            yield from self._frame(frame_index)
+
+    def materialize(self) -> List[Dict[str, Any]]:
+        """Decode every item into a plain list."""
+        return [dict(item) for item in self]
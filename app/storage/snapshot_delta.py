@@ -0,0 +1,139 @@
+"""
+Item-level deltas between two snapshots.
+
+A delta records the items that were added, the ids of items that were
+removed and, for items present in both versions, only the fields whose
+values changed. When the newer snapshot lists its items in a different
+order than "base order, then added items", the delta also records that
+order. Applying a delta to the snapshot it was computed against
+reproduces the newer snapshot, order included.
+"""
+from typing import List, Dict, Any, Optional
+
+from app.detection.hashers import generate_unique_item_ids
+
+
+def index_items(
+    data: List[Dict[str, Any]],
+    key_fields: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Build an item ID -> item index.
+
+    Args:
+        data: List of data items
+        key_fields: Fields that identify an item (duplicates are
+            disambiguated by occurrence)
+
+    Returns:
+        The index
+    """
+    return dict(zip(generate_unique_item_ids(data, key_fields), data))
+
+
+def compute_delta(
+    old_data: List[Dict[str, Any]],
+    new_data: List[Dict[str, Any]],
+    key_fields: List[str],
+    old_index: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Compute the delta that turns old_data into new_data.
+
+    Args:
+        old_data: Base snapshot data
+        new_data: Newer snapshot data
+        key_fields: Fields that identify an item
+        old_index: index_items(old_data, key_fields), if already built
+
+    Returns:
+        Delta dictionary
+    """
+    if old_index is None:
+        old_index = index_items(old_data, key_fields)
+    new_index = index_items(new_data, key_fields)
+
+    added = []
+    changed = {}
+    for item_id, new_item in new_index.items():
+        old_item = old_index.get(item_id)
+        if old_item is None:
+            added.append(new_item)
+            continue
+        if old_item == new_item:
+            continue
+
+        set_fields = {
+            k: v for k, v in new_item.items()
+            if k not in old_item or old_item[k] != v
+        }
+        unset_fields = [k for k in old_item if k not in new_item]
+        changed[item_id] = {"set": set_fields, "unset": unset_fields}
+
+    removed = [item_id for item_id in old_index if item_id not in new_index]
+
+    delta = {
+        "key_fields": list(key_fields),
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+    }
+
+    # apply_delta rebuilds surviving items in base order, then the added
+    # ones; record the new order as positions in that list if it differs
+    rebuilt = [item_id for item_id in old_index if item_id in new_index]
+    rebuilt.extend(item_id for item_id in new_index if item_id not in old_index)
+    new_ids = list(new_index)
+    if new_ids != rebuilt:
+        position = {item_id: i for i, item_id in enumerate(rebuilt)}
+        delta["order"] = [position[item_id] for item_id in new_ids]
+    return delta
+
+
+def delta_size(delta: Dict[str, Any]) -> int:
+    """Number of item-level operations recorded in a delta."""
+    return len(delta["added"]) + len(delta["removed"]) + len(delta["changed"])
+
+
+def apply_delta(
+    base_data: List[Dict[str, Any]],
+    delta: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Apply a delta to the snapshot it was computed against.
+
+    Surviving items keep their base order, changed items are updated in
+    place and added items are appended at the end; the result is then
+    rearranged by the delta's "order", if it has one.
+
+    Args:
+        base_data: Base snapshot data (not modified)
+        delta: Delta produced by compute_delta
+
+    Returns:
+        The reconstructed newer snapshot data
+    """
+    key_fields = delta["key_fields"]
+    removed = set(delta["removed"])
+    changed = delta["changed"]
+
+    result = []
+    for item_id, item in index_items(base_data, key_fields).items():
+        if item_id in removed:
+            continue
+
+        change = changed.get(item_id)
+        if change is None:
+            result.append(dict(item))
+            continue
+
+        updated = {k: v for k, v in item.items() if k not in change["unset"]}
+        updated.update(change["set"])
+        result.append(updated)
+
+    result.extend(dict(item) for item in delta["added"])
+
+    order = delta.get("order")
+    if order is not None:
+        result = [result[i] for i in order]
+    return result
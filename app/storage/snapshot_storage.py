@@ -1,19 +1,49 @@
 import json
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import sqlite3
 import os
-from app.detection.hashers import hash_dataset
+from app.detection.hashers import hash_dataset, generate_hash, generate_unique_item_ids, last_positions
+from .snapshot_delta import compute_delta, apply_delta, delta_size
+from .snapshot_codec import encode_records, compress, decompress, LazyRecords
+from .snapshot_cache import SNAPSHOT_CACHE, SnapshotCache
+from app.core.metrics import metrics
 
 
 class SnapshotMixin:
     """
     Mixin class that adds snapshot functionality to existing storage classes.
-    
+
     This integrates snapshots directly into the existing databases
     (static_data.db and dynamic_data.db) instead of creating a separate file.
+
+    Snapshots are stored as a full keyframe every `keyframe_interval`
+    versions and as item-level deltas against the previous version in
+    between. Deltas need `snapshot_key_fields` to identify items; storage
+    classes that leave it unset always write full snapshots.
+
+    Payloads are compressed with `snapshot_codec` and the codec is recorded
+    per row, so rows written as plain JSON text remain readable.
+
+    The items of the latest snapshot per source are also kept in the
+    `snapshot_items` table (one row per item with a content hash), which
+    lets SQLiteDiffBackend compare a new scrape against it inside SQLite.
+
+    The `latest_snapshot` table points at each source's newest snapshot and
+    is updated in the same transaction as save_snapshot. Decoded snapshots
+    are kept in the process-wide `snapshot_cache` LRU, so the next run's
+    baseline usually comes straight from memory.
     """
 
+    # Fields that identify an item inside a snapshot (None disables deltas)
+    snapshot_key_fields: Optional[List[str]] = None
+    # A full snapshot is written at least once every N versions
+    keyframe_interval: int = 10
+    # "zlib", "lzma", or "json" for uncompressed text
+    snapshot_codec: str = "zlib"
+    # Decoded snapshots shared by all storage instances in the process
+    snapshot_cache: SnapshotCache = SNAPSHOT_CACHE
+
     def _create_snapshot_table(self):
         """Create the snapshots table in the existing database."""
         self.conn.execute("""
@@ -26,85 +56,497 @@ class SnapshotMixin:
                 created_at TEXT NOT NULL
             );
         """)
+        # Delta encoding columns (added in place for databases created earlier)
+        self._add_missing_columns("snapshots", {
+            "snapshot_type": "TEXT NOT NULL DEFAULT 'full'",
+            "base_id": "INTEGER",
+            "chain_depth": "INTEGER NOT NULL DEFAULT 0",
+            "codec": "TEXT NOT NULL DEFAULT 'json'",
+            "data_blob": "BLOB",
+        })
         # Index for faster lookups
         self.conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_snapshots_source 
+            CREATE INDEX IF NOT EXISTS idx_snapshots_source
             ON snapshots(source_name, created_at DESC);
         """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot_items (
+                snapshot_id INTEGER NOT NULL,
+                item_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (snapshot_id, item_id)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_snapshot_items_hash
+            ON snapshot_items(snapshot_id, content_hash);
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS latest_snapshot (
+                source_name TEXT PRIMARY KEY,
+                snapshot_id INTEGER NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        # Point sources saved before the pointer table existed at their newest snapshot
+        self.conn.execute("""
+            INSERT OR IGNORE INTO latest_snapshot (source_name, snapshot_id)
+            SELECT source_name, MAX(id) FROM snapshots GROUP BY source_name
+        """)
         self.conn.commit()
 
+    @metrics.timed("snapshot")
     def save_snapshot(
-        self, 
-        source_name: str, 
+        self,
+        source_name: str,
         data: List[Dict[str, Any]]
     ) -> int:
         """
         Save a snapshot of the current data.
-        
+
+        Writes a delta against the previous snapshot when possible, and a
+        full keyframe otherwise.
+
         Args:
             source_name: Identifier for the data source
             data: The data to snapshot
-            
+
         Returns:
             ID of the created snapshot
         """
         now = datetime.now(timezone.utc).isoformat()
-        data_json = json.dumps(data, sort_keys=True, default=str)
         data_hash = hash_dataset(data)
 
+        snapshot_type = "full"
+        base_id = None
+        chain_depth = 0
+        payload = data
+
+        key_fields = self.snapshot_key_fields_for(source_name)
+        previous = self._latest_snapshot_row(source_name)
+        if (
+            key_fields
+            and previous is not None
+            and previous["chain_depth"] + 1 < self.keyframe_interval
+        ):
+            base_data = self._load_snapshot(previous["id"])
+            delta = None
+            if base_data is not None:
+                base_index = self.snapshot_cache.index(
+                    self._cache_key(previous["id"]), previous["data_hash"], key_fields
+                )
+                delta = compute_delta(base_data, data, key_fields, base_index)
+            # High churn: a delta would not be smaller than a keyframe
+            if delta is not None and delta_size(delta) <= len(data) // 2:
+                snapshot_type = "delta"
+                base_id = previous["id"]
+                chain_depth = previous["chain_depth"] + 1
+                payload = delta
+
+        codec = self.snapshot_codec
+        data_json, data_blob = self._encode_payload(payload, snapshot_type, codec)
+
         cursor = self.conn.execute(
             """
-            INSERT INTO snapshots (source_name, data_hash, data_json, item_count, created_at)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO snapshots (
+                source_name, data_hash, data_json, item_count, created_at,
+                snapshot_type, base_id, chain_depth, codec, data_blob
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (source_name, data_hash, data_json, len(data), now)
+            (
+                source_name, data_hash, data_json, len(data), now,
+                snapshot_type, base_id, chain_depth, codec, data_blob
+            )
         )
-        self.conn.commit()
-        return cursor.lastrowid
+        snapshot_id = cursor.lastrowid
+        self.conn.execute(
+            """
+            INSERT INTO latest_snapshot (source_name, snapshot_id) VALUES (?, ?)
+            ON CONFLICT(source_name) DO UPDATE SET snapshot_id = excluded.snapshot_id
+            """,
+            (source_name, snapshot_id)
+        )
+        item_ids = None
+        if key_fields:
+            item_ids = self._index_snapshot_items(source_name, snapshot_id, data, key_fields)
+        self._commit()
+
+        self.snapshot_cache.put(
+            self._cache_key(snapshot_id), data_hash,
+            [dict(item) for item in data], key_fields, item_ids
+        )
+        return snapshot_id
+
+    def _index_snapshot_items(
+        self,
+        source_name: str,
+        snapshot_id: int,
+        data: List[Dict[str, Any]],
+        key_fields: List[str]
+    ) -> List[str]:
+        """
+        Replace the source's indexed items with those of a new snapshot.
+
+        snapshot_items holds one row per item id, the last occurrence of a
+        duplicated key winning, which is what SQLiteDiffBackend diffs.
+
+        Returns:
+            The occurrence-suffixed ids of every item, for delta indexes
+        """
+        self.conn.execute(
+            """
+            DELETE FROM snapshot_items WHERE snapshot_id IN (
+                SELECT id FROM snapshots WHERE source_name = ? AND id != ?
+            )
+            """,
+            (source_name, snapshot_id)
+        )
+        self.conn.executemany(
+            """
+            INSERT INTO snapshot_items (snapshot_id, item_id, content_hash, payload)
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                (
+                    snapshot_id,
+                    item_id,
+                    generate_hash(data[position]),
+                    json.dumps(data[position], separators=(",", ":"), default=str),
+                )
+                for item_id, position in last_positions(data, key_fields).items()
+            )
+        )
+        return generate_unique_item_ids(data, key_fields)
+
+    def snapshot_key_fields_for(self, source_name: str) -> Optional[List[str]]:
+        """Key fields used for a source's deltas and indexed items."""
+        return self.snapshot_key_fields
 
+    def get_snapshot_info(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve metadata of a snapshot without decoding it.
+
+        Returns:
+            Dictionary with id, source_name, data_hash, item_count,
+            created_at, snapshot_type and codec, or None if it does not exist
+        """
+        row = self.conn.execute(
+            """
+            SELECT id, source_name, data_hash, item_count, created_at, snapshot_type, codec
+            FROM snapshots WHERE id = ?
+            """,
+            (snapshot_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def has_snapshot_items(self, snapshot_id: int) -> bool:
+        """Check whether a snapshot's items are indexed in snapshot_items."""
+        row = self.conn.execute(
+            "SELECT 1 FROM snapshot_items WHERE snapshot_id = ? LIMIT 1",
+            (snapshot_id,)
+        ).fetchone()
+        return row is not None
+
+    @metrics.timed("snapshot_load")
     def get_latest_snapshot(self, source_name: str) -> Optional[List[Dict[str, Any]]]:
         """
         Retrieve the most recent snapshot for a source.
-        
+
+        A compressed keyframe is returned as a read-only LazyRecords view
+        that decodes items on access; other snapshots are returned as a list.
+
         Args:
             source_name: Identifier for the data source
-            
+
         Returns:
             The snapshot data, or None if no snapshot exists
         """
-        cursor = self.conn.execute(
+        row = self._latest_snapshot_row(source_name)
+        if row is None:
+            return None
+
+        data = self._load_snapshot(row["id"])
+        if data is None:
+            return None
+
+        if isinstance(data, LazyRecords):
+            return data
+        return [dict(item) for item in data]
+
+    def get_latest_snapshot_info(self, source_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve metadata of the most recent snapshot without decoding it.
+
+        Args:
+            source_name: Identifier for the data source
+
+        Returns:
+            Dictionary with id, data_hash, item_count, created_at,
+            snapshot_type and codec, or None if no snapshot exists
+        """
+        row = self.conn.execute(
             """
-            SELECT data_json FROM snapshots 
-            WHERE source_name = ? 
-            ORDER BY created_at DESC 
-            LIMIT 1
+            SELECT s.id, s.data_hash, s.item_count, s.created_at, s.snapshot_type, s.codec
+            FROM latest_snapshot p
+            JOIN snapshots s ON s.id = p.snapshot_id
+            WHERE p.source_name = ?
             """,
             (source_name,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_snapshot(self, snapshot_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Reconstruct the data of any stored snapshot version.
+
+        Walks back through the delta chain to the nearest keyframe (or to
+        a cached version) and replays the deltas forward.
+
+        Args:
+            snapshot_id: ID of the snapshot to reconstruct
+
+        Returns:
+            The snapshot data, or None if the snapshot (or a snapshot it
+            depends on) does not exist
+        """
+        data = self._load_snapshot(snapshot_id)
+        if data is None:
+            return None
+        return [dict(item) for item in data]
+
+    def _cache_key(self, snapshot_id: int):
+        return SnapshotCache.key(self.db_path, snapshot_id)
+
+    def _load_snapshot(self, snapshot_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Materialize a snapshot; the result may be shared with the cache."""
+        deltas = []
+        data_hash = None
+        current = snapshot_id
+        while True:
+            meta = self.conn.execute(
+                "SELECT data_hash FROM snapshots WHERE id = ?",
+                (current,)
+            ).fetchone()
+            if meta is None:
+                return None
+            if data_hash is None:
+                data_hash = meta["data_hash"]
+
+            # The hash check guards against ids reused after a rollback
+            data = self.snapshot_cache.get(self._cache_key(current), meta["data_hash"])
+            if data is not None:
+                if current == snapshot_id:
+                    return data
+                break
+
+            row = self.conn.execute(
+                """
+                SELECT snapshot_type, base_id, data_json, codec, data_blob
+                FROM snapshots WHERE id = ?
+                """,
+                (current,)
+            ).fetchone()
+
+            if row["snapshot_type"] != "delta":
+                data = self._decode_payload(row)
+                break
+
+            deltas.append(self._decode_payload(row))
+            current = row["base_id"]
+
+        for delta in reversed(deltas):
+            data = apply_delta(data, delta)
+        self.snapshot_cache.put(self._cache_key(snapshot_id), data_hash, data)
+        return data
+
+    def _encode_payload(self, payload, snapshot_type: str, codec: str) -> Tuple[str, Optional[bytes]]:
+        """Encode a payload into (data_json, data_blob) column values."""
+        if codec == "json":
+            return json.dumps(payload, sort_keys=True, default=str), None
+        if snapshot_type == "delta":
+            return "", compress(json.dumps(payload, default=str).encode(), codec)
+        return "", encode_records(payload, codec)
+
+    def _decode_payload(self, row: sqlite3.Row):
+        """Decode a stored payload according to its codec."""
+        if row["codec"] == "json":
+            return json.loads(row["data_json"])
+        if row["snapshot_type"] == "delta":
+            return json.loads(decompress(row["data_blob"], row["codec"]))
+        return LazyRecords(row["data_blob"])
+
+    def _latest_snapshot_row(self, source_name: str) -> Optional[sqlite3.Row]:
+        """Fetch id and chain position of the most recent snapshot."""
+        return self.conn.execute(
+            """
+            SELECT s.id, s.chain_depth, s.data_hash
+            FROM latest_snapshot p
+            JOIN snapshots s ON s.id = p.snapshot_id
+            WHERE p.source_name = ?
+            """,
+            (source_name,)
+        ).fetchone()
+
+    def _repoint_latest_snapshot(self, source_name: str):
+        """Point latest_snapshot back at the newest remaining snapshot."""
+        self.conn.execute(
+            """
+            DELETE FROM latest_snapshot WHERE source_name = ?
+            AND NOT EXISTS (SELECT 1 FROM snapshots WHERE source_name = ?)
+            """,
+            (source_name, source_name)
+        )
+        self.conn.execute(
+            """
+            UPDATE latest_snapshot
+            SET snapshot_id = (SELECT MAX(id) FROM snapshots WHERE source_name = ?)
+            WHERE source_name = ?
+            AND snapshot_id NOT IN (SELECT id FROM snapshots WHERE source_name = ?)
+            """,
+            (source_name, source_name, source_name)
         )
-        row = cursor.fetchone()
-        if row:
-            return json.loads(row[0])
-        return None
 
     def cleanup_old_snapshots(self, source_name: str, keep_count: int = 10):
         """
         Remove old snapshots, keeping only the most recent ones.
-        
+
+        Snapshots older than the kept window are retained if a kept delta
+        still depends on them, so every kept version stays reconstructable.
+
         Args:
             source_name: Identifier for the data source
             keep_count: Number of recent snapshots to keep
         """
+        oldest_kept = self.conn.execute(
+            """
+            SELECT id FROM snapshots
+            WHERE source_name = ?
+            ORDER BY created_at DESC
+            LIMIT 1 OFFSET ?
+            """,
+            (source_name, keep_count - 1)
+        ).fetchone()
+        if oldest_kept is None:
+            return
+
+        # Oldest keyframe the kept window depends on
+        keyframe = self.conn.execute(
+            """
+            SELECT MAX(id) FROM snapshots
+            WHERE source_name = ? AND snapshot_type = 'full' AND id <= ?
+            """,
+            (source_name, oldest_kept["id"])
+        ).fetchone()[0]
+        if keyframe is None:
+            return
+
         self.conn.execute(
             """
-            DELETE FROM snapshots 
-            WHERE source_name = ? 
-            AND id NOT IN (
-                SELECT id FROM snapshots 
-                WHERE source_name = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
+            DELETE FROM snapshot_items WHERE snapshot_id IN (
+                SELECT id FROM snapshots WHERE source_name = ? AND id < ?
             )
             """,
-            (source_name, source_name, keep_count)
+            (source_name, keyframe)
         )
-        self.conn.commit()
+        self.conn.execute(
+            "DELETE FROM snapshots WHERE source_name = ? AND id < ?",
+            (source_name, keyframe)
+        )
+        self._commit()
+
+    def get_snapshot_sources(self) -> List[str]:
+        """Names of all sources that have snapshots."""
+        cursor = self.conn.execute("SELECT DISTINCT source_name FROM snapshots")
+        return [row[0] for row in cursor]
+
+    def list_snapshots(self, source_name: str) -> List[Dict[str, Any]]:
+        """
+        List snapshot metadata for a source, oldest first.
+
+        Args:
+            source_name: Identifier for the data source
+
+        Returns:
+            List of dicts with id, created_at, snapshot_type and base_id
+        """
+        cursor = self.conn.execute(
+            """
+            SELECT id, created_at, snapshot_type, base_id FROM snapshots
+            WHERE source_name = ?
+            ORDER BY created_at, id
+            """,
+            (source_name,)
+        )
+        return [dict(row) for row in cursor]
+
+    def delete_snapshots(
+        self,
+        source_name: str,
+        snapshot_ids: List[int],
+        batch_size: int = 500
+    ) -> int:
+        """
+        Delete arbitrary snapshots of a source in small batches.
+
+        Kept deltas whose base is being deleted are first rewritten as
+        keyframes, so every remaining version stays reconstructable. Each
+        batch is committed separately to keep write locks short.
+
+        Args:
+            source_name: Identifier for the data source
+            snapshot_ids: IDs of the snapshots to delete
+            batch_size: Number of snapshots deleted per transaction
+
+        Returns:
+            Number of snapshots deleted
+        """
+        doomed = set(snapshot_ids)
+        if not doomed:
+            return 0
+
+        orphaned = [
+            row["id"] for row in self.list_snapshots(source_name)
+            if row["snapshot_type"] == "delta"
+            and row["id"] not in doomed
+            and row["base_id"] in doomed
+        ]
+        for snapshot_id in orphaned:
+            self._rewrite_as_keyframe(snapshot_id)
+
+        ordered = sorted(doomed)
+        for start in range(0, len(ordered), batch_size):
+            batch = ordered[start:start + batch_size]
+            placeholders = ",".join("?" * len(batch))
+            self.conn.execute(
+                f"DELETE FROM snapshot_items WHERE snapshot_id IN ({placeholders})",
+                batch
+            )
+            self.conn.execute(
+                f"DELETE FROM snapshots WHERE source_name = ? AND id IN ({placeholders})",
+                [source_name, *batch]
+            )
+            self._repoint_latest_snapshot(source_name)
+            self._commit()
+
+        return len(ordered)
+
+    def _rewrite_as_keyframe(self, snapshot_id: int):
+        """Replace a stored delta with the full data it represents."""
+        data = self._load_snapshot(snapshot_id)
+        if data is None:
+            return
+
+        data_json, data_blob = self._encode_payload(
+            list(data), "full", self.snapshot_codec
+        )
+        self.conn.execute(
+            """
+            UPDATE snapshots
+            SET snapshot_type = 'full', base_id = NULL, chain_depth = 0,
+                codec = ?, data_json = ?, data_blob = ?
+            WHERE id = ?
+            """,
+            (self.snapshot_codec, data_json, data_blob, snapshot_id)
+        )
+        self._commit()
@@ -0,0 +1,389 @@
+"""
+Multi-source storage.
+
+StaticStorage and DynamicStorage each own a database file and a table
+shaped for one engine. SourceStore instead keys every row by source id, so
+any number of sources share one database file:
+
+    source_items         current items, one row per (source_id, item_id)
+    source_item_history  append-only change history, written by triggers
+    snapshots            the usual SnapshotMixin tables
+
+StoragePool opens that file once for writing, through a single
+StorageWriter thread, plus a small pool of read connections that WAL lets
+run alongside the writer. pool.source(...) hands out a per-source facade
+with the same API the monitors already use.
+
+Example:
+    pool = StoragePool("data/sources.db", readers=4)
+    monitor = JobMonitor(url, storage=pool.source("static_jobs", ["title"]))
+"""
+import json
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from .base_storage import BaseStorage
+from .snapshot_storage import SnapshotMixin
+from .outbox_storage import OutboxMixin
+from .run_metrics_storage import RunMetricsMixin
+from .writer import Standalone, StorageWriter, WriteBehindStorage
+from app.detection.hashers import generate_hash, generate_item_id
+from app.core.metrics import metrics
+
+DEFAULT_DB_PATH = "data/sources.db"
+
+
+class SourceStore(BaseStorage, SnapshotMixin, OutboxMixin, RunMetricsMixin):
+    """Storage for many sources in one database file, keyed by source id."""
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        key_fields: Optional[Dict[str, List[str]]] = None,
+        check_same_thread: bool = True
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: Path to the shared database file
+            key_fields: Source id -> item key fields registry; may be shared
+                between stores and filled in later
+            check_same_thread: Passed through to sqlite3.connect
+        """
+        super().__init__(db_path, check_same_thread)
+        self.source_key_fields = key_fields if key_fields is not None else {}
+        self._create_tables()
+        self._create_snapshot_table()
+        self._create_outbox_table()
+        self._create_run_metrics_table()
+
+    def _create_tables(self):
+        with self.transaction():
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS source_items (
+                    source_id TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    last_changed TEXT NOT NULL,
+                    PRIMARY KEY (source_id, item_id)
+                ) WITHOUT ROWID;
+            """)
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS source_item_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_id TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    change_type TEXT NOT NULL,
+                    field TEXT,
+                    old_value TEXT,
+                    new_value TEXT,
+                    changed_at TEXT NOT NULL
+                );
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_source_item_history_item
+                ON source_item_history(source_id, item_id, changed_at);
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_source_items_added
+                AFTER INSERT ON source_items
+                BEGIN
+                    INSERT INTO source_item_history (source_id, item_id, change_type, new_value, changed_at)
+                    VALUES (NEW.source_id, NEW.item_id, 'added', NEW.payload, NEW.first_seen);
+                END;
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_source_items_changed
+                AFTER UPDATE OF content_hash ON source_items
+                WHEN OLD.content_hash IS NOT NEW.content_hash
+                BEGIN
+                    INSERT INTO source_item_history (source_id, item_id, change_type, old_value, new_value, changed_at)
+                    VALUES (NEW.source_id, NEW.item_id, 'changed', OLD.payload, NEW.payload, NEW.last_changed);
+                END;
+            """)
+            # An item seen again after its last recorded event was a removal
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_source_items_readded
+                AFTER UPDATE OF last_seen ON source_items
+                WHEN (SELECT change_type FROM source_item_history
+                      WHERE source_id = NEW.source_id AND item_id = NEW.item_id
+                      ORDER BY id DESC LIMIT 1) = 'removed'
+                BEGIN
+                    INSERT INTO source_item_history (source_id, item_id, change_type, new_value, changed_at)
+                    VALUES (NEW.source_id, NEW.item_id, 'added', NEW.payload, NEW.last_seen);
+                END;
+            """)
+
+    def snapshot_key_fields_for(self, source_name: str) -> Optional[List[str]]:
+        """Key fields registered for a source, if any."""
+        return self.source_key_fields.get(source_name)
+
+    @metrics.timed("insert")
+    def upsert_items(self, source_id: str, items: List[Dict[str, Any]], key_fields: List[str]):
+        """
+        Upsert a source's scraped items, keeping first_seen and refreshing last_seen.
+
+        last_changed only moves when the item's content differs; the change
+        itself is recorded in source_item_history, as are items that were
+        seen by the source's previous run but are missing from this one.
+
+        Args:
+            source_id: Source the items belong to
+            items: Scraped items
+            key_fields: Fields that identify an item within the source
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        previous_run = self.conn.execute(
+            "SELECT MAX(last_seen) FROM source_items WHERE source_id = ?", (source_id,)
+        ).fetchone()[0]
+        query = """
+            INSERT INTO source_items
+                (source_id, item_id, payload, content_hash, first_seen, last_seen, last_changed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source_id, item_id) DO UPDATE SET
+                payload = excluded.payload,
+                content_hash = excluded.content_hash,
+                last_seen = excluded.last_seen,
+                last_changed = CASE
+                    WHEN source_items.content_hash IS NOT excluded.content_hash THEN excluded.last_seen
+                    ELSE source_items.last_changed
+                END
+        """
+        # One row per natural key; the last occurrence wins, as in ChangeDetector
+        rows = {}
+        for item in items:
+            item_id = generate_item_id(item, key_fields)
+            rows[item_id] = (
+                source_id, item_id, json.dumps(item, default=str),
+                generate_hash(item), now, now, now
+            )
+        self.conn.executemany(query, rows.values())
+
+        # Items of the previous run that this run did not refresh
+        if rows and previous_run is not None and previous_run < now:
+            self.conn.execute("""
+                INSERT INTO source_item_history (source_id, item_id, change_type, old_value, changed_at)
+                SELECT source_id, item_id, 'removed', payload, ?1
+                FROM source_items WHERE source_id = ?2 AND last_seen = ?3
+            """, (now, source_id, previous_run))
+        self._commit()
+
+    def get_items(self, source_id: str) -> List[Dict[str, Any]]:
+        """Retrieve a source's current items in first-seen order."""
+        cursor = self.conn.execute(
+            """
+            SELECT payload FROM source_items
+            WHERE source_id = ?
+            ORDER BY first_seen, item_id
+            """,
+            (source_id,)
+        )
+        return [json.loads(row[0]) for row in cursor.fetchall()]
+
+    def get_item_sources(self) -> List[str]:
+        """List the source ids that have stored items."""
+        cursor = self.conn.execute("SELECT DISTINCT source_id FROM source_items")
+        return [row[0] for row in cursor.fetchall()]
+
+
+class StoragePool:
+    """
+    One serialized writer and a pool of read connections for a SourceStore.
+
+    All writes from every source go through the same StorageWriter thread,
+    so there is never more than one writer on the file and no `database is
+    locked` errors. Reads check a connection out of the pool and run on the
+    caller's thread, concurrently with the writer.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, readers: int = 4, **writer_kwargs):
+        """
+        Open the writer and the read connections.
+
+        Args:
+            db_path: Path to the shared database file
+            readers: Number of read connections
+            **writer_kwargs: Passed to StorageWriter (max_queue, batch_size)
+        """
+        self.db_path = db_path
+        self.key_fields: Dict[str, List[str]] = {}
+        # The writer creates the schema, so it is opened before the readers
+        self.writer = StorageWriter(
+            lambda: SourceStore(db_path, self.key_fields), **writer_kwargs
+        )
+
+        self._readers: "queue.Queue" = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(SourceStore(db_path, self.key_fields, check_same_thread=False))
+
+        self._sources: Dict[str, "SourceStorage"] = {}
+        self._lock = threading.Lock()
+
+    def source(self, source_id: str, key_fields: List[str]) -> "SourceStorage":
+        """
+        Get the storage facade for a source, creating it on first use.
+
+        Args:
+            source_id: Source id; also used as the snapshot source name
+            key_fields: Fields that identify an item within the source
+
+        Returns:
+            The source's SourceStorage
+        """
+        with self._lock:
+            self.key_fields[source_id] = list(key_fields)
+            if source_id not in self._sources:
+                self._sources[source_id] = SourceStorage(self, source_id, key_fields)
+            return self._sources[source_id]
+
+    @contextmanager
+    def reader(self):
+        """Check a read-only SourceStore out of the pool for this block."""
+        store = self._readers.get()
+        try:
+            yield store
+        finally:
+            if store.conn.in_transaction:
+                store.conn.rollback()
+            self._readers.put(store)
+
+    def read(self, method, *args, **kwargs) -> Any:
+        """
+        Run a read on a pooled connection.
+
+        Args:
+            method: Name of a SourceStore method, or a callable taking the
+                store as its first argument
+            *args, **kwargs: Arguments for the method
+
+        Returns:
+            The method's return value
+        """
+        with self.reader() as store:
+            if callable(method):
+                return method(store, *args, **kwargs)
+            return getattr(store, method)(*args, **kwargs)
+
+    def incremental_vacuum(self, max_pages: int = 256) -> int:
+        """
+        Return free pages of the shared file to the file system.
+
+        Per-source retention (RetentionEngine through a SourceStorage) only
+        deletes rows; call this once after all sources have run it.
+
+        Returns:
+            Number of pages released
+        """
+        return self.writer.call("incremental_vacuum", max_pages)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until all queued writes are committed."""
+        self.writer.flush(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush pending writes, stop the writer and close the readers."""
+        self.writer.close(timeout)
+        while True:
+            try:
+                self._readers.get_nowait().conn.close()
+            except queue.Empty:
+                break
+
+
+class _SourceScope:
+    """The shared store as seen by one source's execute() callbacks."""
+
+    def __init__(self, store: SourceStore, source_id: str):
+        self._store = store
+        self._source_id = source_id
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    def get_snapshot_sources(self) -> List[str]:
+        """Only this source's snapshots are visible."""
+        return [s for s in self._store.get_snapshot_sources() if s == self._source_id]
+
+    def prune_notifications(self, older_than: datetime) -> int:
+        """Prune only this source's delivered notifications."""
+        return self._store.prune_notifications(older_than, self._source_id)
+
+    def incremental_vacuum(self, max_pages: int = 256) -> int:
+        """No-op: the file is shared, see StoragePool.incremental_vacuum."""
+        return 0
+
+
+class SourceStorage(WriteBehindStorage):
+    """
+    Per-source view of a StoragePool.
+
+    Offers the storage API the monitors use (snapshots, insert_jobs,
+    get_all_jobs, transaction, ...). Writes are queued on the pool's writer
+    and return Futures; reads run on a pooled connection once this source's
+    own queued writes have committed.
+    """
+
+    def __init__(self, pool: StoragePool, source_id: str, key_fields: List[str]):
+        super().__init__(writer=pool.writer)
+        self.pool = pool
+        self.source_id = source_id
+        self.snapshot_key_fields = list(key_fields)
+        self._last_write: Optional[Future] = None
+
+    def _write(self, method, *args, **kwargs) -> Future:
+        future = super()._write(method, *args, **kwargs)
+        if getattr(self._local, "pending", None) is None:
+            self._last_write = future
+        return future
+
+    def _read(self, method, *args, **kwargs) -> Any:
+        # Read-your-writes: wait for this source's queued writes first
+        last_write = self._last_write
+        if last_write is not None:
+            try:
+                last_write.result()
+            except Exception:
+                pass  # Reported to whoever holds the write's future
+        return self.pool.read(method, *args, **kwargs)
+
+    def insert_jobs(self, jobs: List[Dict[str, Any]], source_name: Optional[str] = None) -> Future:
+        """Upsert this source's scraped items (source_name is implied by the facade)."""
+        return self._write("upsert_items", self.source_id, jobs, self.snapshot_key_fields)
+
+    def get_all_jobs(self) -> List[Dict[str, Any]]:
+        """Retrieve this source's current items."""
+        return self._read("get_items", self.source_id)
+
+    def get_snapshot_sources(self) -> List[str]:
+        """Only this source's snapshots are visible through the facade."""
+        return [self.source_id] if self._read("get_latest_snapshot_info", self.source_id) else []
+
+    def execute(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(store, ...) on the pool's writer thread, outside any transaction.
+
+        fn gets the shared store scoped to this source, so per-source
+        maintenance (e.g. RetentionEngine.run) leaves other sources alone:
+        it sees only this source's snapshots and outbox rows, and its
+        incremental_vacuum is a no-op (see StoragePool.incremental_vacuum).
+        """
+        source_id = self.source_id
+
+        def scoped(store, *args, **kwargs):
+            return fn(_SourceScope(store, source_id), *args, **kwargs)
+
+        return self.writer.call(Standalone(scoped), *args, **kwargs)
+
+    def close(self, timeout: Optional[float] = None):
+        """Wait for this source's writes; the pool owns the writer."""
+        if self._last_write is not None:
+            self._last_write.result(timeout)
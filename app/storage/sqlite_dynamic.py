@@ -1,32 +1,218 @@
 from .base_storage import BaseStorage
 from .snapshot_storage import SnapshotMixin
+from .outbox_storage import OutboxMixin
+from .run_metrics_storage import RunMetricsMixin
 from datetime import datetime, timezone
+from app.detection.hashers import generate_item_id
+from app.processors.cleaner import parse_price
+from app.core.metrics import metrics
+
+class DynamicStorage(BaseStorage, SnapshotMixin, OutboxMixin, RunMetricsMixin):
+    # Same identity the monitor's ChangeDetector uses for items
+    snapshot_key_fields = ["title"]
+    # Natural key of a row in dynamic_jobs within its source
+    job_key_fields = ["title"]
+    # Source of rows written without one (DynamicJobMonitor's default source_name)
+    default_source_name = "dynamic_jobs"
+    # Tables read by HistoryQuery
+    jobs_table = "dynamic_jobs"
+    history_table = "dynamic_job_history"
+    price_rollup_table = "dynamic_price_daily"
 
-class DynamicStorage(BaseStorage, SnapshotMixin):
     def __init__(self):
         super().__init__("data/dynamic_data.db")
         self._create_tables()
         self._create_snapshot_table()  # Add snapshot support
+        self._create_outbox_table()
+        self._create_run_metrics_table()
 
     def _create_tables(self):
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS dynamic_jobs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                price TEXT NOT NULL,
-                scraped_at TEXT NOT NULL
-            );
+        with self.transaction():
+            # Databases created before upserts kept one row per item per run
+            if "scraped_at" in self._table_columns("dynamic_jobs"):
+                self.conn.execute("ALTER TABLE dynamic_jobs RENAME TO dynamic_jobs_legacy")
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS dynamic_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_name TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    price TEXT NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    last_changed TEXT NOT NULL
+                );
+            """)
+            self.conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_dynamic_jobs_item
+                ON dynamic_jobs(source_name, item_id);
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_dynamic_jobs_first_seen
+                ON dynamic_jobs(first_seen);
+            """)
+
+            # Append-only change history, written by triggers
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS dynamic_job_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_name TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    change_type TEXT NOT NULL,
+                    field TEXT,
+                    old_value TEXT,
+                    new_value TEXT,
+                    changed_at TEXT NOT NULL
+                );
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_dynamic_job_history_item
+                ON dynamic_job_history(item_id, changed_at);
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_dynamic_jobs_added
+                AFTER INSERT ON dynamic_jobs
+                BEGIN
+                    INSERT INTO dynamic_job_history (source_name, item_id, change_type, field, new_value, changed_at)
+                    VALUES (NEW.source_name, NEW.item_id, 'added', 'price', NEW.price, NEW.first_seen);
+                END;
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_dynamic_jobs_price_changed
+                AFTER UPDATE OF price ON dynamic_jobs
+                WHEN OLD.price IS NOT NEW.price
+                BEGIN
+                    INSERT INTO dynamic_job_history (source_name, item_id, change_type, field, old_value, new_value, changed_at)
+                    VALUES (NEW.source_name, NEW.item_id, 'changed', 'price', OLD.price, NEW.price, NEW.last_changed);
+                END;
+            """)
+            # An item seen again after its last recorded event was a removal
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_dynamic_jobs_readded
+                AFTER UPDATE OF last_seen ON dynamic_jobs
+                WHEN (SELECT change_type FROM dynamic_job_history
+                      WHERE item_id = NEW.item_id AND source_name = NEW.source_name
+                      ORDER BY id DESC LIMIT 1) = 'removed'
+                BEGIN
+                    INSERT INTO dynamic_job_history (source_name, item_id, change_type, field, new_value, changed_at)
+                    VALUES (NEW.source_name, NEW.item_id, 'added', 'price', NEW.price, NEW.last_seen);
+                END;
+            """)
+
+            if self._table_columns("dynamic_jobs_legacy"):
+                self.conn.execute("""
+                    INSERT INTO dynamic_jobs (source_name, item_id, title, price, first_seen, last_seen, last_changed)
+                    SELECT ?, l.title, l.title,
+                           (SELECT p.price FROM dynamic_jobs_legacy p
+                            WHERE p.title = l.title ORDER BY p.id DESC LIMIT 1),
+                           MIN(l.scraped_at), MAX(l.scraped_at), MIN(l.scraped_at)
+                    FROM dynamic_jobs_legacy l
+                    GROUP BY l.title
+                    ORDER BY MIN(l.id)
+                """, (self.default_source_name,))
+                self.conn.execute("DROP TABLE dynamic_jobs_legacy")
+
+            # Daily price rollup, maintained by insert_jobs (per item id, across sources)
+            rollup_exists = bool(self._table_columns("dynamic_price_daily"))
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS dynamic_price_daily (
+                    item_id TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    open_price REAL NOT NULL,
+                    high_price REAL NOT NULL,
+                    low_price REAL NOT NULL,
+                    close_price REAL NOT NULL,
+                    observations INTEGER NOT NULL,
+                    PRIMARY KEY (item_id, day)
+                ) WITHOUT ROWID;
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_dynamic_price_daily_day
+                ON dynamic_price_daily(day);
+            """)
+            if not rollup_exists:
+                self._backfill_price_rollup()
+
+    def _backfill_price_rollup(self):
+        """Seed dynamic_price_daily from the recorded price history."""
+        cursor = self.conn.execute("""
+            SELECT item_id, new_value, changed_at FROM dynamic_job_history
+            WHERE field = 'price'
+            ORDER BY item_id, changed_at, id
         """)
-        self.conn.commit()
+        for item_id, price, changed_at in cursor.fetchall():
+            price = parse_price(price)
+            if price is not None:
+                self.conn.execute(self.PRICE_ROLLUP_UPSERT, (item_id, changed_at[:10], price))
 
-    def insert_jobs(self, jobs):
+    # One observation of an item's price on a (UTC) day
+    PRICE_ROLLUP_UPSERT = """
+        INSERT INTO dynamic_price_daily
+            (item_id, day, open_price, high_price, low_price, close_price, observations)
+        VALUES (?1, ?2, ?3, ?3, ?3, ?3, 1)
+        ON CONFLICT(item_id, day) DO UPDATE SET
+            high_price = MAX(high_price, excluded.close_price),
+            low_price = MIN(low_price, excluded.close_price),
+            close_price = excluded.close_price,
+            observations = observations + 1
+    """
+
+    @metrics.timed("insert")
+    def insert_jobs(self, jobs, source_name: str = None):
+        """
+        Upsert one source's scraped items, keeping first_seen and refreshing last_seen.
+
+        last_changed only moves when the price differs; the change itself
+        is recorded in dynamic_job_history, as are items of the source that
+        its previous run saw but this one did not ('removed', not for an
+        empty scrape). Each parsable price is also folded into that day's
+        dynamic_price_daily row.
+
+        Args:
+            jobs: Scraped items
+            source_name: Source the items belong to (default: the dynamic monitor's)
+        """
+        source_name = source_name or self.default_source_name
         now = datetime.now(timezone.utc).isoformat()
-        query = "INSERT INTO dynamic_jobs (title, price, scraped_at) VALUES (?, ?, ?)"
-        rows = [(j["title"], j["price"], now) for j in jobs]
-        self.conn.executemany(query, rows)
-        self.conn.commit()
+        previous_run = self.conn.execute(
+            "SELECT MAX(last_seen) FROM dynamic_jobs WHERE source_name = ?", (source_name,)
+        ).fetchone()[0]
+        query = """
+            INSERT INTO dynamic_jobs (source_name, item_id, title, price, first_seen, last_seen, last_changed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source_name, item_id) DO UPDATE SET
+                price = excluded.price,
+                last_seen = excluded.last_seen,
+                last_changed = CASE
+                    WHEN dynamic_jobs.price IS NOT excluded.price THEN excluded.last_seen
+                    ELSE dynamic_jobs.last_changed
+                END
+        """
+        # One row per natural key; the last occurrence wins, as in ChangeDetector
+        rows = {}
+        for j in jobs:
+            item_id = generate_item_id(j, self.job_key_fields)
+            rows[item_id] = (source_name, item_id, j["title"], j["price"], now, now, now)
+        self.conn.executemany(query, rows.values())
+
+        # Items of the source's previous run that this run did not refresh
+        if rows and previous_run is not None and previous_run < now:
+            self.conn.execute("""
+                INSERT INTO dynamic_job_history (source_name, item_id, change_type, field, old_value, changed_at)
+                SELECT source_name, item_id, 'removed', 'price', price, ?1
+                FROM dynamic_jobs WHERE source_name = ?2 AND last_seen = ?3
+            """, (now, source_name, previous_run))
+
+        day = now[:10]
+        self.conn.executemany(self.PRICE_ROLLUP_UPSERT, (
+            (item_id, day, price)
+            for item_id, price in ((row[1], parse_price(row[3])) for row in rows.values())
+            if price is not None
+        ))
+        self._commit()
 
     def get_all_jobs(self):
         """Retrieve all jobs for change detection comparison."""
-        cursor = self.conn.execute("SELECT title, price FROM dynamic_jobs")
-        return [{"title": row[0], "price": row[1]} for row in cursor.fetchall()]
\ No newline at end of file
+        cursor = self.conn.execute("SELECT title, price FROM dynamic_jobs ORDER BY id")
+        return [{"title": row[0], "price": row[1]} for row in cursor.fetchall()]
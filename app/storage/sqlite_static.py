@@ -1,32 +1,165 @@
 from .base_storage import BaseStorage
 from .snapshot_storage import SnapshotMixin
+from .outbox_storage import OutboxMixin
+from .run_metrics_storage import RunMetricsMixin
 from datetime import datetime, timezone
+from app.detection.hashers import generate_item_id
+from app.core.metrics import metrics
+
+class StaticStorage(BaseStorage, SnapshotMixin, OutboxMixin, RunMetricsMixin):
+    # Same identity the monitor's ChangeDetector uses for items
+    snapshot_key_fields = ["title"]
+    # Natural key of a row in job_snapshots within its source (the
+    # detector's key, so a new company is a change of the job rather
+    # than another job)
+    job_key_fields = ["title"]
+    # Source of rows written without one (JobMonitor's default source_name)
+    default_source_name = "static_jobs"
+    # Tables read by HistoryQuery
+    jobs_table = "job_snapshots"
+    history_table = "job_history"
+    price_rollup_table = None
 
-class StaticStorage(BaseStorage, SnapshotMixin):
     def __init__(self):
         super().__init__("data/static_data.db")
         self._create_tables()
         self._create_snapshot_table()  # Add snapshot support
+        self._create_outbox_table()
+        self._create_run_metrics_table()
 
     def _create_tables(self):
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS job_snapshots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                company TEXT NOT NULL,
-                scraped_at TEXT NOT NULL
-            );
-        """)
-        self.conn.commit()
-
-    def insert_jobs(self, jobs):
+        with self.transaction():
+            # Databases created before upserts kept one row per job per run
+            if "scraped_at" in self._table_columns("job_snapshots"):
+                self.conn.execute("ALTER TABLE job_snapshots RENAME TO job_snapshots_legacy")
+
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_name TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    last_seen TEXT NOT NULL,
+                    last_changed TEXT NOT NULL
+                );
+            """)
+            self.conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_job_snapshots_item
+                ON job_snapshots(source_name, item_id);
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_job_snapshots_first_seen
+                ON job_snapshots(first_seen);
+            """)
+
+            # Append-only change history, written by triggers
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_name TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    change_type TEXT NOT NULL,
+                    field TEXT,
+                    old_value TEXT,
+                    new_value TEXT,
+                    changed_at TEXT NOT NULL
+                );
+            """)
+            self.conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_job_history_item
+                ON job_history(item_id, changed_at);
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_job_snapshots_added
+                AFTER INSERT ON job_snapshots
+                BEGIN
+                    INSERT INTO job_history (source_name, item_id, change_type, changed_at)
+                    VALUES (NEW.source_name, NEW.item_id, 'added', NEW.first_seen);
+                END;
+            """)
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_job_snapshots_company_changed
+                AFTER UPDATE OF company ON job_snapshots
+                WHEN OLD.company IS NOT NEW.company
+                BEGIN
+                    INSERT INTO job_history (source_name, item_id, change_type, field, old_value, new_value, changed_at)
+                    VALUES (NEW.source_name, NEW.item_id, 'changed', 'company', OLD.company, NEW.company, NEW.last_changed);
+                END;
+            """)
+            # A job seen again after its last recorded event was a removal
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_job_snapshots_readded
+                AFTER UPDATE OF last_seen ON job_snapshots
+                WHEN (SELECT change_type FROM job_history
+                      WHERE item_id = NEW.item_id AND source_name = NEW.source_name
+                      ORDER BY id DESC LIMIT 1) = 'removed'
+                BEGIN
+                    INSERT INTO job_history (source_name, item_id, change_type, changed_at)
+                    VALUES (NEW.source_name, NEW.item_id, 'added', NEW.last_seen);
+                END;
+            """)
+
+            if self._table_columns("job_snapshots_legacy"):
+                self.conn.execute("""
+                    INSERT INTO job_snapshots (source_name, item_id, title, company, first_seen, last_seen, last_changed)
+                    SELECT ?, l.title, l.title,
+                           (SELECT c.company FROM job_snapshots_legacy c
+                            WHERE c.title = l.title ORDER BY c.id DESC LIMIT 1),
+                           MIN(l.scraped_at), MAX(l.scraped_at), MIN(l.scraped_at)
+                    FROM job_snapshots_legacy l
+                    GROUP BY l.title
+                    ORDER BY MIN(l.id)
+                """, (self.default_source_name,))
+                self.conn.execute("DROP TABLE job_snapshots_legacy")
+
+    @metrics.timed("insert")
+    def insert_jobs(self, jobs, source_name: str = None):
+        """
+        Upsert one source's scraped jobs, keeping first_seen and refreshing last_seen.
+
+        last_changed only moves when the company differs. Jobs of the
+        source that its previous run saw but this one did not are recorded
+        as 'removed' in job_history (not for an empty scrape).
+
+        Args:
+            jobs: Scraped jobs
+            source_name: Source the jobs belong to (default: the static monitor's)
+        """
+        source_name = source_name or self.default_source_name
         now = datetime.now(timezone.utc).isoformat()
-        query = "INSERT INTO job_snapshots (title, company, scraped_at) VALUES (?, ?, ?)"
-        rows = [(j["title"], j["company"], now) for j in jobs]
-        self.conn.executemany(query, rows)
-        self.conn.commit()
+        previous_run = self.conn.execute(
+            "SELECT MAX(last_seen) FROM job_snapshots WHERE source_name = ?", (source_name,)
+        ).fetchone()[0]
+        query = """
+            INSERT INTO job_snapshots (source_name, item_id, title, company, first_seen, last_seen, last_changed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source_name, item_id) DO UPDATE SET
+                company = excluded.company,
+                last_seen = excluded.last_seen,
+                last_changed = CASE
+                    WHEN job_snapshots.company IS NOT excluded.company THEN excluded.last_seen
+                    ELSE job_snapshots.last_changed
+                END
+        """
+        # One row per natural key; the last occurrence wins, as in ChangeDetector
+        rows = {}
+        for j in jobs:
+            item_id = generate_item_id(j, self.job_key_fields)
+            rows[item_id] = (source_name, item_id, j["title"], j["company"], now, now, now)
+        self.conn.executemany(query, rows.values())
+
+        # Jobs of the source's previous run that this run did not refresh
+        if rows and previous_run is not None and previous_run < now:
+            self.conn.execute("""
+                INSERT INTO job_history (source_name, item_id, change_type, field, old_value, changed_at)
+                SELECT source_name, item_id, 'removed', 'company', company, ?1
+                FROM job_snapshots WHERE source_name = ?2 AND last_seen = ?3
+            """, (now, source_name, previous_run))
+        self._commit()
 
     def get_all_jobs(self):
         """Retrieve all jobs for change detection comparison."""
-        cursor = self.conn.execute("SELECT title, company FROM job_snapshots")
-        return [{"title": row[0], "company": row[1]} for row in cursor.fetchall()]
\ No newline at end of file
+        cursor = self.conn.execute("SELECT title, company FROM job_snapshots ORDER BY id")
+        return [{"title": row[0], "company": row[1]} for row in cursor.fetchall()]
@@ -0,0 +1,325 @@
+"""
+Write-behind persistence.
+
+StorageWriter runs a dedicated thread that owns a storage object (and so
+its SQLite connection) and applies write commands taken from a bounded
+queue. Commands that arrive together are committed in one transaction;
+maintenance commands that must not run inside one (incremental vacuum,
+callables passed to execute()) run on their own between batches.
+WriteBehindStorage wraps a writer behind the usual storage API, so a
+monitor can hand off its writes and move straight on to the next source.
+"""
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.core.logger import get_logger
+
+logger = get_logger("storage.writer")
+
+# (method name or callable, args, kwargs, future)
+Command = Tuple[Any, tuple, dict, Future]
+
+_STOP = object()
+
+
+class Standalone:
+    """
+    Marks a command that runs outside the batch transaction.
+
+    The wrapped method (name or callable) manages its own transactions,
+    exactly as when it is called on the storage directly.
+    """
+
+    def __init__(self, method):
+        self.method = method
+
+
+class StorageWriter:
+    """
+    Dedicated writer thread for a storage object.
+
+    Every command resolves a Future once the transaction containing it has
+    committed, which callers can wait on for a durability acknowledgement.
+    Failed commands are also logged, since callers often drop the Future.
+    """
+
+    # Storage methods that do nothing (or fail) inside a transaction
+    STANDALONE_METHODS = {"incremental_vacuum", "enable_incremental_vacuum"}
+
+    def __init__(
+        self,
+        storage_factory: Callable,
+        max_queue: int = 1_000,
+        batch_size: int = 64
+    ):
+        """
+        Initialize and start the writer.
+
+        Args:
+            storage_factory: Callable returning the storage object; it is
+                called on the writer thread, which then owns the connection
+            max_queue: Maximum number of pending commands (submit blocks
+                when the queue is full)
+            batch_size: Maximum number of commands per transaction
+        """
+        self.batch_size = batch_size
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._ready = Future()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, args=(storage_factory,), name="storage-writer", daemon=True
+        )
+        self._thread.start()
+        # Raise here if the storage could not be opened
+        self._ready.result()
+        atexit.register(self.close)
+
+    def submit(self, method, *args, **kwargs) -> Future:
+        """
+        Queue a command for the writer thread.
+
+        Args:
+            method: Name of a storage method, or a callable taking the
+                storage as its first argument
+            *args, **kwargs: Arguments for the method
+
+        Returns:
+            Future resolved with the method's return value after commit
+        """
+        if self._closed:
+            raise RuntimeError("StorageWriter is closed")
+        future = Future()
+        self._queue.put((method, args, kwargs, future))
+        return future
+
+    def call(self, method, *args, **kwargs) -> Any:
+        """Submit a command and wait for its result."""
+        return self.submit(method, *args, **kwargs).result()
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until every command queued so far has been committed."""
+        if self._closed:
+            return
+        self.submit(lambda storage: None).result(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush pending commands and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self, storage_factory: Callable):
+        try:
+            self.storage = storage_factory()
+        except Exception as e:
+            self._ready.set_exception(e)
+            return
+        self._ready.set_result(True)
+
+        while True:
+            batch = [self._queue.get()]
+            # Group whatever else is already waiting into the same transaction
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            grouped: List[Command] = []
+            for command in batch:
+                if command is _STOP:
+                    continue
+                if self._is_standalone(command):
+                    # Keep queue order: commit what came before, then run it alone
+                    if grouped:
+                        self._apply(grouped)
+                        grouped = []
+                    self._apply_standalone(command)
+                else:
+                    grouped.append(command)
+            if grouped:
+                self._apply(grouped)
+            if stop:
+                self.storage.conn.close()
+                return
+
+    def _apply(self, commands: List[Command]):
+        """Apply a batch in one transaction, isolating failures."""
+        try:
+            with self.storage.transaction():
+                results = [self._execute(command) for command in commands]
+        except Exception:
+            # Retry one by one so a bad command does not sink the others
+            for command in commands:
+                future = command[3]
+                try:
+                    with self.storage.transaction():
+                        result = self._execute(command)
+                except Exception as e:
+                    logger.error("❌ Storage write %s failed: %s", _command_name(command), e)
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            return
+
+        for command, result in zip(commands, results):
+            command[3].set_result(result)
+
+    def _apply_standalone(self, command: Command):
+        """Run a maintenance command outside any transaction."""
+        try:
+            result = self._execute(command)
+        except Exception as e:
+            logger.error("❌ Storage command %s failed: %s", _command_name(command), e)
+            command[3].set_exception(e)
+        else:
+            command[3].set_result(result)
+
+    def _is_standalone(self, command: Command) -> bool:
+        method = command[0]
+        return isinstance(method, Standalone) or method in self.STANDALONE_METHODS
+
+    def _execute(self, command: Command) -> Any:
+        method, args, kwargs, _ = command
+        if isinstance(method, Standalone):
+            method = method.method
+        if callable(method):
+            return method(self.storage, *args, **kwargs)
+        return getattr(self.storage, method)(*args, **kwargs)
+
+
+class WriteBehindStorage:
+    """
+    Storage proxy whose writes are applied asynchronously by a StorageWriter.
+
+    Write methods return a Future instead of blocking; call .result() on it
+    to wait for the commit. Reads also run on the writer thread, after all
+    previously queued writes, so they always see this process's own writes.
+    Writes made inside transaction() are sent as a single command.
+
+    Example:
+        storage = WriteBehindStorage(DynamicStorage)
+        monitor = DynamicJobMonitor(url, storage=storage)
+    """
+
+    WRITE_METHODS = {
+        "save_snapshot",
+        "insert_jobs",
+        "cleanup_old_snapshots",
+        "delete_snapshots",
+        "enqueue_notification",
+        "record_run_metrics",
+    }
+
+    def __init__(
+        self,
+        storage_factory: Optional[Callable] = None,
+        writer: Optional[StorageWriter] = None,
+        **writer_kwargs
+    ):
+        """
+        Initialize the proxy.
+
+        Args:
+            storage_factory: Callable returning the wrapped storage object
+            writer: An existing StorageWriter to share instead
+            **writer_kwargs: Passed to StorageWriter (max_queue, batch_size)
+        """
+        self.writer = writer or StorageWriter(storage_factory, **writer_kwargs)
+        self._local = threading.local()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.writer.storage, name)
+        if not callable(attribute):
+            return attribute
+
+        if name in self.WRITE_METHODS:
+            return lambda *args, **kwargs: self._write(name, *args, **kwargs)
+        return lambda *args, **kwargs: self._read(name, *args, **kwargs)
+
+    def _write(self, method, *args, **kwargs) -> Future:
+        """Queue a write, or add it to the open transaction() group."""
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            future = Future()
+            pending.append((method, args, kwargs, future))
+            return future
+        return self.writer.submit(method, *args, **kwargs)
+
+    def _read(self, method, *args, **kwargs) -> Any:
+        """Run a read after all queued writes and return its result."""
+        return self.writer.call(method, *args, **kwargs)
+
+    def execute(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(storage, ...) on the writer thread and return its result.
+
+        As with a plain storage, fn runs outside any transaction and
+        manages its own (retention, vacuum, ...).
+        """
+        return self.writer.call(Standalone(fn), *args, **kwargs)
+
+    def execute_read(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a read-only fn(storage, ...) and return its result."""
+        return self._read(fn, *args, **kwargs)
+
+    @contextmanager
+    def transaction(self):
+        """Collect the writes made in this block into a single command."""
+        if getattr(self._local, "pending", None) is not None:
+            yield self
+            return
+
+        self._local.pending = []
+        try:
+            yield self
+        except BaseException:
+            self._local.pending = None
+            raise
+
+        pending, self._local.pending = self._local.pending, None
+        if pending:
+            group = self._write(_apply_group, pending)
+            group.add_done_callback(lambda done: _resolve_group(done, pending))
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait until all queued writes are committed."""
+        self.writer.flush(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Flush pending writes and stop the writer thread."""
+        self.writer.close(timeout)
+
+
+def _command_name(command: Command) -> str:
+    method = command[0]
+    if isinstance(method, Standalone):
+        method = method.method
+    return method if isinstance(method, str) else getattr(method, "__name__", repr(method))
+
+
+def _apply_group(storage, commands: List[Command]) -> list:
+    """Run the writes of a transaction() group on the writer thread."""
+    return [
+        method(storage, *args, **kwargs) if callable(method)
+        else getattr(storage, method)(*args, **kwargs)
+        for method, args, kwargs, _ in commands
+    ]
+
+
+def _resolve_group(group: Future, commands: List[Command]):
+    """Resolve each write's future once the whole group has committed."""
+    error = group.exception()
+    if error is not None:
+        for _, _, _, future in commands:
+            future.set_exception(error)
+        return
+    for (_, _, _, future), result in zip(commands, group.result()):
+        future.set_result(result)
@@ -0,0 +1,7 @@
+"""
+Benchmarks for the SWMAP pipeline.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.bench_core --sizes 1k,10k,100k
+"""
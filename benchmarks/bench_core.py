@@ -0,0 +1,224 @@
+"""
+Core pipeline benchmarks: detection, hashing, cleaning, storage and rendering.
+
+Every benchmark runs on synthetic catalogs (see catalog.py) of each
+requested size, where the "new" catalog differs from the "old" one by
+--churn. Storage benchmarks use fresh databases in a temporary directory.
+
+    python -m benchmarks.bench_core                      # 1k, 10k, 100k
+    python -m benchmarks.bench_core --sizes 1m --only detect,hash_dataset
+    python -m benchmarks.bench_core --save-baseline      # store as baseline
+
+Results go to benchmarks/results/core-latest.json. If a baseline exists
+(benchmarks/baseline-core.json by default) the run is compared against it
+and the exit status is 1 when something regressed beyond --tolerance.
+
+The committed baseline was recorded on a single-vCPU x86_64 Linux
+container (Intel Xeon, CPython 3.11.7); its "meta" block has the details.
+Timings only compare on similar hardware: on another machine, save a
+local baseline first and compare against that.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+# Ensure the root directory is in the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.detection.change_detector import ChangeDetector
+from app.detection.hashers import generate_hash, hash_dataset
+from app.detection.sql_backend import SQLiteDiffBackend
+from app.processors.cleaner import (
+    DataCleaner,
+    remove_duplicates,
+    validate_required_fields,
+    normalize_text_fields,
+    normalize_price,
+)
+from app.notifiers.rendering import escape_html, escape_markdown
+from app.notifiers.templates import format_html_report, format_telegram_report, format_text_report
+from app.storage.snapshot_cache import SNAPSHOT_CACHE
+from app.storage.sqlite_dynamic import DynamicStorage
+
+from benchmarks.catalog import churn_catalog, make_catalog, parse_size
+from benchmarks.harness import Benchmark, compare, load_results, measure, print_comparison, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE = "bench"
+
+# Same steps and fields as DynamicJobMonitor
+CLEANING_STEPS = {
+    "clean_remove_duplicates": lambda d: remove_duplicates(d, ["title", "price"]),
+    "clean_validate_required": lambda d: validate_required_fields(d, ["title", "price"]),
+    "clean_normalize_text": lambda d: normalize_text_fields(d, ["title", "price"]),
+    "clean_normalize_price": lambda d: normalize_price(d, "price"),
+}
+
+
+class ScratchDatabases:
+    """Fresh DynamicStorage databases under one temporary directory."""
+
+    def __init__(self):
+        self.root = tempfile.mkdtemp(prefix="swmap-bench-")
+        self._count = 0
+
+    def storage(self) -> DynamicStorage:
+        # DynamicStorage opens data/dynamic_data.db relative to the cwd
+        self._count += 1
+        directory = os.path.join(self.root, str(self._count))
+        os.makedirs(directory)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            storage = DynamicStorage()
+        finally:
+            os.chdir(cwd)
+        SNAPSHOT_CACHE.clear()
+        return storage
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _close(state):
+    storage = state[0] if isinstance(state, tuple) else state
+    storage.conn.close()
+
+
+def build_benchmarks(size: int, churn: float, seed: int, scratch: ScratchDatabases):
+    """All benchmarks for one catalog size."""
+    old = make_catalog(size, seed)
+    new = churn_catalog(old, churn, seed + 1)
+    detector = ChangeDetector(key_fields=["title"], compare_fields=["title", "price"])
+    report = detector.detect(old, new)
+
+    def copies(data):
+        return lambda: [dict(item) for item in data]
+
+    def with_snapshots(*catalogs, cold=False):
+        def setup():
+            storage = scratch.storage()
+            for catalog in catalogs:
+                snapshot_id = storage.save_snapshot(SOURCE, catalog)
+            if cold:
+                SNAPSHOT_CACHE.clear()
+            return storage, snapshot_id
+        return setup
+
+    def with_jobs():
+        storage = scratch.storage()
+        storage.insert_jobs(old)
+        return storage
+
+    def sql_detect(state):
+        storage, snapshot_id = state
+        ChangeDetector(
+            key_fields=["title"], compare_fields=["title", "price"],
+            backend=SQLiteDiffBackend(storage)
+        ).detect_against(snapshot_id, new)
+
+    def fresh_report():
+        # Rendering is memoized on the report, and escaping is cached
+        report.__dict__.pop("_rendered", None)
+        escape_html.cache_clear()
+        escape_markdown.cache_clear()
+        return report
+
+    changes = max(report.total_changes, 1)
+    benchmarks = [
+        Benchmark("detect", size, lambda _: detector.detect(old, new)),
+        Benchmark("detect_sql", size, sql_detect, with_snapshots(old), _close),
+        Benchmark("hash_dataset", size, lambda _: hash_dataset(new)),
+        Benchmark("generate_hash", size, lambda _: [generate_hash(item) for item in new]),
+    ]
+
+    dirty = make_catalog(size, seed, dirty=True)
+    for name, step in CLEANING_STEPS.items():
+        benchmarks.append(Benchmark(name, size, step, copies(dirty), items=len(dirty)))
+    cleaner = DataCleaner(steps=list(CLEANING_STEPS.values()))
+    benchmarks.append(Benchmark("clean", size, cleaner.clean, copies(dirty), items=len(dirty)))
+
+    benchmarks += [
+        Benchmark("save_snapshot", size,
+                  lambda state: state[0].save_snapshot(SOURCE, new), with_snapshots(old), _close),
+        Benchmark("load_snapshot_cold", size,
+                  lambda state: state[0].get_latest_snapshot(SOURCE), with_snapshots(old, new, cold=True), _close),
+        Benchmark("load_snapshot_warm", size,
+                  lambda state: state[0].get_latest_snapshot(SOURCE), with_snapshots(old, new), _close),
+        Benchmark("insert_jobs", size, lambda storage: storage.insert_jobs(new), with_jobs, _close),
+        Benchmark("render_text", size,
+                  lambda r: format_text_report(r, SOURCE), fresh_report, items=changes),
+        Benchmark("render_html", size,
+                  lambda r: format_html_report(r, SOURCE), fresh_report, items=changes),
+        Benchmark("render_telegram", size,
+                  lambda r: format_telegram_report(r, SOURCE), fresh_report, items=changes),
+    ]
+    return benchmarks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the SWMAP core pipeline.")
+    parser.add_argument("--sizes", default="1k,10k,100k",
+                        help="Comma-separated catalog sizes, e.g. 1k,10k,1m")
+    parser.add_argument("--churn", type=float, default=0.05,
+                        help="Fraction of items changed between old and new catalog")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is kept)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark names")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "core-latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline-core.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    only = {name.strip() for name in args.only.split(",")} if args.only else None
+
+    results = {}
+    scratch = ScratchDatabases()
+    try:
+        for size in sizes:
+            print(f"\n📦 Catalog of {size:,} items ({args.churn:.0%} churn)")
+            for bench in build_benchmarks(size, args.churn, args.seed, scratch):
+                if only and bench.name not in only:
+                    continue
+                result = measure(bench, repeat=args.repeat, trace_memory=not args.no_memory)
+                results[bench.key] = result
+                memory = "" if result["peak_mib"] is None else f"  peak {result['peak_mib']:>9.2f} MiB"
+                print(
+                    f"⏱️  {bench.name:<24} {result['seconds'] * 1000:>10.2f} ms"
+                    f"  {result['items_per_sec'] or 0:>13,.0f} items/s{memory}"
+                )
+    finally:
+        scratch.cleanup()
+
+    config = {
+        "suite": "core", "sizes": sizes, "churn": args.churn,
+        "repeat": args.repeat, "seed": args.seed,
+    }
+    write_results(args.output, results, config)
+    print(f"\n💾 Results written to {args.output}")
+
+    status = 0
+    baseline = load_results(args.baseline)
+    if baseline and not args.save_baseline:
+        rows = compare(results, baseline["results"], tolerance=args.tolerance)
+        print_comparison(rows)
+        if any(row["status"] == "regression" for row in rows):
+            print(f"\n❌ Regressions beyond {args.tolerance:.0%} against {args.baseline}")
+            status = 1
+        else:
+            print(f"\n✅ No regressions against {args.baseline}")
+
+    if args.save_baseline:
+        write_results(args.baseline, results, config)
+        print(f"📌 Baseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
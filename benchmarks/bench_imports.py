@@ -0,0 +1,158 @@
+"""
+Import-time budget check for the entry points.
+
+Each module is imported in a fresh interpreter with `python -X importtime`
+and its cumulative import time (best of --repeat) is checked against a
+budget. Independently of timing, importing a module must not load the
+heavy optional dependencies listed in FORBIDDEN: those are only imported
+when a run actually uses them (Playwright when a browser opens,
+python-telegram-bot/smtplib when the channel is enabled, ...).
+
+    python -m benchmarks.bench_imports
+    python -m benchmarks.bench_imports --scale 2   # slower machine
+
+Exits 1 when a budget is exceeded, a forbidden module is loaded, or (with
+a baseline) an import time regressed beyond --tolerance.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Ensure the root directory is in the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import compare, load_results, print_comparison, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+# Module -> cumulative import budget in milliseconds
+BUDGETS_MS = {
+    "app.main": 150,
+    "app.core.__main__": 200,
+    "app.monitors.job_monitor": 200,
+    "app.monitors.dynamic_job_monitor": 200,
+    "app.storage.sqlite_static": 150,
+    "app.storage.sqlite_dynamic": 150,
+    "scripts.export_db": 200,
+    "scripts.clear_db": 200,
+}
+
+# Loaded on first use only, never by importing an entry point
+FORBIDDEN = ["playwright", "telegram", "httpx", "smtplib", "email.mime", "bs4", "requests", "http.server"]
+
+
+def import_profile(module: str) -> Tuple[float, List[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        (cumulative import seconds, names of all loaded modules)
+    """
+    code = f"import {module}, sys, json; print(json.dumps(sorted(sys.modules)))"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=ROOT, check=True
+    )
+    cumulative = None
+    # Lines look like "import time:   self [us] | cumulative | name"
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1])
+    if cumulative is None:
+        raise RuntimeError(f"No import time reported for {module}")
+    return cumulative / 1_000_000, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def forbidden_loaded(modules: List[str]) -> List[str]:
+    """FORBIDDEN entries present in a list of loaded module names."""
+    loaded = set(modules)
+    return [
+        name for name in FORBIDDEN
+        if name in loaded or any(m.startswith(name + ".") for m in loaded)
+    ]
+
+
+def check_module(module: str, repeat: int, budget_ms: Optional[float]) -> Dict[str, object]:
+    """Best-of-N import time of a module, with its budget and forbidden imports."""
+    # One unmeasured import writes the .pyc files
+    import_profile(module)
+    times, modules = [], []
+    for _ in range(max(repeat, 1)):
+        seconds, modules = import_profile(module)
+        times.append(seconds)
+    best = min(times)
+    return {
+        "module": module,
+        "seconds": round(best, 6),
+        "budget_seconds": budget_ms / 1000 if budget_ms is not None else None,
+        "over_budget": budget_ms is not None and best * 1000 > budget_ms,
+        "forbidden": forbidden_loaded(modules),
+        "modules_loaded": len(modules),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time of the entry points.")
+    parser.add_argument("--modules", default=None,
+                        help="Comma-separated modules (default: all modules with a budget)")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured imports per module (best is kept)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow machines, CI)")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "imports-latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline-imports.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    modules = [m.strip() for m in args.modules.split(",")] if args.modules else list(BUDGETS_MS)
+
+    results = {}
+    failed = False
+    print(f"\n📦 Import times (best of {args.repeat}, budgets x{args.scale:g})")
+    for module in modules:
+        budget = BUDGETS_MS.get(module)
+        result = check_module(module, args.repeat, budget * args.scale if budget is not None else None)
+        results[module] = result
+
+        budget_text = "no budget" if result["budget_seconds"] is None else f"budget {result['budget_seconds'] * 1000:.0f} ms"
+        icon = "✅"
+        if result["over_budget"] or result["forbidden"]:
+            icon = "❌"
+            failed = True
+        print(f"{icon} {module:<36} {result['seconds'] * 1000:>8.1f} ms  ({budget_text})")
+        if result["forbidden"]:
+            print(f"   loads {', '.join(result['forbidden'])} on import")
+
+    config = {"suite": "imports", "repeat": args.repeat, "scale": args.scale, "budgets_ms": BUDGETS_MS}
+    write_results(args.output, results, config)
+    print(f"\n💾 Results written to {args.output}")
+
+    baseline = load_results(args.baseline)
+    if baseline and not args.save_baseline:
+        rows = compare(
+            results, baseline["results"], tolerance=args.tolerance,
+            fields=("seconds",), min_delta={"seconds": 0.005}
+        )
+        print_comparison(rows)
+        if any(row["status"] == "regression" for row in rows):
+            print(f"\n❌ Regressions beyond {args.tolerance:.0%} against {args.baseline}")
+            failed = True
+
+    if args.save_baseline:
+        write_results(args.baseline, results, config)
+        print(f"📌 Baseline saved to {args.baseline}")
+
+    if not failed:
+        print("✅ All entry points within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+End-to-end scrape benchmark against the local fixture site.
+
+Runs full JobMonitor / DynamicJobMonitor cycles (fetch, parse, detect,
+snapshot, insert, notify, export) against benchmarks/fixture_server.py,
+with the catalog churning between runs, and reports pages/sec, items/sec
+and p50/p99 run latency. Nothing leaves the machine: the monitors get
+their own storage and working directory under a temporary directory.
+
+    python -m benchmarks.bench_scrape                         # static
+    python -m benchmarks.bench_scrape --engine both --pages 10 --latency 0.05
+
+The dynamic engine needs Playwright's Chromium (`playwright install
+chromium`). Results go to benchmarks/results/scrape-latest.json and are
+compared with benchmarks/baseline-scrape.json like bench_core (the
+committed one is a static run with the defaults, recorded on the same
+machine as baseline-core.json).
+"""
+import argparse
+import io
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional
+
+# Ensure the root directory is in the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixture_server import FixtureSite
+from benchmarks.harness import compare, load_results, print_comparison, write_results
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)."""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _make_monitor(engine: str, site: FixtureSite):
+    if engine == "static":
+        from app.monitors.job_monitor import JobMonitor
+        from app.storage.sqlite_static import StaticStorage
+        return JobMonitor(site.jobs_url, storage=StaticStorage(), source_name="bench_static")
+
+    from app.monitors.dynamic_job_monitor import DynamicJobMonitor
+    from app.storage.sqlite_dynamic import DynamicStorage
+    return DynamicJobMonitor(site.catalog_url, storage=DynamicStorage(), source_name="bench_dynamic")
+
+
+def run_engine(engine: str, site: FixtureSite, runs: int, warmup: int) -> Optional[Dict[str, Any]]:
+    """
+    Run monitor cycles of one engine and summarize them.
+
+    Args:
+        engine: "static" or "dynamic"
+        site: Running fixture site (advanced after every run)
+        runs: Measured runs
+        warmup: Unmeasured runs first (the first one captures the baseline)
+
+    Returns:
+        Result dict, or None if the engine could not run
+    """
+    workdir = tempfile.mkdtemp(prefix=f"swmap-bench-{engine}-")
+    cwd = os.getcwd()
+    # Storage, exports and logs of the monitor land in the scratch directory
+    os.chdir(workdir)
+    try:
+        monitor = _make_monitor(engine, site)
+        latencies, pages, items = [], 0, 0
+        for index in range(warmup + runs):
+            requests_before = site.requests
+            start = time.perf_counter()
+            try:
+                # Console reports of every run are not part of the output
+                with redirect_stdout(io.StringIO()):
+                    jobs = monitor.run()
+            except Exception as e:
+                print(f"⚠️  {engine} run failed, skipping the engine: {str(e).splitlines()[0]}")
+                return None
+            elapsed = time.perf_counter() - start
+            if index >= warmup:
+                latencies.append(elapsed)
+                pages += site.requests - requests_before
+                items += len(jobs)
+            # Retention runs between cycles, as in app.main
+            monitor.retention.run()
+            site.advance()
+
+        monitor.notification_manager.close()
+        stages: Dict[str, float] = {}
+        for row in monitor.storage.get_run_metrics(monitor.source_name, limit=runs):
+            for stage, seconds in row["stages"].items():
+                stages[stage] = stages.get(stage, 0.0) + seconds / runs
+        monitor.storage.conn.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    total = sum(latencies)
+    return {
+        "engine": engine,
+        "runs": runs,
+        "pages": pages,
+        "items": items,
+        "seconds": round(total, 6),
+        "pages_per_sec": round(pages / total, 2) if total > 0 else None,
+        "items_per_sec": round(items / total, 1) if total > 0 else None,
+        "mean": round(statistics.mean(latencies), 6),
+        "p50": round(percentile(latencies, 50), 6),
+        "p99": round(percentile(latencies, 99), 6),
+        "stages": {stage: round(seconds, 6) for stage, seconds in sorted(stages.items())},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end scrape benchmark on a local fixture site.")
+    parser.add_argument("--engine", choices=["static", "dynamic", "both"], default="static")
+    parser.add_argument("--runs", type=int, default=10, help="Measured monitor runs per engine")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs first (at least the baseline run)")
+    parser.add_argument("--pages", type=int, default=5, help="Catalog pages")
+    parser.add_argument("--per-page", type=int, default=20, help="Items per catalog page")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each request waits")
+    parser.add_argument("--churn", type=float, default=0.05, help="Fraction of items changed between runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "scrape-latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline-scrape.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Relative slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    engines = ["static", "dynamic"] if args.engine == "both" else [args.engine]
+    results = {}
+    for engine in engines:
+        site = FixtureSite(
+            pages=args.pages, per_page=args.per_page, latency=args.latency,
+            churn=args.churn, seed=args.seed
+        )
+        site.start()
+        try:
+            print(f"\n🌐 {engine}: {len(site.catalog):,} items on {site.base_url}")
+            result = run_engine(engine, site, args.runs, max(args.warmup, 1))
+        finally:
+            site.stop()
+        if result is None:
+            continue
+        results[engine] = result
+        print(
+            f"⏱️  {result['runs']} runs: {result['pages_per_sec']:,.1f} pages/s, "
+            f"{result['items_per_sec']:,.0f} items/s, "
+            f"p50 {result['p50'] * 1000:.1f} ms, p99 {result['p99'] * 1000:.1f} ms"
+        )
+        stages = ", ".join(f"{stage} {seconds * 1000:.1f}" for stage, seconds in result["stages"].items())
+        print(f"   mean stage ms: {stages}")
+
+    config = {
+        "suite": "scrape", "engines": engines, "runs": args.runs, "warmup": args.warmup,
+        "pages": args.pages, "per_page": args.per_page, "latency": args.latency,
+        "churn": args.churn, "seed": args.seed,
+    }
+    write_results(args.output, results, config)
+    print(f"\n💾 Results written to {args.output}")
+
+    status = 0
+    baseline = load_results(args.baseline)
+    if baseline and not args.save_baseline:
+        rows = compare(
+            results, baseline["results"], tolerance=args.tolerance,
+            fields=("p50", "p99"), min_delta={"p50": 0.002, "p99": 0.002}
+        )
+        print_comparison(rows)
+        if any(row["status"] == "regression" for row in rows):
+            print(f"\n❌ Regressions beyond {args.tolerance:.0%} against {args.baseline}")
+            status = 1
+        else:
+            print(f"\n✅ No regressions against {args.baseline}")
+
+    if args.save_baseline:
+        write_results(args.baseline, results, config)
+        print(f"📌 Baseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Synthetic product catalogs for benchmarks.
+
+Items look like what the scrapers produce ({"title", "company", "price"}
+with prices as scraped strings) and are generated from a seed, so the same
+arguments always give the same catalog.
+"""
+import random
+from typing import Dict, List
+
+BRANDS = ["Acer", "Asus", "Dell", "HP", "Lenovo", "Apple", "MSI", "Samsung", "Toshiba"]
+LINES = ["Aspire", "ZenBook", "Inspiron", "Pavilion", "ThinkPad", "MacBook", "Prestige", "Galaxy"]
+COMPANIES = [
+    "Payne, Roberts and Davis", "Vasquez-Davidson", "Jackson, Chambers and Levy",
+    "Savage-Bradley", "Ramirez Inc", "Rogers-Yates", "Kramer-Klein", "Garcia PLC",
+]
+
+
+def make_item(rng: random.Random, label: str) -> Dict[str, str]:
+    """One catalog item; the label makes its title unique."""
+    return {
+        "title": f"{rng.choice(BRANDS)} {rng.choice(LINES)} {label}",
+        "company": rng.choice(COMPANIES),
+        "price": f"${rng.uniform(80, 3000):,.2f}",
+    }
+
+
+def make_catalog(size: int, seed: int = 0, dirty: bool = False) -> List[Dict[str, str]]:
+    """
+    Generate a catalog of unique items.
+
+    Args:
+        size: Number of items
+        seed: Random seed
+        dirty: Make it look freshly scraped: runs of whitespace in text
+            fields, ~2% duplicated items and ~1% items missing a price
+
+    Returns:
+        List of items
+    """
+    rng = random.Random(seed)
+    items = [make_item(rng, f"#{i:07d}") for i in range(size)]
+    if not dirty:
+        return items
+
+    for item in items:
+        item["title"] = "  " + item["title"].replace(" ", "   ") + "\n"
+        item["company"] = item["company"] + "  "
+    for item in rng.sample(items, size // 100):
+        item["price"] = ""
+    duplicates = [dict(item) for item in rng.sample(items, size // 50)]
+    items.extend(duplicates)
+    rng.shuffle(items)
+    return items
+
+
+def churn_catalog(
+    items: List[Dict[str, str]],
+    churn: float,
+    seed: int = 1
+) -> List[Dict[str, str]]:
+    """
+    Next version of a catalog, with a fraction of items changed.
+
+    The churned items are split evenly between removed, added and
+    re-priced items; the rest are carried over unchanged. Added titles
+    carry the seed, so use a different seed for every version.
+
+    Args:
+        items: Current catalog (not modified)
+        churn: Fraction of items that change (0..1)
+        seed: Random seed
+
+    Returns:
+        The new catalog
+    """
+    rng = random.Random(seed)
+    changed = min(round(len(items) * churn), len(items))
+    removed_count = changed // 3
+    modified_count = changed // 3
+    added_count = changed - removed_count - modified_count
+
+    picked = rng.sample(range(len(items)), removed_count + modified_count)
+    removed = set(picked[:removed_count])
+    modified = set(picked[removed_count:])
+
+    new_items = []
+    for index, item in enumerate(items):
+        if index in removed:
+            continue
+        item = dict(item)
+        if index in modified:
+            item["price"] = f"${rng.uniform(80, 3000):,.2f}"
+        new_items.append(item)
+
+    new_items.extend(make_item(rng, f"#{seed}-{k:07d}") for k in range(added_count))
+    return new_items
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as "10000", "10k" or "1m"."""
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1_000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1_000_000, text[:-1]
+    return int(float(text) * multiplier)
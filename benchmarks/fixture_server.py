@@ -0,0 +1,222 @@
+"""
+Local fixture site for offline scrape benchmarks.
+
+Serves generated catalogs in the shape the monitors scrape:
+
+    /jobs/              static listing, like realpython.github.io/fake-jobs
+                        (.card-content with .title and .company)
+    /catalog/           AJAX-paginated catalog, like the webscraper.io test
+                        sites: page 1 is rendered server-side, button.next
+                        fetches the next page from /catalog/api and swaps
+                        the .thumbnail items in place; the button is hidden
+                        on the last page
+    /catalog/api?page=N one catalog page as JSON
+
+Every request waits `latency` seconds before answering. advance() moves
+the catalog to its next version with `churn` of the items changed, so
+consecutive monitor runs see new, removed and re-priced items.
+
+    site = FixtureSite(pages=5, per_page=20, latency=0.05)
+    site.start()
+    JobMonitor(site.jobs_url, ...).run()
+    site.advance()
+    ...
+    site.stop()
+"""
+import json
+import math
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.catalog import churn_catalog, make_catalog
+
+JOBS_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Fake Python</title></head>
+<body><section class="section"><div class="container">
+<h1 class="title">Fake Python</h1>
+<div id="ResultsContainer" class="columns is-multiline">
+{cards}
+</div></div></section></body></html>
+"""
+
+JOB_CARD = """<div class="column is-half"><div class="card"><div class="card-content">
+<div class="media-content"><h2 class="title is-5">{title}</h2>
+<h3 class="subtitle is-6 company">{company}</h3></div>
+<div class="content"><p class="location">Remote</p></div>
+</div></div></div>"""
+
+CATALOG_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Laptops</title></head>
+<body><div class="container"><h1>Computers / Laptops</h1>
+<div class="row ecomerce-items ecomerce-items-ajax" id="items">
+{items}
+</div>
+<div class="pagination"><button class="btn btn-default next" type="button"{hidden}>&raquo;</button></div>
+</div>
+<script>
+let currentPage = 1;
+const next = document.querySelector("button.next");
+next.addEventListener("click", async () => {{
+    const response = await fetch("/catalog/api?page=" + (currentPage + 1));
+    const data = await response.json();
+    currentPage = data.page;
+    document.getElementById("items").innerHTML = data.html;
+    if (!data.has_next) {{
+        next.style.display = "none";
+    }}
+}});
+</script></body></html>
+"""
+
+THUMBNAIL = """<div class="col-md-4 col-xl-4 col-lg-4"><div class="thumbnail">
+<div class="caption"><h4 class="price float-end">{price}</h4>
+<h4><a class="title" title="{title}">{title}</a></h4>
+<p class="description">Synthetic benchmark item</p></div>
+</div></div>"""
+
+HIDDEN = ' style="display: none"'
+
+
+class FixtureSite:
+    """Generated catalog served over HTTP on a background thread."""
+
+    def __init__(
+        self,
+        pages: int = 5,
+        per_page: int = 20,
+        latency: float = 0.0,
+        churn: float = 0.05,
+        seed: int = 42
+    ):
+        """
+        Initialize the site.
+
+        Args:
+            pages: Catalog pages at version 0 (the static listing shows
+                pages * per_page items on one page)
+            per_page: Items per catalog page
+            latency: Seconds each request waits before answering
+            churn: Fraction of items changed by advance()
+            seed: Random seed for the catalog and its versions
+        """
+        self.per_page = per_page
+        self.latency = latency
+        self.churn = churn
+        self.seed = seed
+        self.version = 0
+        self.catalog = make_catalog(pages * per_page, seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def page_count(self) -> int:
+        return max(math.ceil(len(self.catalog) / self.per_page), 1)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def jobs_url(self) -> str:
+        return f"{self.base_url}/jobs/"
+
+    @property
+    def catalog_url(self) -> str:
+        return f"{self.base_url}/catalog/"
+
+    def advance(self):
+        """Move the catalog to its next version."""
+        with self._lock:
+            self.version += 1
+            self.catalog = churn_catalog(self.catalog, self.churn, self.seed + self.version)
+
+    def page(self, number: int) -> List[Dict[str, str]]:
+        """Items of one catalog page (1-based)."""
+        start = (number - 1) * self.per_page
+        return self.catalog[start:start + self.per_page]
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start serving on a daemon thread.
+
+        Returns:
+            The base URL
+        """
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                url = urlparse(self.path)
+                if url.path == "/jobs/":
+                    self._send(site.render_jobs(), "text/html")
+                elif url.path == "/catalog/":
+                    self._send(site.render_catalog(), "text/html")
+                elif url.path == "/catalog/api":
+                    number = int(parse_qs(url.query).get("page", ["1"])[0])
+                    self._send(json.dumps(site.render_page(number)), "application/json")
+                else:
+                    self.send_error(404)
+
+            def _send(self, body: str, content_type: str):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fixture-http", daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def render_jobs(self) -> str:
+        with self._lock:
+            items = list(self.catalog)
+        cards = "\n".join(
+            JOB_CARD.format(title=escape(item["title"]), company=escape(item["company"]))
+            for item in items
+        )
+        return JOBS_PAGE.format(cards=cards)
+
+    def render_catalog(self) -> str:
+        with self._lock:
+            items = self.page(1)
+            last = self.page_count == 1
+        return CATALOG_PAGE.format(items=self._thumbnails(items), hidden=HIDDEN if last else "")
+
+    def render_page(self, number: int) -> Dict[str, object]:
+        with self._lock:
+            number = min(max(number, 1), self.page_count)
+            items = self.page(number)
+            has_next = number < self.page_count
+        return {"page": number, "has_next": has_next, "html": self._thumbnails(items)}
+
+    @staticmethod
+    def _thumbnails(items: List[Dict[str, str]]) -> str:
+        return "\n".join(
+            THUMBNAIL.format(title=escape(item["title"]), price=escape(item["price"]))
+            for item in items
+        )
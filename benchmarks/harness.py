@@ -0,0 +1,204 @@
+"""
+Timing, memory and baseline comparison for benchmarks.
+
+A Benchmark is a setup function (untimed, builds fresh state) and a
+function run on that state. measure() keeps the best of several timed
+runs, then does one extra run under tracemalloc to get the peak memory
+allocated by the function itself (tracemalloc slows code down, so it is
+never on during the timed runs).
+
+Results are written as JSON:
+
+    {
+        "meta": {"python": ..., "platform": ..., "commit": ..., ...},
+        "config": {...},
+        "results": {"detect@10000": {"seconds": ..., "items_per_sec": ...,
+                                      "peak_mib": ..., ...}, ...}
+    }
+
+and can be compared against a stored baseline file of the same shape.
+"""
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+MIB = 1024 * 1024
+
+
+@dataclass
+class Benchmark:
+    """One timed operation on a catalog of a given size."""
+    name: str
+    size: int
+    func: Callable[[Any], Any]
+    setup: Callable[[], Any] = lambda: None
+    teardown: Optional[Callable[[Any], None]] = None
+    # Items processed per call, for throughput (default: size)
+    items: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.size}"
+
+
+def measure(bench: Benchmark, repeat: int = 3, trace_memory: bool = True) -> Dict[str, Any]:
+    """
+    Time a benchmark and measure its peak memory.
+
+    Args:
+        bench: The benchmark
+        repeat: Timed runs; the best one is reported
+        trace_memory: Do one more run under tracemalloc
+
+    Returns:
+        Result dict (seconds, median, items_per_sec, peak_mib, ...)
+    """
+    times = []
+    for _ in range(max(repeat, 1)):
+        state = bench.setup()
+        gc.collect()
+        start = time.perf_counter()
+        bench.func(state)
+        times.append(time.perf_counter() - start)
+        if bench.teardown:
+            bench.teardown(state)
+
+    peak_mib = None
+    if trace_memory:
+        state = bench.setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            bench.func(state)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mib = round((peak - before) / MIB, 3)
+        if bench.teardown:
+            bench.teardown(state)
+
+    best = min(times)
+    items = bench.items if bench.items is not None else bench.size
+    return {
+        "benchmark": bench.name,
+        "size": bench.size,
+        "items": items,
+        "repeat": len(times),
+        "seconds": round(best, 6),
+        "median": round(statistics.median(times), 6),
+        "items_per_sec": round(items / best, 1) if best > 0 else None,
+        "peak_mib": peak_mib,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """Where the results were measured."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def write_results(path: str, results: Dict[str, Dict[str, Any]], config: Dict[str, Any]):
+    """Write a results file (see the module docstring for the format)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {"meta": environment(), "config": config, "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> Optional[Dict[str, Any]]:
+    """Read a results file, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.15,
+    fields: Iterable[str] = ("seconds", "peak_mib"),
+    min_delta: Optional[Dict[str, float]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compare results with a baseline (lower is better for every field).
+
+    Args:
+        results: Current results by key
+        baseline: Baseline results by key
+        tolerance: Relative change that counts as a regression/improvement
+        fields: Result fields to compare
+        min_delta: Absolute change below which a field is never flagged,
+            e.g. {"peak_mib": 1.0} to ignore allocator noise
+
+    Returns:
+        One row per key and field: key, field, baseline, current, ratio
+        and status ("regression", "improved", "ok" or "new")
+    """
+    min_delta = min_delta or {"seconds": 0.0005, "peak_mib": 1.0}
+    rows = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        for name in fields:
+            current = result.get(name)
+            if current is None:
+                continue
+            previous = base.get(name) if base else None
+            row = {"key": key, "field": name, "baseline": previous, "current": current, "ratio": None}
+            if previous is None:
+                row["status"] = "new"
+            elif previous <= 0:
+                row["status"] = "ok"
+            else:
+                row["ratio"] = round(current / previous, 3)
+                significant = abs(current - previous) >= min_delta.get(name, 0)
+                if significant and row["ratio"] > 1 + tolerance:
+                    row["status"] = "regression"
+                elif significant and row["ratio"] < 1 - tolerance:
+                    row["status"] = "improved"
+                else:
+                    row["status"] = "ok"
+            rows.append(row)
+    return rows
+
+
+STATUS_ICONS = {"regression": "🔴", "improved": "🟢", "ok": "⚪", "new": "🆕"}
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    """Print compare() rows as a table."""
+    print(f"\n{'benchmark':<32} {'field':<10} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for row in rows:
+        baseline = "-" if row["baseline"] is None else f"{row['baseline']:.4f}"
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        print(
+            f"{row['key']:<32} {row['field']:<10} {baseline:>12} {row['current']:>12.4f} "
+            f"{ratio:>7} {STATUS_ICONS[row['status']]} {row['status']}"
+        )
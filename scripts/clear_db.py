@@ -6,6 +6,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.storage.sqlite_static import StaticStorage
 from app.storage.sqlite_dynamic import DynamicStorage
+from app.core.logger import setup_logger
 
 def clear_database():
     print("\n--- Database Cleanup Tool ---")
@@ -45,4 +46,6 @@ def clear_database():
         print(f"❌ Failed to clear database: {e}")
 
 if __name__ == "__main__":
+    # Storage messages (e.g. from clear_all_data) go through logging
+    setup_logger()
     clear_database()
\ No newline at end of file
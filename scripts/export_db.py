@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+# Ensure the root directory is in the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.storage.sqlite_static import StaticStorage
+from app.storage.sqlite_dynamic import DynamicStorage
+from app.processors.exporter import FORMATS, export_query
+from app.core.logger import setup_logger
+
+ENGINES = {"static": StaticStorage, "dynamic": DynamicStorage}
+
+# Table kind -> (storage attribute holding the table name, column used by --since)
+TABLES = {
+    "jobs": ("jobs_table", "last_changed"),
+    "history": ("history_table", "changed_at"),
+    "daily": ("price_rollup_table", "day"),
+}
+
+
+def export_table(engine, table, fmt="csv", compress=False, since=None, output=None, batch_size=1_000):
+    storage = ENGINES[engine]()
+    attribute, since_column = TABLES[table]
+    table_name = getattr(storage, attribute)
+    if table_name is None:
+        print(f"❌ The {engine} database has no {table} table.")
+        return
+
+    query = f"SELECT * FROM {table_name}"
+    params = ()
+    if since:
+        # Incremental export: only rows changed since the given time
+        query += f" WHERE {since_column} >= ?"
+        params = (since,)
+    query += " ORDER BY rowid" if table != "daily" else " ORDER BY day, item_id"
+
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = os.path.join("data", "exports", f"{table_name}-{stamp}.{fmt}")
+        if compress:
+            output += ".gz"
+
+    count = export_query(
+        storage.conn, query, output, params,
+        fmt=fmt, compress=compress, batch_size=batch_size
+    )
+    print(f"✅ Exported {count} rows from {table_name} to {output}")
+
+
+if __name__ == "__main__":
+    # Storage messages go through logging
+    setup_logger()
+    parser = argparse.ArgumentParser(description="Stream a database table to CSV or JSONL.")
+    parser.add_argument("engine", choices=ENGINES)
+    parser.add_argument("--table", choices=TABLES, default="jobs")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output file")
+    parser.add_argument("--since", help="only rows changed at or after this ISO-8601 time (or day)")
+    parser.add_argument("--output", help="output path (default: data/exports/<table>-<time>.<format>)")
+    parser.add_argument("--batch-size", type=int, default=1_000, help="rows per fetchmany call")
+    args = parser.parse_args()
+
+    export_table(
+        args.engine, args.table, args.format, args.gzip,
+        args.since, args.output, args.batch_size
+    )
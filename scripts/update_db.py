@@ -2,6 +2,11 @@ import sqlite3
 import os
 import sys
 
+# Ensure the root directory is in the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.logger import setup_logger
+
 def update_job_title(job_id, new_title):
     # Absolute pathing logic to find /data/static_data.db
     base_path = os.path.dirname(os.path.abspath(__file__))
@@ -16,8 +21,9 @@ def update_job_title(job_id, new_title):
         cursor = conn.cursor()
 
         # Using placeholders (?) to prevent SQL Injection
-        sql = "UPDATE job_snapshots SET title = ? WHERE id = ?"
-        cursor.execute(sql, (new_title, job_id))
+        # item_id is the natural key (the title) and must follow it
+        sql = "UPDATE job_snapshots SET title = ?, item_id = ? WHERE id = ?"
+        cursor.execute(sql, (new_title, new_title, job_id))
 
         if cursor.rowcount == 0:
             print(f"⚠️ No record found with ID: {job_id}")
@@ -32,6 +38,8 @@ def update_job_title(job_id, new_title):
             conn.close()
 
 if __name__ == "__main__":
+    setup_logger()
+
     # sys.argv[0] is the script name
     # sys.argv[1] is the first argument (ID)
     # sys.argv[2] is the second argument (Title)
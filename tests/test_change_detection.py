@@ -0,0 +1,165 @@
+import json
+
+import pytest
+
+from app.detection.change_detector import ChangeDetector
+from app.detection.columnar_backend import ColumnarDiffBackend
+from app.detection.sql_backend import SQLiteDiffBackend
+from app.core.config import settings
+from app.monitors.job_monitor import JobMonitor
+from app.storage.columnar import ColumnarSnapshot, ColumnarSnapshotStore
+from app.storage.snapshot_cache import SNAPSHOT_CACHE
+from app.storage.sqlite_static import StaticStorage
+
+
+def item(title, price):
+    return {"title": title, "price": price}
+
+
+# "a" is listed twice in both scrapes with its listings swapped, "b" twice
+# only in the old one, "e" twice only in the new one
+OLD = [item("a", "$1"), item("b", "$2"), item("a", "$3"), item("b", "$4"), item("c", "$5"), item("d", "$6")]
+NEW = [item("a", "$3"), item("a", "$1"), item("b", "$4"), item("c", "$7"), item("e", "$8"), item("e", "$9")]
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SNAPSHOT_CACHE.clear()
+    storage = StaticStorage()
+    yield storage
+    storage.conn.close()
+    SNAPSHOT_CACHE.clear()
+
+
+def normalized(report):
+    def rows(items):
+        return sorted(json.dumps(i, sort_keys=True) for i in items)
+
+    return {
+        "new": rows(report.new_items),
+        "removed": rows(report.removed_items),
+        "modified": sorted(
+            (c.item_id, json.dumps(c.old_item, sort_keys=True), json.dumps(c.new_item, sort_keys=True))
+            for c in report.modified_items
+        ),
+    }
+
+
+def reports(storage, tmp_path, old, new):
+    in_memory = ChangeDetector(["title"]).detect(old, new)
+
+    snapshot_id = storage.save_snapshot("jobs", old)
+    sql = ChangeDetector(["title"], backend=SQLiteDiffBackend(storage)).detect_against(snapshot_id, new)
+
+    store = ColumnarSnapshotStore(str(tmp_path / "columnar"), key_fields=["title"])
+    store.save_snapshot("jobs", old)
+    with store.get_latest_snapshot("jobs") as snapshot:
+        columnar = ChangeDetector(["title"], backend=ColumnarDiffBackend()).detect_against(snapshot, new)
+
+    return normalized(in_memory), normalized(sql), normalized(columnar)
+
+
+def test_backends_agree_on_duplicate_keys(storage, tmp_path):
+    in_memory, sql, columnar = reports(storage, tmp_path, OLD, NEW)
+    assert sql == in_memory
+    assert columnar == in_memory
+    # The last listing of each key wins: "a" went from $3 to $1, "b" kept $4
+    assert in_memory == {
+        "new": [json.dumps(item("e", "$9"), sort_keys=True)],
+        "removed": [json.dumps(item("d", "$6"), sort_keys=True)],
+        "modified": [(
+            "a",
+            json.dumps(item("a", "$3"), sort_keys=True),
+            json.dumps(item("a", "$1"), sort_keys=True),
+        ), (
+            "c",
+            json.dumps(item("c", "$5"), sort_keys=True),
+            json.dumps(item("c", "$7"), sort_keys=True),
+        )],
+    }
+
+
+def test_backends_agree_when_a_duplicated_key_changes(storage, tmp_path):
+    new = [item("a", "$1"), item("a", "$9"), item("b", "$2"), item("c", "$5"), item("d", "$6")]
+    in_memory, sql, columnar = reports(storage, tmp_path, OLD, new)
+    assert sql == in_memory
+    assert columnar == in_memory
+    assert [change[0] for change in in_memory["modified"]] == ["a", "b"]
+
+
+def test_columnar_index_holds_one_entry_per_key(tmp_path):
+    store = ColumnarSnapshotStore(str(tmp_path), key_fields=["title"])
+    path = store.save_snapshot("jobs", OLD)
+    with ColumnarSnapshot(path) as snapshot:
+        assert len(snapshot) == len(OLD)
+        assert list(snapshot) == OLD
+        assert list(snapshot.item_ids()) == [("a", 2), ("b", 3), ("c", 4), ("d", 5)]
+        assert snapshot.get("a") == item("a", "$3")
+
+
+def columnar_report(tmp_path, old, new):
+    store = ColumnarSnapshotStore(str(tmp_path / "columnar"), key_fields=["title"])
+    store.save_snapshot("jobs", old)
+    with store.get_latest_snapshot("jobs") as snapshot:
+        return ChangeDetector(["title"], backend=ColumnarDiffBackend()).detect_against(snapshot, new)
+
+
+def test_columnar_round_trip(tmp_path):
+    store = ColumnarSnapshotStore(str(tmp_path), key_fields=["title"])
+    data = [item("a", "$1"), {"title": "b", "price": None, "stock": 3}, {"title": "c"}]
+    store.save_snapshot("jobs", data)
+    with store.get_latest_snapshot("jobs") as snapshot:
+        assert list(snapshot) == data
+        assert snapshot.meta["source_name"] == "jobs"
+        assert snapshot.get("b") == data[1]
+        assert snapshot.get("z") is None
+    report = columnar_report(tmp_path, data, data)
+    assert not report.has_changes
+
+
+def test_columnar_empty_snapshot(tmp_path):
+    store = ColumnarSnapshotStore(str(tmp_path), key_fields=["title"])
+    store.save_snapshot("jobs", [])
+    with store.get_latest_snapshot("jobs") as snapshot:
+        assert len(snapshot) == 0
+        assert list(snapshot) == []
+        assert snapshot.match(["a"]) == [None]
+
+    # Everything is new against an empty baseline, and removed against an empty scrape
+    assert normalized(columnar_report(tmp_path, [], OLD)) == normalized(ChangeDetector(["title"]).detect([], OLD))
+    assert normalized(columnar_report(tmp_path, OLD, [])) == normalized(ChangeDetector(["title"]).detect(OLD, []))
+
+
+def test_cleanup_keeps_the_latest_columnar_snapshots(tmp_path):
+    store = ColumnarSnapshotStore(str(tmp_path), key_fields=["title"])
+    paths = [store.save_snapshot("jobs", [item(str(i), "$1")]) for i in range(4)]
+    assert store.cleanup_old_snapshots("jobs", keep_count=2) == 2
+    assert store.list_snapshots("jobs") == paths[2:]
+    assert store.latest_path("jobs") == paths[-1]
+
+
+def test_monitor_diffs_against_a_current_columnar_copy(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "COLUMNAR_SNAPSHOT_DIR", str(tmp_path / "columnar"))
+    monitor = JobMonitor("http://localhost", storage=storage, source_name="jobs")
+    used = []
+    detect_against = monitor.columnar_detector.detect_against
+    monkeypatch.setattr(monitor.columnar_detector, "detect_against",
+                        lambda *args: used.append(True) or detect_against(*args))
+
+    old = [{"title": "a", "company": "x"}, {"title": "b", "company": "y"}]
+    new = [{"title": "a", "company": "z"}, {"title": "c", "company": "y"}]
+    storage.save_snapshot("jobs", old)
+    # No columnar copy yet: diffed inside SQLite
+    expected = normalized(monitor._detect_changes(storage.get_latest_snapshot_info("jobs"), new))
+    assert used == []
+
+    monitor._save_columnar(old)
+    assert normalized(monitor._detect_changes(storage.get_latest_snapshot_info("jobs"), new)) == expected
+    assert used == [True]
+
+    # The SQLite snapshot moved on without the copy: it is stale and not used
+    storage.save_snapshot("jobs", new)
+    report = monitor._detect_changes(storage.get_latest_snapshot_info("jobs"), new)
+    assert not report.has_changes
+    assert used == [True]
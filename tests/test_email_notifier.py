@@ -0,0 +1,165 @@
+import email
+from email import policy
+import socketserver
+import threading
+
+import pytest
+
+from app.detection.base_detector import ChangeReport
+from app.notifiers.email_notifier import EmailNotifier, SMTPSession
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    """Minimal local SMTP server recording connections and messages."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        # Close the connection instead of answering this command, once
+        self.drop_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def should_drop(self, stage):
+        with self.lock:
+            if self.drop_at == stage:
+                self.drop_at = None
+                return True
+            return False
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 localhost")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().split(" ")[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                if command == "MAIL" and server.should_drop("MAIL"):
+                    return
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b""):
+                        break
+                    lines.append(data)
+                with server.lock:
+                    server.messages.append(b"".join(lines))
+                if server.should_drop("END"):
+                    return
+                self.reply("250 Queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def session(server):
+    return SMTPSession("127.0.0.1", server.port, use_tls=False)
+
+
+def report(*titles):
+    return ChangeReport(new_items=[{"title": title} for title in titles])
+
+
+def notifier(server, **kwargs):
+    return EmailNotifier(
+        "127.0.0.1", server.port, "", "", "to@example.com", from_email="from@example.com",
+        use_tls=False, **kwargs
+    )
+
+
+def subjects(server):
+    return [email.message_from_bytes(raw, policy=policy.default)["Subject"] for raw in server.messages]
+
+
+def test_session_reuses_one_connection(smtp_server):
+    smtp = session(smtp_server)
+    for i in range(3):
+        smtp.send("from@example.com", "to@example.com", f"Subject: {i}\r\n\r\nbody")
+    smtp.close()
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+    assert smtp.connections_opened == 1
+
+
+def test_session_reconnects_when_dropped_before_data(smtp_server):
+    smtp = session(smtp_server)
+    smtp.send("from@example.com", "to@example.com", "Subject: first\r\n\r\nbody")
+    smtp_server.drop_at = "MAIL"
+    smtp.send("from@example.com", "to@example.com", "Subject: second\r\n\r\nbody")
+    smtp.close()
+    assert len(smtp_server.messages) == 2
+    assert smtp.connections_opened == 2
+
+
+def test_session_does_not_resend_after_data_was_accepted(smtp_server):
+    smtp = session(smtp_server)
+    smtp_server.drop_at = "END"
+    with pytest.raises(Exception):
+        smtp.send("from@example.com", "to@example.com", "Subject: once\r\n\r\nbody")
+    smtp.close()
+    # The server may have delivered it; a retry would have sent it twice
+    assert len(smtp_server.messages) == 1
+
+
+def test_digest_batches_reports_into_one_email(smtp_server):
+    email_notifier = notifier(smtp_server, digest_window=60)
+    email_notifier.deliver(report("a"), "laptops")
+    email_notifier.deliver(report("b"), "laptops")
+    email_notifier.deliver(report("c"), "phones")
+    assert smtp_server.messages == []
+
+    email_notifier.close()
+    assert subjects(smtp_server) == ["🔔 [SWMAP] 3 changes across 2 sources"]
+
+
+def test_outbox_batch_goes_through_the_digest_in_digest_mode(smtp_server):
+    email_notifier = notifier(smtp_server, digest_window=60)
+    email_notifier.deliver(report("a"), "laptops")
+    errors = email_notifier.deliver_batch([(report("b"), "phones"), (report("c"), "phones")])
+    assert errors == [None, None]
+    # Sent right away, together with the report already waiting for the window
+    assert subjects(smtp_server) == ["🔔 [SWMAP] 3 changes across 2 sources"]
+    email_notifier.close()
+    assert len(smtp_server.messages) == 1
+
+
+def test_outbox_batch_without_digest_sends_one_email_per_report(smtp_server):
+    email_notifier = notifier(smtp_server)
+    errors = email_notifier.deliver_batch([(report("a"), "laptops"), (report("b"), "phones")])
+    email_notifier.close()
+    assert errors == [None, None]
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 1
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from app.storage.sqlite_dynamic import DynamicStorage
+from app.storage.sqlite_static import StaticStorage
+
+
+@pytest.fixture
+def dynamic(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = DynamicStorage()
+    yield storage
+    storage.conn.close()
+
+
+def run(storage, source_name, items):
+    storage.insert_jobs(items, source_name)
+    # Each run gets a later last_seen than the one before
+    time.sleep(0.002)
+
+
+def history(storage, table, source_name=None):
+    query = f"SELECT source_name, item_id, change_type FROM {table}"
+    params = ()
+    if source_name is not None:
+        query += " WHERE source_name = ?"
+        params = (source_name,)
+    return [tuple(row) for row in storage.conn.execute(query + " ORDER BY id", params)]
+
+
+def item(title, price="$1"):
+    return {"title": title, "price": price}
+
+
+def test_removed_and_readded_within_one_source(dynamic):
+    run(dynamic, "laptops", [item("a"), item("b")])
+    run(dynamic, "laptops", [item("a")])
+    run(dynamic, "laptops", [item("a"), item("b")])
+    assert history(dynamic, "dynamic_job_history") == [
+        ("laptops", "a", "added"),
+        ("laptops", "b", "added"),
+        ("laptops", "b", "removed"),
+        ("laptops", "b", "added"),
+    ]
+
+
+def test_sources_sharing_a_database_do_not_remove_each_other(dynamic):
+    run(dynamic, "laptops", [item("a"), item("b")])
+    run(dynamic, "phones", [item("x")])
+    run(dynamic, "laptops", [item("a"), item("b")])
+    run(dynamic, "phones", [item("x")])
+    changes = [row[2] for row in history(dynamic, "dynamic_job_history")]
+    assert changes == ["added", "added", "added"]
+
+
+def test_same_title_in_two_sources_is_two_items(dynamic):
+    run(dynamic, "laptops", [item("a", "$1")])
+    run(dynamic, "phones", [item("a", "$2")])
+    rows = dynamic.conn.execute(
+        "SELECT source_name, price FROM dynamic_jobs ORDER BY source_name"
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [("laptops", "$1"), ("phones", "$2")]
+
+
+def test_empty_scrape_removes_nothing(dynamic):
+    run(dynamic, "laptops", [item("a"), item("b")])
+    run(dynamic, "laptops", [])
+    run(dynamic, "laptops", [item("a"), item("b")])
+    assert [row[2] for row in history(dynamic, "dynamic_job_history")] == ["added", "added"]
+
+
+def test_static_company_change_is_recorded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = StaticStorage()
+    try:
+        run(storage, "jobs", [{"title": "Dev", "company": "A"}])
+        run(storage, "jobs", [{"title": "Dev", "company": "B"}])
+        rows = storage.conn.execute(
+            "SELECT change_type, field, old_value, new_value FROM job_history ORDER BY id"
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [
+            ("added", None, None, None),
+            ("changed", "company", "A", "B"),
+        ]
+        assert storage.conn.execute("SELECT COUNT(*) FROM job_snapshots").fetchone()[0] == 1
+    finally:
+        storage.conn.close()
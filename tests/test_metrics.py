@@ -0,0 +1,33 @@
+from app.core.metrics import MetricsRegistry
+
+
+def stage_count(registry, stage):
+    series = registry.snapshot()["timings"]["stage_seconds"]
+    return series[(("stage", stage),)][0]
+
+
+def test_nested_calls_of_a_stage_are_timed_once():
+    registry = MetricsRegistry()
+
+    @registry.timed("detect")
+    def inner():
+        pass
+
+    @registry.timed("detect")
+    def outer():
+        inner()
+
+    with registry.run("jobs") as run:
+        outer()
+        inner()
+    assert stage_count(registry, "detect") == 2
+    assert list(run.stages) == ["detect"]
+
+
+def test_different_stages_still_nest():
+    registry = MetricsRegistry()
+    with registry.timer("notify"):
+        with registry.timer("snapshot"):
+            pass
+    assert stage_count(registry, "notify") == 1
+    assert stage_count(registry, "snapshot") == 1
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.detection.base_detector import ChangeReport
+from app.notifiers.base_notifier import BaseNotifier
+from app.notifiers.outbox import OutboxDispatcher
+from app.storage.outbox_storage import OutboxStorage
+
+
+class RecordingNotifier(BaseNotifier):
+    """Fails the first `failures` batches, then records what it delivers."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def notify(self, change_report, source_name=None):
+        pass
+
+    def deliver_batch(self, reports, keys=None):
+        if self.failures:
+            self.failures -= 1
+            return [RuntimeError("endpoint down")] * len(reports)
+        self.batches.append((reports, keys))
+        return [None] * len(reports)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    storage = OutboxStorage(str(tmp_path / "outbox.db"))
+    yield storage
+    storage.conn.close()
+
+
+def enqueue(outbox, key, source_name="laptops"):
+    payload = ChangeReport(new_items=[{"title": key}]).to_dict()
+    return outbox.enqueue_notification("RecordingNotifier", source_name, payload, key)
+
+
+def rows(outbox):
+    cursor = outbox.conn.execute(
+        "SELECT idempotency_key, status, attempts FROM notification_outbox ORDER BY id"
+    )
+    return [tuple(row) for row in cursor]
+
+
+def dispatcher(outbox, notifier, **kwargs):
+    return OutboxDispatcher(outbox.db_path, {"RecordingNotifier": notifier}, **kwargs)
+
+
+def test_enqueue_is_idempotent_per_channel(outbox):
+    assert enqueue(outbox, "a") is True
+    assert enqueue(outbox, "a") is False
+    assert outbox.outbox_counts() == {"pending": 1}
+
+
+def test_claim_takes_due_rows_oldest_first(outbox):
+    for key in "abc":
+        enqueue(outbox, key)
+    first = outbox.claim_notifications(limit=2)
+    assert [row["idempotency_key"] for row in first] == ["a", "b"]
+    second = outbox.claim_notifications(limit=2)
+    assert [row["idempotency_key"] for row in second] == ["c"]
+    # Everything is leased now
+    assert outbox.claim_notifications() == []
+    assert outbox.outbox_counts() == {"sending": 3}
+
+
+def test_expired_lease_is_claimed_again(outbox):
+    enqueue(outbox, "a")
+    assert len(outbox.claim_notifications(lease_seconds=0)) == 1
+    # The first claimer died: its lease has run out
+    reclaimed = outbox.claim_notifications(lease_seconds=300)
+    assert [row["idempotency_key"] for row in reclaimed] == ["a"]
+    assert outbox.claim_notifications() == []
+
+
+def test_released_rows_are_pending_without_an_attempt(outbox):
+    enqueue(outbox, "a")
+    claimed = outbox.claim_notifications()
+    outbox.release_notifications([row["id"] for row in claimed])
+    assert rows(outbox) == [("a", "pending", 0)]
+
+
+def test_failed_delivery_is_retried_after_backoff(outbox):
+    enqueue(outbox, "a")
+    notifier = RecordingNotifier(failures=1)
+    worker = dispatcher(outbox, notifier, base_delay=60, max_delay=60)
+
+    assert worker.dispatch_once(outbox) == 1
+    assert rows(outbox) == [("a", "pending", 1)]
+    next_attempt = datetime.fromisoformat(outbox.conn.execute(
+        "SELECT next_attempt_at FROM notification_outbox"
+    ).fetchone()[0])
+    # Backoff with jitter: between half and all of base_delay
+    delay = next_attempt - datetime.now(timezone.utc)
+    assert timedelta(seconds=25) < delay <= timedelta(seconds=60)
+
+    # Not due yet
+    assert worker.dispatch_once(outbox) == 0
+    outbox.conn.execute("UPDATE notification_outbox SET next_attempt_at = ?",
+                        (datetime.now(timezone.utc).isoformat(),))
+    outbox.conn.commit()
+    assert worker.dispatch_once(outbox) == 1
+    assert rows(outbox) == [("a", "sent", 2)]
+    assert notifier.batches[0][1] == ["a"]
+
+
+def test_row_is_dead_after_max_attempts(outbox):
+    enqueue(outbox, "a")
+    worker = dispatcher(outbox, RecordingNotifier(failures=5), base_delay=0, max_attempts=2)
+    worker.dispatch_once(outbox)
+    worker.dispatch_once(outbox)
+    assert rows(outbox) == [("a", "dead", 2)]
+    assert worker.dispatch_once(outbox) == 0
+
+
+def test_backoff_doubles_up_to_the_cap(outbox):
+    worker = dispatcher(outbox, RecordingNotifier(), base_delay=5, max_delay=30)
+    for attempts, cap in [(1, 5), (2, 10), (3, 20), (4, 30), (10, 30)]:
+        delay = worker._backoff(attempts)
+        assert cap / 2 <= delay <= cap
+
+
+def test_rate_limited_rows_are_released(outbox):
+    for key in "abc":
+        enqueue(outbox, key)
+    notifier = RecordingNotifier()
+    worker = dispatcher(outbox, notifier, rate_limits={"RecordingNotifier": 2})
+    worker.dispatch_once(outbox)
+    assert [status for _, status, _ in rows(outbox)] == ["sent", "sent", "pending"]
+    assert [keys for _, keys in notifier.batches] == [["a", "b"]]
@@ -0,0 +1,31 @@
+import threading
+import tracemalloc
+
+from app.core.profiling import _StageProfiles
+
+MIB = 1024 * 1024
+
+
+def test_nested_stage_keeps_outer_peak():
+    tracemalloc.start()
+    try:
+        stages = _StageProfiles(threading.get_ident())
+        stages.start()
+        stages.stage_started("detect")
+        big = bytearray(8 * MIB)
+        del big
+        stages.stage_started("snapshot_load")
+        small = bytearray(MIB)
+        del small
+        stages.stage_finished("snapshot_load")
+        stages.stage_finished("detect")
+        stages.stop()
+        run_peak = stages.peak_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Growth is measured from the memory in use at stage start, which other
+    # threads' frees can lower a little: compare with some slack
+    assert stages.peaks["detect"] > 7 * MIB
+    assert MIB // 2 < stages.peaks["snapshot_load"] < 4 * MIB
+    assert run_peak > 7 * MIB
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.storage.retention import RetentionEngine, RetentionPolicy
+from app.storage.snapshot_cache import SNAPSHOT_CACHE
+from app.storage.source_storage import StoragePool
+from app.storage.sqlite_static import StaticStorage
+
+NOW = datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    SNAPSHOT_CACHE.clear()
+    pool = StoragePool(str(tmp_path / "sources.db"), readers=1)
+    yield pool
+    pool.close()
+    SNAPSHOT_CACHE.clear()
+
+
+def snapshots_at(*ages):
+    """Snapshot metadata at the given ages (oldest first), ids from 1."""
+    return [
+        {"id": i, "created_at": (NOW - age).isoformat()}
+        for i, age in enumerate(sorted(ages, reverse=True), start=1)
+    ]
+
+
+def test_keep_last_alone_is_a_count_limit():
+    snapshots = snapshots_at(*(timedelta(days=d) for d in range(5)))
+    assert RetentionPolicy(keep_last=2).expired(snapshots, NOW) == [1, 2, 3]
+
+
+def test_max_age_drops_old_snapshots_but_keeps_the_newest():
+    snapshots = snapshots_at(timedelta(days=9), timedelta(days=8), timedelta(days=1))
+    policy = RetentionPolicy(keep_last=1, max_age=timedelta(days=7))
+    assert sorted(policy.expired(snapshots, NOW)) == [1, 2]
+    # Even when all are too old, keep_last protects the newest
+    snapshots = snapshots_at(timedelta(days=9), timedelta(days=8))
+    assert policy.expired(snapshots, NOW) == [1]
+
+
+def test_tiered_keeps_hourly_then_daily_snapshots():
+    ages = [
+        # Older than 30 days: dropped
+        timedelta(days=40),
+        # Two on the same day, 3 days ago: the newer one is kept
+        timedelta(days=3, hours=2), timedelta(days=3, hours=1),
+        # Three within the same hour today (12:00-12:30): only the newest is kept
+        timedelta(minutes=25), timedelta(minutes=20), timedelta(minutes=10),
+        # An earlier hour today
+        timedelta(hours=3),
+    ]
+    snapshots = snapshots_at(*ages)
+    expired = RetentionPolicy.tiered(keep_last=1).expired(snapshots, NOW)
+    kept = [s["id"] for s in snapshots if s["id"] not in expired]
+    by_age = {s["id"]: NOW - datetime.fromisoformat(s["created_at"]) for s in snapshots}
+    assert sorted(by_age[i] for i in kept) == [
+        timedelta(minutes=10), timedelta(hours=3), timedelta(days=3, hours=1)
+    ]
+
+
+def test_engine_deletes_in_batches_and_keeps_survivors_readable(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SNAPSHOT_CACHE.clear()
+    storage = StaticStorage()
+    try:
+        versions = [[{"title": f"job {j}", "company": "Acme"} for j in range(20 + i)] for i in range(7)]
+        ids = [storage.save_snapshot("jobs", data) for data in versions]
+        assert storage.get_snapshot_info(ids[1])["snapshot_type"] == "delta"
+        # Spread the snapshots over days so the tiered policy keeps one per day
+        ages = [timedelta(days=40), timedelta(days=5, hours=2), timedelta(days=5, hours=1),
+                timedelta(days=2), timedelta(hours=5), timedelta(hours=4, minutes=40),
+                timedelta(minutes=5)]
+        for snapshot_id, age in zip(ids, ages):
+            storage.conn.execute("UPDATE snapshots SET created_at = ? WHERE id = ?",
+                                 ((NOW - age).isoformat(), snapshot_id))
+        storage.conn.commit()
+
+        commits = []
+        commit = storage._commit
+        storage._commit = lambda: (commits.append(1), commit())
+        engine = RetentionEngine(storage, RetentionPolicy.tiered(keep_last=1), batch_size=2)
+        assert engine.apply("jobs", now=NOW) == 3
+        storage._commit = commit
+        # 40 days old, the older one of day 5 and the older one of hour 7: two batches
+        assert len(commits) >= 2
+
+        remaining = [s["id"] for s in storage.list_snapshots("jobs")]
+        assert remaining == [ids[2], ids[3], ids[5], ids[6]]
+        SNAPSHOT_CACHE.clear()
+        for snapshot_id in remaining:
+            assert storage.get_snapshot(snapshot_id) == versions[ids.index(snapshot_id)]
+    finally:
+        storage.conn.close()
+        SNAPSHOT_CACHE.clear()
+
+
+def sent_notification(store, source_name, key):
+    store.enqueue_notification("email", source_name, {"source": source_name}, key)
+    row_id = store.conn.execute(
+        "SELECT id FROM notification_outbox WHERE idempotency_key = ?", (key,)
+    ).fetchone()[0]
+    store.mark_notification_sent(row_id)
+
+
+def outbox_sources(pool):
+    return pool.read(lambda store: sorted(
+        row[0] for row in store.conn.execute("SELECT source_name FROM notification_outbox")
+    ))
+
+
+def test_source_retention_leaves_other_sources_alone(pool):
+    laptops = pool.source("laptops", ["title"])
+    phones = pool.source("phones", ["title"])
+    for i in range(3):
+        laptops.save_snapshot("laptops", [{"title": f"l{i}"}])
+        phones.save_snapshot("phones", [{"title": f"p{i}"}])
+    pool.writer.call(sent_notification, "laptops", "laptops-1")
+    pool.writer.call(sent_notification, "phones", "phones-1")
+    pool.flush()
+
+    engine = RetentionEngine(laptops, RetentionPolicy(keep_last=1), outbox_max_age=timedelta(0))
+    result = engine.run(now=datetime.now(timezone.utc) + timedelta(seconds=1))
+
+    assert result == {"deleted": 2, "notifications_pruned": 1, "pages_released": 0}
+    assert len(laptops.list_snapshots("laptops")) == 1
+    assert len(phones.list_snapshots("phones")) == 3
+    assert outbox_sources(pool) == ["phones"]
+    assert pool.incremental_vacuum() >= 0
@@ -0,0 +1,74 @@
+import pytest
+
+from app.detection.hashers import hash_dataset
+from app.storage.snapshot_cache import SNAPSHOT_CACHE
+from app.storage.snapshot_delta import apply_delta, compute_delta
+from app.storage.sqlite_static import StaticStorage
+
+
+def job(title, company="Acme"):
+    return {"title": title, "company": company}
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SNAPSHOT_CACHE.clear()
+    storage = StaticStorage()
+    yield storage
+    storage.conn.close()
+    SNAPSHOT_CACHE.clear()
+
+
+def test_delta_restores_reordered_items():
+    old = [job("a"), job("b"), job("c")]
+    new = list(reversed(old))
+    delta = compute_delta(old, new, ["title"])
+    assert delta["added"] == [] and delta["removed"] == [] and delta["changed"] == {}
+    assert apply_delta(old, delta) == new
+
+
+def test_delta_without_reordering_records_no_order():
+    old = [job("a"), job("b")]
+    new = [job("a"), job("b", "Other"), job("c")]
+    delta = compute_delta(old, new, ["title"])
+    assert "order" not in delta
+    assert apply_delta(old, delta) == new
+
+
+def test_snapshot_round_trip_with_reordered_added_and_removed_items(storage):
+    first = [job("a"), job("b"), job("c"), job("d"), job("e"), job("f")]
+    # Reordered, "c" removed, "g" added in the middle, "a" changed
+    second = [job("f"), job("g"), job("e"), job("a", "Other"), job("d"), job("b")]
+    first_id = storage.save_snapshot("jobs", first)
+    second_id = storage.save_snapshot("jobs", second)
+    assert storage.get_snapshot_info(second_id)["snapshot_type"] == "delta"
+    storage.conn.close()
+
+    # With nothing cached, the delta chain is replayed from the keyframe
+    SNAPSHOT_CACHE.clear()
+    reopened = StaticStorage()
+    try:
+        assert reopened.get_snapshot(first_id) == first
+        restored = reopened.get_snapshot(second_id)
+        assert restored == second
+        assert hash_dataset(restored) == reopened.get_snapshot_info(second_id)["data_hash"]
+    finally:
+        reopened.conn.close()
+
+
+def test_reorder_only_snapshot_matches_its_hash(storage):
+    first = [job(str(i)) for i in range(10)]
+    second = list(reversed(first))
+    storage.save_snapshot("jobs", first)
+    second_id = storage.save_snapshot("jobs", second)
+    storage.conn.close()
+
+    SNAPSHOT_CACHE.clear()
+    reopened = StaticStorage()
+    try:
+        restored = reopened.get_snapshot(second_id)
+        assert restored == second
+        assert hash_dataset(restored) == reopened.get_snapshot_info(second_id)["data_hash"]
+    finally:
+        reopened.conn.close()
@@ -0,0 +1,112 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from app.storage.snapshot_cache import SNAPSHOT_CACHE
+from app.storage.sqlite_static import StaticStorage
+from app.storage.writer import Standalone, StorageWriter, WriteBehindStorage
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SNAPSHOT_CACHE.clear()
+    writer = StorageWriter(StaticStorage, batch_size=50)
+    # Number the transactions the writer opens
+    storage = writer.storage
+    storage.transactions = 0
+    transaction = storage.transaction
+
+    @contextmanager
+    def counted():
+        if storage._transaction_depth == 0:
+            storage.transactions += 1
+        with transaction() as inner:
+            yield inner
+
+    storage.transaction = counted
+    yield writer
+    writer.close()
+    SNAPSHOT_CACHE.clear()
+
+
+def hold(writer):
+    """Block the writer thread until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def wait(storage):
+        started.set()
+        release.wait(10)
+
+    writer.submit(Standalone(wait))
+    # Commands submitted from now on queue up behind it
+    started.wait(10)
+    return release
+
+
+def current_transaction(storage):
+    return storage.transactions
+
+
+def failing(storage):
+    storage.conn.execute("INSERT INTO no_such_table VALUES (1)")
+
+
+def titles(writer):
+    return sorted(job["title"] for job in writer.call("get_all_jobs"))
+
+
+def test_queued_commands_share_one_transaction(writer):
+    release = hold(writer)
+    futures = [writer.submit(current_transaction) for _ in range(10)]
+    release.set()
+    assert len({future.result(5) for future in futures}) == 1
+
+
+def test_batch_size_bounds_a_transaction(writer):
+    writer.batch_size = 4
+    release = hold(writer)
+    futures = [writer.submit(current_transaction) for _ in range(10)]
+    release.set()
+    assert len({future.result(5) for future in futures}) == 3
+
+
+def test_failed_command_does_not_sink_its_batch(writer):
+    release = hold(writer)
+    first = writer.submit("insert_jobs", [{"title": "a", "company": "x"}], "jobs")
+    bad = writer.submit(failing)
+    second = writer.submit("insert_jobs", [{"title": "b", "company": "x"}], "other")
+    release.set()
+
+    first.result(5)
+    second.result(5)
+    with pytest.raises(Exception, match="no_such_table"):
+        bad.result(5)
+    assert titles(writer) == ["a", "b"]
+
+
+def test_standalone_command_runs_outside_the_batch(writer):
+    release = hold(writer)
+    before = writer.submit(lambda storage: storage._transaction_depth)
+    alone = writer.submit(Standalone(lambda storage: storage._transaction_depth))
+    after = writer.submit(lambda storage: storage._transaction_depth)
+    release.set()
+    assert (before.result(5), alone.result(5), after.result(5)) == (1, 0, 1)
+
+
+def test_transaction_group_is_all_or_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = WriteBehindStorage(StaticStorage)
+    try:
+        with storage.transaction():
+            ok = storage.insert_jobs([{"title": "a", "company": "x"}], "jobs")
+            storage._write(failing)
+        with pytest.raises(Exception):
+            ok.result(5)
+        assert storage.get_all_jobs() == []
+
+        storage.insert_jobs([{"title": "b", "company": "x"}], "jobs").result(5)
+        assert [job["title"] for job in storage.get_all_jobs()] == ["b"]
+    finally:
+        storage.close()
@@ -0,0 +1,139 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from app.notifiers.telegram_notifier import MESSAGE_LIMIT, TelegramNotifier, split_message
+
+
+def test_split_keeps_single_escape_with_its_character():
+    # Nine chars, then "\." straddling the limit of 10
+    chunks = split_message("aaaaaaaaa\\.bbbbb", limit=10)
+    assert chunks == ["aaaaaaaaa", "\\.bbbbb"]
+
+
+def test_split_keeps_escaped_backslash_pair_together():
+    # "\\" is one complete escape (a literal backslash) ending at the limit
+    chunks = split_message("aaaaaaaa\\\\.bbbbb", limit=10)
+    assert chunks == ["aaaaaaaa\\\\", ".bbbbb"]
+
+
+def test_split_with_three_backslashes_at_boundary():
+    # "\\" + "\." : the pair stays, the lone escape moves with its "."
+    chunks = split_message("aaaaaaa\\\\\\.bbbbb", limit=10)
+    assert chunks == ["aaaaaaa\\\\", "\\.bbbbb"]
+
+
+def test_split_chunks_never_end_in_a_lone_escape():
+    text = "\\." * 40
+    for chunk in split_message(text, limit=7):
+        assert len(chunk) <= 7
+        trailing = len(chunk) - len(chunk.rstrip("\\"))
+        assert trailing % 2 == 0
+    assert "".join(split_message(text, limit=7)) == text
+
+
+def test_split_closes_and_reopens_bold_across_a_cut():
+    text = "*" + "word " * 30 + "end*"
+    chunks = split_message(text, limit=40)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 40
+        assert chunk.startswith("*") and chunk.endswith("*")
+        assert not chunk.startswith("**") and not chunk.endswith("**")
+    assert "".join(chunk[1:-1] for chunk in chunks).replace(" ", "") == ("word" * 30 + "end")
+
+
+def test_split_closes_italic_open_at_a_line_break():
+    text = "_first line\nsecond line_"
+    assert split_message(text, limit=15) == ["_first line_", "_second line_"]
+
+
+def test_split_treats_markers_inside_code_as_text():
+    header = "📊 *Report* \\- `dynamic_laptops`"
+    chunks = split_message(header + "\n" + "x" * 20, limit=len(header) + 5)
+    assert chunks == [header, "x" * 20]
+
+
+class BotAPIStub(ThreadingHTTPServer):
+    """Local stand-in for the Telegram Bot API."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), BotAPIHandler)
+        self.calls = []
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/bot"
+
+    def sent_texts(self):
+        return [params["text"] for method, params in self.calls if method == "sendMessage"]
+
+
+class BotAPIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        method = self.path.rsplit("/", 1)[-1]
+        length = int(self.headers.get("Content-Length", 0))
+        params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        self.server.calls.append((method, params))
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Stub", "username": "stub_bot"}
+        else:
+            result = {
+                "message_id": len(self.server.calls), "date": 0,
+                "chat": {"id": 1, "type": "private"}, "text": params.get("text", ""),
+            }
+        body = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def bot_api():
+    server = BotAPIStub()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def notifier(bot_api, **kwargs):
+    return TelegramNotifier("123:TOKEN", "1", base_url=bot_api.base_url, messages_per_second=0, **kwargs)
+
+
+def test_reports_within_the_window_are_coalesced(bot_api):
+    telegram = notifier(bot_api, coalesce_window=0.3)
+    try:
+        futures = [telegram.submit(f"report {i}") for i in range(3)]
+        for future in futures:
+            future.result(timeout=10)
+    finally:
+        telegram.close()
+    assert bot_api.sent_texts() == ["report 0\n\nreport 1\n\nreport 2"]
+
+
+def test_long_burst_is_chunked_over_one_client(bot_api):
+    telegram = notifier(bot_api)
+    lines = [f"  • item {i} *bold {i}*" for i in range(400)]
+    try:
+        telegram.submit("\n".join(lines)).result(timeout=10)
+        telegram.submit("second burst").result(timeout=10)
+    finally:
+        telegram.close()
+
+    texts = bot_api.sent_texts()
+    assert len(texts) > 2 and texts[-1] == "second burst"
+    assert all(len(text) <= MESSAGE_LIMIT for text in texts)
+    assert "\n".join(texts[:-1]) == "\n".join(lines)
+    # The loop and its client live across bursts: the bot initialized once
+    assert [method for method, _ in bot_api.calls].count("getMe") == 1
@@ -0,0 +1,115 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.detection.base_detector import ChangeReport
+from app.notifiers.webhook_notifier import WebhookNotifier
+
+
+class Receiver(ThreadingHTTPServer):
+    """Local webhook endpoint recording every request."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ReceiverHandler)
+        self.requests = []
+        # Status codes answered before the normal 200s
+        self.failures = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/hook"
+
+    def payloads(self):
+        return [payload for _, payload, status in self.requests if status == 200]
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        status = self.server.failures.pop(0) if self.server.failures else 200
+        self.server.requests.append((dict(self.headers), json.loads(body), status))
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def receiver():
+    server = Receiver()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def report(*titles):
+    return ChangeReport(new_items=[{"title": title} for title in titles])
+
+
+def test_large_bodies_are_gzipped(receiver):
+    webhook = WebhookNotifier(receiver.url, min_compress_size=1500)
+    webhook.deliver(report(*(f"item {i}" for i in range(200))), "laptops")
+    webhook.deliver(report("a"), "phones")
+    webhook.close()
+
+    (big_headers, big, _), (small_headers, small, _) = receiver.requests
+    assert big_headers.get("Content-Encoding") == "gzip"
+    assert len(big["reports"][0]["changes"]["new_items"]) == 200
+    assert "Content-Encoding" not in small_headers
+    assert small["reports"][0]["source_name"] == "phones"
+
+
+def test_report_keys_do_not_depend_on_the_batch(receiver):
+    reports = [(report("a"), "laptops"), (report("b"), "phones"), (report("c"), "tablets")]
+    keys = ["laptops:1:2", "phones:3:4", "tablets:5:6"]
+
+    webhook = WebhookNotifier(receiver.url, batch_size=3)
+    assert webhook.deliver_batch(reports, keys) == [None, None, None]
+    webhook.batch_size = 1
+    assert webhook.deliver_batch(reports[1:], keys[1:]) == [None, None]
+    webhook.close()
+
+    batched, *singles = receiver.requests
+    assert [r["idempotency_key"] for r in batched[1]["reports"]] == keys
+    single_keys = sorted(headers["Idempotency-Key"] for headers, _, _ in singles)
+    assert single_keys == keys[1:]
+    assert sorted(r["idempotency_key"] for _, body, _ in singles for r in body["reports"]) == keys[1:]
+
+
+def test_direct_reports_get_a_stable_key(receiver):
+    webhook = WebhookNotifier(receiver.url)
+    webhook.deliver(report("a"), "laptops")
+    webhook.deliver(report("a"), "laptops")
+    webhook.close()
+    first, second = receiver.requests
+    assert first[0]["Idempotency-Key"] == second[0]["Idempotency-Key"]
+    assert first[1]["reports"][0]["idempotency_key"] == first[0]["Idempotency-Key"]
+
+
+def test_server_errors_are_retried_with_the_same_key(receiver):
+    receiver.failures = [503, 502]
+    webhook = WebhookNotifier(receiver.url, max_retries=2)
+    assert webhook.deliver_batch([(report("a"), "laptops")], ["laptops:1:2"]) == [None]
+    webhook.close()
+
+    assert [status for _, _, status in receiver.requests] == [503, 502, 200]
+    assert {headers["Idempotency-Key"] for headers, _, _ in receiver.requests} == {"laptops:1:2"}
+
+
+def test_exhausted_retries_are_reported_per_report(receiver):
+    receiver.failures = [500, 500]
+    webhook = WebhookNotifier(receiver.url, max_retries=1)
+    errors = webhook.deliver_batch([(report("a"), "laptops"), (ChangeReport(), "phones")])
+    webhook.close()
+    assert errors[0] is not None and errors[1] is None
+    assert receiver.payloads() == []